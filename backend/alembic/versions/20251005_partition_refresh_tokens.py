@@ -0,0 +1,131 @@
+"""optional: partition refresh_tokens by expires_at (monthly ranges)
+
+Revision ID: 20251005_rt_partitioning
+Revises: 20250928_add_auth_token_tables
+Create Date: 2025-10-05
+
+Секционирование включается явно: REFRESH_TOKENS_PARTITIONED=1 при `alembic upgrade`.
+Без флага миграция ничего не меняет (обычная таблица + батчевый reaper).
+
+В секционированной таблице уникальность возможна только вместе с ключом
+секционирования, поэтому PK становится (id, expires_at), а уникальность jti —
+(jti, expires_at). id по-прежнему берётся из одной последовательности.
+Секции наперёд создаёт и истекшие удаляет app.services.token_reaper.
+"""
+import os
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251005_rt_partitioning"
+down_revision = "20250928_add_auth_token_tables"
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _enabled() -> bool:
+    return os.getenv("REFRESH_TOKENS_PARTITIONED", "").lower() in ("1", "true", "yes")
+
+
+def _is_partitioned(bind) -> bool:
+    return bind.exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'refresh_tokens'"
+    ).scalar() is not None
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _enabled() or _is_partitioned(bind):
+        return
+
+    op.execute(
+        """
+        CREATE TABLE refresh_tokens_new (
+            id integer NOT NULL DEFAULT nextval('refresh_tokens_id_seq'),
+            user_id integer NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            jti varchar(64) NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expires_at timestamptz NOT NULL,
+            revoked boolean NOT NULL DEFAULT FALSE,
+            user_agent varchar(256),
+            ip varchar(64),
+            CONSTRAINT pk_refresh_tokens PRIMARY KEY (id, expires_at),
+            CONSTRAINT uq_refresh_tokens_jti_expires UNIQUE (jti, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+        """
+    )
+    op.execute("CREATE TABLE refresh_tokens_default PARTITION OF refresh_tokens_new DEFAULT")
+
+    # помесячные секции: от самого раннего живого токена до MONTHS_AHEAD вперёд
+    first = bind.exec_driver_sql(
+        "SELECT date_trunc('month', min(expires_at))::date FROM refresh_tokens WHERE expires_at >= now()"
+    ).scalar()
+    start = (first or date.today()).replace(day=1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    while start <= last:
+        end = _add_months(start, 1)
+        op.execute(
+            f"CREATE TABLE refresh_tokens_p{start:%Y%m} PARTITION OF refresh_tokens_new "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    # истекшие токены не переносим — это и есть чистка
+    op.execute(
+        """
+        INSERT INTO refresh_tokens_new (id, user_id, jti, created_at, expires_at, revoked, user_agent, ip)
+        SELECT id, user_id, jti, created_at, expires_at, revoked, user_agent, ip
+        FROM refresh_tokens WHERE expires_at >= now()
+        """
+    )
+
+    op.execute("ALTER SEQUENCE refresh_tokens_id_seq OWNED BY NONE")
+    op.drop_table("refresh_tokens")
+    op.execute("ALTER TABLE refresh_tokens_new RENAME TO refresh_tokens")
+    op.execute("ALTER SEQUENCE refresh_tokens_id_seq OWNED BY refresh_tokens.id")
+
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+    op.create_index("ix_refresh_tokens_jti", "refresh_tokens", ["jti"])
+    op.create_index("ix_refresh_tokens_user_active", "refresh_tokens", ["user_id", "revoked"])
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _is_partitioned(bind):
+        return
+
+    op.execute("ALTER TABLE refresh_tokens RENAME TO refresh_tokens_part")
+    op.execute("ALTER INDEX ix_refresh_tokens_user_id RENAME TO ix_refresh_tokens_part_user_id")
+    op.execute("ALTER INDEX ix_refresh_tokens_jti RENAME TO ix_refresh_tokens_part_jti")
+    op.execute("ALTER INDEX ix_refresh_tokens_user_active RENAME TO ix_refresh_tokens_part_user_active")
+
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), primary_key=True,
+                  server_default=sa.text("nextval('refresh_tokens_id_seq')")),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True),
+        sa.Column("jti", sa.String(length=64), nullable=False, unique=True, index=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked", sa.Boolean(), nullable=False, server_default=sa.text("FALSE")),
+        sa.Column("user_agent", sa.String(length=256)),
+        sa.Column("ip", sa.String(length=64)),
+    )
+    op.create_index("ix_refresh_tokens_user_active", "refresh_tokens", ["user_id", "revoked"])
+    op.execute(
+        """
+        INSERT INTO refresh_tokens (id, user_id, jti, created_at, expires_at, revoked, user_agent, ip)
+        SELECT id, user_id, jti, created_at, expires_at, revoked, user_agent, ip FROM refresh_tokens_part
+        """
+    )
+    op.execute("ALTER SEQUENCE refresh_tokens_id_seq OWNED BY refresh_tokens.id")
+    op.execute("DROP TABLE refresh_tokens_part")
@@ -0,0 +1,34 @@
+"""refresh_tokens.family_id (reuse detection по семействам ротаций)
+
+Revision ID: 20251012_rt_family
+Revises: 20251005_rt_partitioning
+Create Date: 2025-10-12
+
+Частичный индекс только по живым токенам: отзыв семейства
+(UPDATE ... WHERE family_id = :fam AND NOT revoked) идёт по нему и не растёт
+вместе с историей ротаций. Старые строки остаются с NULL — такие токены
+получают новое семейство при первой ротации.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251012_rt_family"
+down_revision = "20251005_rt_partitioning"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("refresh_tokens", sa.Column("family_id", sa.String(length=36), nullable=True))
+    op.create_index(
+        "ix_refresh_tokens_family_active",
+        "refresh_tokens",
+        ["family_id"],
+        postgresql_where=sa.text("NOT revoked"),
+        sqlite_where=sa.text("NOT revoked"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_refresh_tokens_family_active", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "family_id")
@@ -0,0 +1,22 @@
+"""indexes for admin keyset pagination (users by role, sessions by created_at)
+
+Revision ID: 20251019_admin_keyset_idx
+Revises: 20251012_rt_family
+Create Date: 2025-10-19
+"""
+from alembic import op
+
+revision = "20251019_admin_keyset_idx"
+down_revision = "20251012_rt_family"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_users_role_id", "users", ["role", "id"])
+    op.create_index("ix_refresh_tokens_user_created", "refresh_tokens", ["user_id", "created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_refresh_tokens_user_created", table_name="refresh_tokens")
+    op.drop_index("ix_users_role_id", table_name="users")
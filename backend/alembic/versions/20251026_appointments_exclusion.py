@@ -0,0 +1,67 @@
+"""appointments: timestamptz, no double booking (GiST exclusion), lookup indexes
+
+Revision ID: 20251026_appt_exclusion
+Revises: 20251019_admin_keyset_idx
+Create Date: 2025-10-26
+
+starts_at/ends_at переводятся в timestamptz (старые значения считаем UTC):
+tstzrange от timestamp без зоны не IMMUTABLE и в ограничении не допускается.
+
+EXCLUDE USING gist (doctor_id WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&)
+гарантирует отсутствие пересечений на уровне БД: конкурентные INSERT не
+требуют блокировок, проигравший получает 23P01 (exclusion_violation).
+Если в таблице уже есть пересекающиеся записи, upgrade упадёт — их надо
+разобрать вручную (отменить лишние).
+"""
+from alembic import op
+
+revision = "20251026_appt_exclusion"
+down_revision = "20251019_admin_keyset_idx"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    is_pg = bind.dialect.name == "postgresql"
+
+    if is_pg:
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE appointments "
+            "ALTER COLUMN starts_at TYPE timestamptz USING starts_at AT TIME ZONE 'UTC', "
+            "ALTER COLUMN ends_at TYPE timestamptz USING ends_at AT TIME ZONE 'UTC'"
+        )
+
+    op.create_check_constraint("ck_appointments_range", "appointments", "ends_at > starts_at")
+    op.create_index("ix_appointments_doctor_starts", "appointments", ["doctor_id", "starts_at"])
+    op.create_index("ix_appointments_patient_starts", "appointments", ["patient_id", "starts_at"])
+
+    if is_pg:
+        op.execute(
+            """
+            ALTER TABLE appointments ADD CONSTRAINT ex_appointments_doctor_overlap
+            EXCLUDE USING gist (
+                doctor_id WITH =,
+                tstzrange(starts_at, ends_at, '[)') WITH &&
+            ) WHERE (status <> 'cancelled')
+            """
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    is_pg = bind.dialect.name == "postgresql"
+
+    if is_pg:
+        op.execute("ALTER TABLE appointments DROP CONSTRAINT IF EXISTS ex_appointments_doctor_overlap")
+    op.drop_index("ix_appointments_patient_starts", table_name="appointments")
+    op.drop_index("ix_appointments_doctor_starts", table_name="appointments")
+    op.drop_constraint("ck_appointments_range", "appointments", type_="check")
+    if is_pg:
+        op.execute(
+            "ALTER TABLE appointments "
+            "ALTER COLUMN starts_at TYPE timestamp USING starts_at AT TIME ZONE 'UTC', "
+            "ALTER COLUMN ends_at TYPE timestamp USING ends_at AT TIME ZONE 'UTC'"
+        )
+    # btree_gist оставляем: расширение могут использовать и другие объекты
@@ -0,0 +1,80 @@
+"""doctor directory search: pg_trgm GIN + tsvector indexes over doctors/clinics
+
+Revision ID: 20251102_doctor_search
+Revises: 20251026_appt_exclusion
+Create Date: 2025-11-02
+
+Колонки doctor_profiles.title и clinics.address/phone/description есть в
+моделях, но ни одна миграция их не создавала (на части стендов они
+появились через автогенерацию) — добавляем с IF NOT EXISTS и переносим
+specialty -> title, если осталась старая колонка из 0001_init.
+
+Выражения tsvector должны совпадать с app.services.doctor_search
+(DOCTOR_TSV/CLINIC_TSV) — иначе запросы не попадут в индексы.
+"""
+from alembic import op
+
+revision = "20251102_doctor_search"
+down_revision = "20251026_appt_exclusion"
+branch_labels = None
+depends_on = None
+
+DOCTOR_TSV = "to_tsvector('simple'::regconfig, coalesce(title, ''))"
+CLINIC_TSV = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(name, '') || ' ' || coalesce(address, '') || ' ' || coalesce(description, ''))"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE doctor_profiles ADD COLUMN IF NOT EXISTS title varchar")
+    op.execute("ALTER TABLE clinics ADD COLUMN IF NOT EXISTS address varchar")
+    op.execute("ALTER TABLE clinics ADD COLUMN IF NOT EXISTS phone varchar")
+    op.execute("ALTER TABLE clinics ADD COLUMN IF NOT EXISTS description varchar")
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'doctor_profiles' AND column_name = 'specialty'
+            ) THEN
+                UPDATE doctor_profiles SET title = specialty WHERE title IS NULL AND specialty IS NOT NULL;
+            END IF;
+        END$$;
+        """
+    )
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # fuzzy (%) и подстрока (ILIKE) — GIN по триграммам
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctor_profiles_title_trgm ON doctor_profiles USING gin (title gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_clinics_name_trgm ON clinics USING gin (name gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_clinics_address_trgm ON clinics USING gin (address gin_trgm_ops)")
+
+    # префиксный поиск по словам — GIN по tsvector
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_doctor_profiles_search_tsv ON doctor_profiles USING gin (({DOCTOR_TSV}))")
+    op.execute(f"CREATE INDEX IF NOT EXISTS ix_clinics_search_tsv ON clinics USING gin (({CLINIC_TSV}))")
+
+    # join клиника -> врачи (в 0001_init индекса на FK не было)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_doctor_profiles_clinic_id ON doctor_profiles (clinic_id)")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    for name in (
+        "ix_clinics_search_tsv",
+        "ix_doctor_profiles_search_tsv",
+        "ix_clinics_address_trgm",
+        "ix_clinics_name_trgm",
+        "ix_doctor_profiles_title_trgm",
+    ):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    # колонки и ix_doctor_profiles_clinic_id не трогаем: они описаны в моделях
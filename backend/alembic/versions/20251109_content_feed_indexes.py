@@ -0,0 +1,37 @@
+"""content_items: composite indexes for the keyset feed
+
+Revision ID: 20251109_content_feed_idx
+Revises: 20251102_doctor_search
+Create Date: 2025-11-09
+
+Лента — ORDER BY created_at DESC, id DESC LIMIT n с условием
+(created_at, id) < (:c, :i); индекс (created_at, id) читается в обратном
+порядке, (author_doctor_id, created_at, id) — для ленты врача и подписок.
+В Postgres строим CONCURRENTLY, чтобы не блокировать запись в большую таблицу.
+"""
+from alembic import op
+
+revision = "20251109_content_feed_idx"
+down_revision = "20251102_doctor_search"
+branch_labels = None
+depends_on = None
+
+_INDEXES = {
+    "ix_content_items_created_id": ["created_at", "id"],
+    "ix_content_items_author_created_id": ["author_doctor_id", "created_at", "id"],
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, cols in _INDEXES.items():
+                op.create_index(name, "content_items", cols, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, cols in _INDEXES.items():
+            op.create_index(name, "content_items", cols)
+
+
+def downgrade():
+    for name in _INDEXES:
+        op.drop_index(name, table_name="content_items")
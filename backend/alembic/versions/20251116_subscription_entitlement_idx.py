@@ -0,0 +1,37 @@
+"""subscriptions: partial index for entitlement checks
+
+Revision ID: 20251116_subscription_access
+Revises: 20251109_content_feed_idx
+Create Date: 2025-11-16
+
+Проверка «видит ли пациент P материалы врача D» и загрузка набора врачей
+пациента идут по (patient_id, doctor_id, expires_at) WHERE is_active —
+неактивные подписки в индекс не попадают. CONCURRENTLY в Postgres.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251116_subscription_access"
+down_revision = "20251109_content_feed_idx"
+branch_labels = None
+depends_on = None
+
+_NAME = "ix_subscriptions_active_patient_doctor"
+_COLS = ["patient_id", "doctor_id", "expires_at"]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                _NAME, "subscriptions", _COLS,
+                postgresql_where=sa.text("is_active"),
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    else:
+        op.create_index(_NAME, "subscriptions", _COLS, sqlite_where=sa.text("is_active"))
+
+
+def downgrade():
+    op.drop_index(_NAME, table_name="subscriptions")
@@ -0,0 +1,45 @@
+"""payments: idempotency key; outbox_events table
+
+Revision ID: 20251123_payments_outbox
+Revises: 20251116_subscription_access
+Create Date: 2025-11-23
+
+Вебхук провайдера пишет платёж одним INSERT ... ON CONFLICT
+(provider, idempotency_key), поэтому ретраи не создают дублей. Побочные
+эффекты (подписка, уведомления) идут через outbox_events, в той же
+транзакции, что и платёж.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251123_payments_outbox"
+down_revision = "20251116_subscription_access"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("payments", sa.Column("idempotency_key", sa.String(length=128), nullable=True))
+    op.add_column("payments", sa.Column("doctor_id", sa.Integer(), sa.ForeignKey("doctor_profiles.id"), nullable=True))
+    # NULL-ключи (старые строки) уникальности не мешают
+    op.create_index("uq_payments_provider_idempotency", "payments", ["provider", "idempotency_key"], unique=True)
+
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("topic", sa.String(length=64), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_outbox_events_available_id", "outbox_events", ["available_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_outbox_events_available_id", table_name="outbox_events")
+    op.drop_table("outbox_events")
+    op.drop_index("uq_payments_provider_idempotency", table_name="payments")
+    op.drop_column("payments", "doctor_id")
+    op.drop_column("payments", "idempotency_key")
@@ -0,0 +1,36 @@
+"""email_outbox table
+
+Revision ID: 20251130_email_outbox
+Revises: 20251123_payments_outbox
+Create Date: 2025-11-30
+
+Письма (сброс пароля и др.) ставятся в очередь в транзакции запроса и
+уходят через фоновый диспетчер; SMTP не держит ни запрос, ни транзакцию.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20251130_email_outbox"
+down_revision = "20251123_payments_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("to_addr", sa.String(length=320), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("CURRENT_TIMESTAMP")),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("last_error", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_email_outbox_available_id", "email_outbox", ["available_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_email_outbox_available_id", table_name="email_outbox")
+    op.drop_table("email_outbox")
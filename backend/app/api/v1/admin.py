@@ -1,14 +1,31 @@
-from fastapi import APIRouter, Depends
-from pydantic import BaseModel
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.deps import require_role, get_current_user, _to_role_name
+from app.core.http_cache import http_cache, principal_version
+from app.api.v1.pagination import cursor_datetime, decode_cursor, encode_cursor, split_page
+from app.core.principal import Principal, invalidate_principal
+from app.core.responses import serialize_only
+from app.core.token_store import TokenStore, get_token_store
+from app.db.session import get_async_db
+from app.models.auth_tokens import RefreshToken
 from app.models.user import User, UserRole
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+require_admin = require_role({UserRole.ADMIN})
+
+MAX_PAGE_SIZE = 200
+MAX_BULK_REVOKE = 10_000
+
 
 @router.get("/only")
-def admin_only(current_user: User = Depends(require_role({UserRole.ADMIN}))):
+def admin_only(current_user: Principal = Depends(require_admin)):
     # Если сюда дошли — роль прошла проверку
     return {"message": f"Hello Admin {current_user.email}"}
 
@@ -20,7 +37,9 @@ class WhoAmI(BaseModel):
 
 
 @router.get("/whoami", response_model=WhoAmI)
-def whoami(u: User = Depends(get_current_user)) -> WhoAmI:
+@http_cache(version=principal_version)
+@serialize_only
+def whoami(u: Principal = Depends(get_current_user)) -> WhoAmI:
     role_name = _to_role_name(getattr(u, "role", None))
     # is_active может отсутствовать — фоллбэк к True
     return WhoAmI(
@@ -28,3 +47,156 @@ def whoami(u: User = Depends(get_current_user)) -> WhoAmI:
         role=role_name,
         is_active=bool(getattr(u, "is_active", True)),
     )
+
+
+# ======== Пользователи и сессии ========
+# Все списки — keyset-пагинация (см. app/api/v1/pagination.py) и проекции
+# нужных колонок: ORM-объекты и OFFSET на таблице users не используем.
+# Сессии берутся из refresh_tokens (TOKEN_STORE_BACKEND=sql).
+
+class AdminUserOut(BaseModel):
+    id: int
+    email: str
+    role: str
+    active: bool  # есть хотя бы одна живая refresh-сессия
+
+
+class AdminUserPage(BaseModel):
+    items: List[AdminUserOut]
+    next_cursor: Optional[str] = None
+
+
+class SessionOut(BaseModel):
+    id: int
+    family_id: Optional[str] = None
+    created_at: datetime
+    expires_at: datetime
+    revoked: bool
+    user_agent: Optional[str] = None
+    ip: Optional[str] = None
+
+
+class SessionPage(BaseModel):
+    items: List[SessionOut]
+    next_cursor: Optional[str] = None
+
+
+class BulkRevokePayload(BaseModel):
+    user_ids: Optional[List[int]] = Field(default=None, max_length=MAX_BULK_REVOKE)
+    role: Optional[UserRole] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _live_session_exists(now: datetime):
+    # коррелированный EXISTS по ix_refresh_tokens_user_active
+    return (
+        select(RefreshToken.id)
+        .where(
+            RefreshToken.user_id == User.id,
+            RefreshToken.revoked == False,  # noqa: E712
+            RefreshToken.expires_at > now,
+        )
+        .exists()
+    )
+
+
+@router.get("/users", response_model=AdminUserPage)
+async def list_users(
+    role: Optional[UserRole] = None,
+    active: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(require_admin),
+) -> AdminUserPage:
+    live = _live_session_exists(_utcnow())
+    stmt = select(User.id, User.email, User.role, live.label("active")).order_by(User.id).limit(limit + 1)
+    if role is not None:
+        stmt = stmt.where(User.role == role)  # (role, id) — ix_users_role_id
+    if active is not None:
+        stmt = stmt.where(live if active else ~live)
+    after = decode_cursor(cursor, 1)
+    if after:
+        if not isinstance(after[0], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(User.id > after[0])
+
+    rows, has_more = split_page((await db.execute(stmt)).all(), limit)
+    items = [
+        AdminUserOut(id=r.id, email=r.email, role=_to_role_name(r.role), active=bool(r.active))
+        for r in rows
+    ]
+    return AdminUserPage(items=items, next_cursor=encode_cursor(rows[-1].id) if has_more else None)
+
+
+@router.get("/users/{user_id}/sessions", response_model=SessionPage)
+async def list_user_sessions(
+    user_id: int,
+    include_revoked: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    _: Principal = Depends(require_admin),
+) -> SessionPage:
+    """Сессии пользователя, новые сверху; ключ (created_at, id) — ix_refresh_tokens_user_created."""
+    stmt = (
+        select(
+            RefreshToken.id,
+            RefreshToken.family_id,
+            RefreshToken.created_at,
+            RefreshToken.expires_at,
+            RefreshToken.revoked,
+            RefreshToken.user_agent,
+            RefreshToken.ip,
+        )
+        .where(RefreshToken.user_id == user_id)
+        .order_by(RefreshToken.created_at.desc(), RefreshToken.id.desc())
+        .limit(limit + 1)
+    )
+    if not include_revoked:
+        stmt = stmt.where(RefreshToken.revoked == False, RefreshToken.expires_at > _utcnow())  # noqa: E712
+    after = decode_cursor(cursor, 2)
+    if after:
+        if not isinstance(after[1], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(
+            tuple_(RefreshToken.created_at, RefreshToken.id) < tuple_(cursor_datetime(after[0]), after[1])
+        )
+
+    rows, has_more = split_page((await db.execute(stmt)).all(), limit)
+    items = [SessionOut.model_validate(r._mapping) for r in rows]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return SessionPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("/sessions/revoke")
+async def bulk_revoke_sessions(
+    body: BulkRevokePayload,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+    _: Principal = Depends(require_admin),
+):
+    """
+    Отзыв всех сессий у набора пользователей (по id и/или роли).
+    Один SELECT (id, email) + один set-based отзыв в хранилище.
+    """
+    if not body.user_ids and body.role is None:
+        raise HTTPException(status_code=400, detail="Provide user_ids and/or role")
+
+    stmt = select(User.id, User.email).limit(MAX_BULK_REVOKE + 1)
+    if body.user_ids:
+        stmt = stmt.where(User.id.in_(body.user_ids))
+    if body.role is not None:
+        stmt = stmt.where(User.role == body.role)
+    users = (await db.execute(stmt)).all()
+    if len(users) > MAX_BULK_REVOKE:
+        raise HTTPException(status_code=400, detail=f"Too many users (max {MAX_BULK_REVOKE}), narrow the filter")
+
+    await store.revoke_users(users)
+    await db.commit()
+    for u in users:
+        invalidate_principal(u.email)
+    return {"status": "ok", "users": len(users)}
@@ -0,0 +1,263 @@
+# app/api/v1/appointments.py
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from sqlalchemy import and_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import _to_role_name, get_current_user
+from app.api.v1.pagination import cursor_datetime, decode_cursor, encode_cursor, split_page
+from app.core.config import settings
+from app.core.principal import Principal
+from app.db.dialect import dialect_name
+from app.db.session import get_async_db
+from app.models.appointment import FREE_STATUSES, Appointment
+from app.models.doctor_profile import DoctorProfile
+from app.models.patient_profile import PatientProfile
+from app.services.patients import ensure_patient_profile
+from app.services.slots import free_slots, merge_intervals, schedule_from_settings, working_windows
+
+router = APIRouter(prefix="/appointments", tags=["appointments"])
+
+MAX_PAGE_SIZE = 200
+
+# SQLSTATE Postgres
+_EXCLUSION_VIOLATION = "23P01"
+_FOREIGN_KEY_VIOLATION = "23503"
+
+
+# ======== Schemas ========
+
+class AppointmentCreate(BaseModel):
+    doctor_id: int
+    starts_at: datetime
+    ends_at: Optional[datetime] = None  # по умолчанию — один слот
+
+
+class AppointmentOut(BaseModel):
+    id: int
+    doctor_id: int
+    patient_id: int
+    starts_at: datetime
+    ends_at: datetime
+    status: str
+
+
+class AppointmentPage(BaseModel):
+    items: List[AppointmentOut]
+    next_cursor: Optional[str] = None
+
+
+class SlotOut(BaseModel):
+    starts_at: datetime
+    ends_at: datetime
+
+
+class SlotsOut(BaseModel):
+    doctor_id: int
+    slot_minutes: int
+    slots: List[SlotOut]
+
+
+# ======== Helpers ========
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    """Время без зоны считаем UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _sqlstate(exc: IntegrityError) -> Optional[str]:
+    orig = exc.orig
+    return getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+
+
+def _busy_filter(doctor_id: int, start: datetime, end: datetime):
+    """
+    Записи врача, пересекающиеся с [start, end). Нижняя граница starts_at
+    (start - APPOINTMENT_MAX_MINUTES) делает условие диапазоном по
+    ix_appointments_doctor_starts, без полного скана записей врача.
+    """
+    return and_(
+        Appointment.doctor_id == doctor_id,
+        Appointment.status.notin_(FREE_STATUSES),
+        Appointment.starts_at >= start - timedelta(minutes=settings.APPOINTMENT_MAX_MINUTES),
+        Appointment.starts_at < end,
+        Appointment.ends_at > start,
+    )
+
+
+def _own_filter(user: Principal):
+    """Записи, которые видит/может отменить пользователь: как врач или как пациент."""
+    if _to_role_name(user.role) == "DOCTOR":
+        return Appointment.doctor_id.in_(select(DoctorProfile.id).where(DoctorProfile.user_id == user.id))
+    return Appointment.patient_id.in_(select(PatientProfile.id).where(PatientProfile.user_id == user.id))
+
+
+_APPOINTMENT_COLUMNS = (
+    Appointment.id,
+    Appointment.doctor_id,
+    Appointment.patient_id,
+    Appointment.starts_at,
+    Appointment.ends_at,
+    Appointment.status,
+)
+
+
+# ======== Endpoints ========
+
+@router.get("/slots", response_model=SlotsOut)
+async def doctor_slots(
+    doctor_id: int,
+    date_from: date,
+    date_to: date,
+    db: AsyncSession = Depends(get_async_db),
+) -> SlotsOut:
+    """
+    Свободные слоты врача на [date_from, date_to] (даты — в зоне APPOINTMENT_TZ).
+    Один запрос: врач LEFT JOIN его записи в окне; дальше — склейка интервалов в памяти.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if (date_to - date_from).days >= settings.APPOINTMENT_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {settings.APPOINTMENT_MAX_RANGE_DAYS} days")
+
+    schedule = schedule_from_settings()
+    windows = working_windows(date_from, date_to, schedule)
+    range_start = windows[0][0] if windows else _utcnow()
+    range_end = windows[-1][1] if windows else range_start
+
+    stmt = (
+        select(DoctorProfile.id, Appointment.starts_at, Appointment.ends_at)
+        .select_from(DoctorProfile)
+        .outerjoin(Appointment, _busy_filter(doctor_id, range_start, range_end))
+        .where(DoctorProfile.id == doctor_id)
+        .order_by(Appointment.starts_at)
+    )
+    rows = (await db.execute(stmt)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Doctor not found")
+
+    busy = merge_intervals((_aware(r.starts_at), _aware(r.ends_at)) for r in rows if r.starts_at is not None)
+    slots = free_slots(windows, busy, schedule.slot, not_before=_utcnow())
+    return SlotsOut(
+        doctor_id=doctor_id,
+        slot_minutes=int(schedule.slot.total_seconds() // 60),
+        slots=[SlotOut(starts_at=s, ends_at=e) for s, e in slots],
+    )
+
+
+@router.post("", response_model=AppointmentOut, status_code=status.HTTP_201_CREATED)
+async def create_appointment(
+    body: AppointmentCreate,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> AppointmentOut:
+    starts_at = _aware(body.starts_at)
+    ends_at = _aware(body.ends_at) if body.ends_at else starts_at + schedule_from_settings().slot
+    if ends_at <= starts_at:
+        raise HTTPException(status_code=400, detail="ends_at must be after starts_at")
+    if ends_at - starts_at > timedelta(minutes=settings.APPOINTMENT_MAX_MINUTES):
+        raise HTTPException(status_code=400, detail="Appointment is too long")
+    if starts_at < _utcnow():
+        raise HTTPException(status_code=400, detail="Appointment must be in the future")
+
+    patient_id = await ensure_patient_profile(db, user.id)
+
+    if dialect_name(db) != "postgresql":
+        # без exclusion constraint (dev/SQLite) — проверка перед вставкой
+        taken = await db.scalar(select(Appointment.id).where(_busy_filter(body.doctor_id, starts_at, ends_at)).limit(1))
+        if taken is not None:
+            raise HTTPException(status_code=409, detail="Slot is already taken")
+
+    appt = Appointment(doctor_id=body.doctor_id, patient_id=patient_id, starts_at=starts_at, ends_at=ends_at)
+    db.add(appt)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # пересечение ловит сам Postgres (ex_appointments_doctor_overlap) — без SELECT ... FOR UPDATE
+        code = _sqlstate(e)
+        if code == _EXCLUSION_VIOLATION:
+            raise HTTPException(status_code=409, detail="Slot is already taken")
+        if code == _FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail="Doctor not found")
+        raise
+
+    return AppointmentOut(
+        id=appt.id,
+        doctor_id=appt.doctor_id,
+        patient_id=appt.patient_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        status=appt.status or "scheduled",
+    )
+
+
+@router.get("", response_model=AppointmentPage)
+async def list_appointments(
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    include_cancelled: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> AppointmentPage:
+    """Записи текущего пользователя (врача или пациента) по возрастанию времени; keyset по (starts_at, id)."""
+    stmt = (
+        select(*_APPOINTMENT_COLUMNS)
+        .where(_own_filter(user))
+        .order_by(Appointment.starts_at, Appointment.id)
+        .limit(limit + 1)
+    )
+    if date_from is not None:
+        stmt = stmt.where(Appointment.starts_at >= _aware(date_from))
+    if date_to is not None:
+        stmt = stmt.where(Appointment.starts_at < _aware(date_to))
+    if not include_cancelled:
+        stmt = stmt.where(Appointment.status.notin_(FREE_STATUSES))
+    after = decode_cursor(cursor, 2)
+    if after:
+        if not isinstance(after[1], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(
+            tuple_(Appointment.starts_at, Appointment.id) > tuple_(cursor_datetime(after[0]), after[1])
+        )
+
+    rows, has_more = split_page((await db.execute(stmt)).all(), limit)
+    items = [AppointmentOut.model_validate(r._mapping) for r in rows]
+    next_cursor = encode_cursor(rows[-1].starts_at, rows[-1].id) if has_more else None
+    return AppointmentPage(items=items, next_cursor=next_cursor)
+
+
+@router.post("/{appointment_id}/cancel", response_model=AppointmentOut)
+async def cancel_appointment(
+    appointment_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> AppointmentOut:
+    """Отмена освобождает слот: exclusion constraint не учитывает status='cancelled'."""
+    row = (
+        await db.execute(
+            update(Appointment)
+            .where(
+                Appointment.id == appointment_id,
+                Appointment.status.notin_(FREE_STATUSES),
+                _own_filter(user),
+            )
+            .values(status="cancelled")
+            .returning(*_APPOINTMENT_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    await db.commit()
+    return AppointmentOut.model_validate(row._mapping)
@@ -1,26 +1,31 @@
 # app/api/v1/auth.py
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
-
-from app.db.session import get_db
+from sqlalchemy import insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import dialect_name, upsert_insert
+from app.db.session import get_async_db
+from app.core.hashing import HashPoolSaturated, password_hasher
+from app.core.principal import invalidate_principal
+from app.core.rate_limit import rate_limit
+from app.core.responses import serialize_only
+from app.core.token_store import RefreshRecord, TokenStore, get_token_store
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
-    create_refresh_token,
-    create_reset_token,
+    issue_refresh_token,
+    issue_reset_token,
+    claims_expires_at,
     decode_token,
-    get_token_jti,
-    REFRESH_EXPIRES_DAYS,
-    RESET_TOKEN_EXPIRES_MIN,
 )
 from app.models.user import User
-from app.models.auth_tokens import RefreshToken, PasswordResetToken  # убедись, что файл называется именно auth_tokens.py
+from app.models.auth_tokens import PasswordResetToken  # убедись, что файл называется именно auth_tokens.py
+from app.models.email_outbox import EmailOutbox
+from app.services.mailer import password_reset_message
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -28,9 +33,9 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
+async def get_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> User:
     """
     Получаем текущего пользователя из access-токена (Authorization: Bearer <access>).
@@ -48,7 +53,7 @@ def get_current_user(
     if not sub:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
 
-    user = db.query(User).filter(User.email == sub).first()
+    user = await _get_user_by_email(db, sub)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
@@ -97,114 +102,182 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _refresh_exp_dt() -> datetime:
-    return _utcnow() + timedelta(days=REFRESH_EXPIRES_DAYS)
+async def _verify_password(plain_password: str, password_hash: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, password_hash)
+    except HashPoolSaturated:
+        raise HTTPException(status_code=503, detail="Server is busy, retry later", headers={"Retry-After": "1"})
 
 
-def _reset_exp_dt() -> datetime:
-    return _utcnow() + timedelta(minutes=RESET_TOKEN_EXPIRES_MIN)
+async def _verify_and_update_password(plain_password: str, password_hash: str) -> tuple[bool, Optional[str]]:
+    try:
+        return await password_hasher.verify_and_update(plain_password, password_hash)
+    except HashPoolSaturated:
+        raise HTTPException(status_code=503, detail="Server is busy, retry later", headers={"Retry-After": "1"})
 
 
-# ======== Endpoints ========
+async def _hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HashPoolSaturated:
+        raise HTTPException(status_code=503, detail="Server is busy, retry later", headers={"Retry-After": "1"})
+
+
+async def _get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.email == email))
 
-@router.post("/register", response_model=TokenPair)
-def register(payload: AuthPayload, request: Request, db: Session = Depends(get_db)):
-    exists = db.query(User).filter(User.email == payload.email).first()
-    if exists:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
 
-    user = User(email=payload.email, password_hash=get_password_hash(payload.password))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    # issue tokens + persist refresh
-    refresh = create_refresh_token(user.email)
-    jti = get_token_jti(refresh)
-    rt = RefreshToken(
-        user_id=user.id,
-        jti=jti,
-        expires_at=_refresh_exp_dt(),
-        user_agent=request.headers.get("user-agent"),
-        ip=request.client.host if request.client else None,
+def _decode_refresh(token: str) -> tuple[str, str, Optional[str]]:
+    """decode + проверка типа; возвращает (sub, jti, fam). fam нет у токенов до семейств."""
+    try:
+        payload = decode_token(token)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid refresh token")
+
+    if payload.get("type") != "refresh":
+        raise HTTPException(status_code=400, detail="Invalid token type")
+    sub = payload.get("sub")
+    jti = payload.get("jti")
+    if not sub or not jti:
+        raise HTTPException(status_code=400, detail="Invalid token")
+    return sub, jti, payload.get("fam")
+
+
+def _client_meta(request: Request) -> tuple[Optional[str], Optional[str]]:
+    return request.headers.get("user-agent"), request.client.host if request.client else None
+
+
+def _new_refresh(
+    user_id: int, email: str, request: Request, family_id: Optional[str] = None
+) -> tuple[str, RefreshRecord]:
+    """family_id=None — новое семейство (логин/регистрация), иначе продолжение цепочки."""
+    refresh, claims = issue_refresh_token(email, family_id=family_id)
+    ua, ip = _client_meta(request)
+    record = RefreshRecord(
+        jti=claims["jti"],
+        user_id=user_id,
+        email=email,
+        expires_at=claims_expires_at(claims),
+        user_agent=ua,
+        ip=ip,
+        family_id=claims["fam"],
     )
-    db.add(rt)
-    db.commit()
+    return refresh, record
+
+
+async def _issue_session(
+    db: AsyncSession, store: TokenStore, user_id: int, email: str, request: Request
+) -> TokenPair:
+    """Выпускаем пару токенов и сохраняем refresh (jti) в хранилище."""
+    refresh, record = _new_refresh(user_id, email, request)
+    await store.add(record)
+    await db.commit()
 
     return TokenPair(
-        access_token=create_access_token({"sub": user.email}),
+        access_token=create_access_token({"sub": email}),
         refresh_token=refresh,
     )
 
 
-@router.post("/login", response_model=TokenPair)
-def login(payload: AuthPayload, request: Request, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
-    if not user or not verify_password(payload.password, user.password_hash or ""):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+# ======== Endpoints ========
 
-    # rotate refresh (new jti each login)
-    refresh = create_refresh_token(user.email)
-    jti = get_token_jti(refresh)
-    rt = RefreshToken(
-        user_id=user.id,
-        jti=jti,
-        expires_at=_refresh_exp_dt(),
-        user_agent=request.headers.get("user-agent"),
-        ip=request.client.host if request.client else None,
+# Все эндпоинты — async: БД через AsyncSession, PBKDF2 — в password_hasher,
+# так что ни event loop, ни threadpool не простаивают на KDF и I/O.
+# login/register/forgot/reset ограничены rate_limit до хендлера (до БД и KDF).
+
+@router.post(
+    "/register",
+    response_model=TokenPair,
+    dependencies=[Depends(rate_limit("register", per_ip="RATE_LIMIT_REGISTER_IP"))],
+)
+@serialize_only
+async def register(
+    payload: AuthPayload,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+):
+    password_hash = await _hash_password(payload.password)
+
+    # Пользователь + refresh одним коммитом. Дубликат email ловим через
+    # ON CONFLICT (без предварительного SELECT и гонок).
+    user_ins = (
+        upsert_insert(db, User)
+        .values(email=payload.email, password_hash=password_hash)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.id)
     )
-    db.add(rt)
-    db.commit()
+    refresh, record = _new_refresh(0, payload.email, request)
+    user_id = await store.create_with_user(db, user_ins, record)
+    if user_id is None:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
+    await db.commit()
 
     return TokenPair(
-        access_token=create_access_token({"sub": user.email}),
+        access_token=create_access_token({"sub": payload.email}),
         refresh_token=refresh,
     )
 
 
-@router.post("/refresh", response_model=TokenPair)
-def refresh(body: RefreshPayload, request: Request, db: Session = Depends(get_db)):
-    # 1) decode & basic checks
-    payload = decode_token(body.refresh_token)
-    if payload.get("type") != "refresh":
-        raise HTTPException(status_code=400, detail="Invalid token type")
-    sub = payload.get("sub")
-    jti = payload.get("jti")
-    if not sub or not jti:
-        raise HTTPException(status_code=400, detail="Invalid token")
-
-    user = db.query(User).filter(User.email == sub).first()
+@router.post(
+    "/login",
+    response_model=TokenPair,
+    dependencies=[Depends(rate_limit("login", per_ip="RATE_LIMIT_LOGIN_IP", per_email="RATE_LIMIT_LOGIN_EMAIL"))],
+)
+@serialize_only
+async def login(
+    payload: AuthPayload,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+):
+    user = await _get_user_by_email(db, payload.email)
     if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    ok, new_hash = await _verify_and_update_password(payload.password, user.password_hash or "")
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email or password")
+    if new_hash:
+        # хеш устарел (схема/стоимость KDF) — обновляем тем же COMMIT, что и refresh
+        user.password_hash = new_hash
 
-    # 2) ensure jti is whitelisted and not revoked/expired
-    db_rt = db.query(RefreshToken).filter(RefreshToken.jti == jti, RefreshToken.user_id == user.id).first()
-    if not db_rt or db_rt.revoked or db_rt.expires_at <= _utcnow():
-        raise HTTPException(status_code=401, detail="Refresh token is invalid or expired")
+    # rotate refresh (new jti each login)
+    return await _issue_session(db, store, user.id, user.email, request)
 
-    # 3) rotate refresh token (recommended)
-    db_rt.revoked = True
-    new_refresh = create_refresh_token(user.email)
-    new_jti = get_token_jti(new_refresh)
-    db.add(
-        RefreshToken(
-            user_id=user.id,
-            jti=new_jti,
-            expires_at=_refresh_exp_dt(),
-            user_agent=request.headers.get("user-agent"),
-            ip=request.client.host if request.client else None,
-        )
-    )
-    db.commit()
+
+@router.post("/refresh", response_model=TokenPair)
+@serialize_only
+async def refresh(
+    body: RefreshPayload,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+):
+    # 1) decode & basic checks
+    sub, jti, fam = _decode_refresh(body.refresh_token)
+
+    # 2) ротация в том же семействе: погасить jti + сохранить новый; если jti уже
+    #    погашен/неизвестен — это reuse, и хранилище отзывает всё семейство.
+    #    user_id берём из погашенной записи — SELECT пользователя не нужен.
+    refresh_token, new = _new_refresh(0, sub, request, family_id=fam)
+    record = await store.rotate(jti, sub, new)
+    await db.commit()  # фиксируем и ротацию, и отзыв семейства
+    if record is None:
+        raise HTTPException(status_code=401, detail="Refresh token is invalid or expired")
 
     return TokenPair(
-        access_token=create_access_token({"sub": user.email}),
-        refresh_token=new_refresh,
+        access_token=create_access_token({"sub": sub}),
+        refresh_token=refresh_token,
     )
 
 
 @router.post("/logout")
-def logout(body: LogoutPayload, db: Session = Depends(get_db)):
+async def logout(
+    body: LogoutPayload,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+):
     """
     Если передан refresh_token — ревокируем конкретную сессию.
     Если all_sessions=True — ревокируем все активные refresh пользователя из этого токена.
@@ -215,63 +288,70 @@ def logout(body: LogoutPayload, db: Session = Depends(get_db)):
     if not body.refresh_token:
         return {"status": "ok"}  # мягкий logout (клиент просто забывает токены)
 
-    try:
-        payload = decode_token(body.refresh_token)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid refresh token")
-
-    if payload.get("type") != "refresh":
-        raise HTTPException(status_code=400, detail="Invalid token type")
-    sub = payload.get("sub")
-    jti = payload.get("jti")
-    if not sub or not jti:
-        raise HTTPException(status_code=400, detail="Invalid token")
+    sub, jti, _ = _decode_refresh(body.refresh_token)
 
-    user = db.query(User).filter(User.email == sub).first()
+    user = (await db.execute(select(User.id, User.email).where(User.email == sub))).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     if body.all_sessions:
-        db.query(RefreshToken).filter(
-            RefreshToken.user_id == user.id,
-            RefreshToken.revoked == False,  # noqa: E712
-        ).update({"revoked": True})
-        db.commit()
+        await store.revoke_user(user)
+        await db.commit()
+        invalidate_principal(user.email)
         return {"status": "ok", "revoked": "all"}
     else:
-        rt = db.query(RefreshToken).filter(RefreshToken.jti == jti, RefreshToken.user_id == user.id).first()
-        if rt and not rt.revoked:
-            rt.revoked = True
-            db.commit()
+        await store.revoke(jti, sub)
+        await db.commit()
         return {"status": "ok", "revoked": "single"}
 
 
-@router.post("/password/forgot")
-def forgot_password(body: ForgotPayload, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == body.email).first()
-    if not user:
-        # не палим существование пользователя
-        return {"status": "ok"}
-
-    reset_token = create_reset_token(user.email)
-    # сохраняем в БД jti + срок
-    jti = get_token_jti(reset_token)
-    db.add(
-        PasswordResetToken(
-            user_id=user.id,
-            token_jti=jti,
-            expires_at=_reset_exp_dt(),
-        )
+@router.post(
+    "/password/forgot",
+    dependencies=[Depends(rate_limit("forgot", per_ip="RATE_LIMIT_FORGOT_IP", per_email="RATE_LIMIT_FORGOT_EMAIL"))],
+)
+async def forgot_password(body: ForgotPayload, db: AsyncSession = Depends(get_async_db)):
+    """
+    Не палим существование пользователя ни ответом, ни временем: токен
+    выпускается всегда, запись токена и письма — INSERT ... SELECT FROM users,
+    который для неизвестного email просто ничего не вставляет. Письмо
+    отправляет mailer вне запроса.
+    """
+    email = str(body.email)
+    reset_token, claims = issue_reset_token(email)
+    subject, text_body = password_reset_message(reset_token)
+
+    user = select(User.id).where(User.email == email)
+    add_token = insert(PasswordResetToken).from_select(
+        ["user_id", "token_jti", "expires_at"],
+        user.add_columns(literal(claims["jti"]), literal(claims_expires_at(claims))),
     )
-    db.commit()
-
-    # здесь можно отправить письмо. Пока — просто логируем в stdout (или Docker-логи).
-    print(f"[DEV] Password reset token for {user.email}: {reset_token}")
+    mail_values = (literal(email), literal(subject), literal(text_body))
+
+    if dialect_name(db) == "postgresql":
+        # один оператор: токен и письмо (письмо — только если токен вставлен)
+        token = add_token.returning(PasswordResetToken.user_id).cte("token")
+        await db.execute(
+            insert(EmailOutbox)
+            .from_select(["to_addr", "subject", "body"], select(*mail_values).select_from(token))
+            .add_cte(token)
+        )
+    else:
+        await db.execute(add_token)
+        await db.execute(
+            insert(EmailOutbox).from_select(
+                ["to_addr", "subject", "body"], select(*mail_values).where(User.email == email)
+            )
+        )
+    await db.commit()
     return {"status": "ok"}
 
 
-@router.post("/password/reset")
-def reset_password(body: ResetPayload, db: Session = Depends(get_db)):
+@router.post("/password/reset", dependencies=[Depends(rate_limit("reset", per_ip="RATE_LIMIT_RESET_IP"))])
+async def reset_password(
+    body: ResetPayload,
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
+):
     try:
         payload = decode_token(body.reset_token)
     except Exception:
@@ -284,48 +364,47 @@ def reset_password(body: ResetPayload, db: Session = Depends(get_db)):
     if not sub or not jti:
         raise HTTPException(status_code=400, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == sub).first()
+    user = await _get_user_by_email(db, sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    db_rec = db.query(PasswordResetToken).filter(
-        PasswordResetToken.token_jti == jti,
-        PasswordResetToken.user_id == user.id,
-        PasswordResetToken.used == False,  # noqa: E712
-    ).first()
+    db_rec = await db.scalar(
+        select(PasswordResetToken).where(
+            PasswordResetToken.token_jti == jti,
+            PasswordResetToken.user_id == user.id,
+            PasswordResetToken.used == False,  # noqa: E712
+        )
+    )
 
     if not db_rec or db_rec.expires_at <= _utcnow():
         raise HTTPException(status_code=400, detail="Reset token expired or invalid")
 
     # set new password
-    user.password_hash = get_password_hash(body.new_password)
+    user.password_hash = await _hash_password(body.new_password)
     db_rec.used = True
     # (опционально) инвалидировать все refresh-токены пользователя:
-    db.query(RefreshToken).filter(
-        RefreshToken.user_id == user.id,
-        RefreshToken.revoked == False,  # noqa: E712
-    ).update({"revoked": True})
+    await store.revoke_user(user)
 
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.email)
     return {"status": "ok"}
 
 
 @router.post("/password/change")
-def change_password(
+async def change_password(
     body: ChangePasswordPayload,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
+    store: TokenStore = Depends(get_token_store),
     user: User = Depends(get_current_user),  # теперь работаем через access_token из Authorize
 ):
-    if not verify_password(body.current_password, user.password_hash):
+    if not await _verify_password(body.current_password, user.password_hash):
         raise HTTPException(status_code=401, detail="Current password invalid")
 
-    user.password_hash = get_password_hash(body.new_password)
+    user.password_hash = await _hash_password(body.new_password)
 
     # ревокируем все refresh
-    db.query(RefreshToken).filter(
-        RefreshToken.user_id == user.id,
-        RefreshToken.revoked == False,  # noqa: E712
-    ).update({"revoked": True})
+    await store.revoke_user(user)
 
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.email)
     return {"status": "ok"}
@@ -0,0 +1,93 @@
+# app/api/v1/clinics.py
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.pagination import decode_cursor, encode_cursor, split_page
+from app.core.http_cache import http_cache
+from app.db.session import get_async_db
+from app.models.clinic import Clinic
+from app.models.doctor_profile import DoctorProfile
+
+# Справочник клиник: публичные данные, меняются редко — общий кэш процесса
+router = APIRouter(prefix="/clinics", tags=["clinics"])
+
+MAX_PAGE_SIZE = 200
+CLINICS_CACHE_SEC = 300
+
+
+# ======== Schemas ========
+
+class ClinicOut(BaseModel):
+    id: int
+    name: str
+    address: Optional[str] = None
+    phone: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ClinicPage(BaseModel):
+    items: List[ClinicOut]
+    next_cursor: Optional[str] = None
+
+
+class ClinicDoctor(BaseModel):
+    id: int
+    title: Optional[str] = None
+
+
+class ClinicDetail(ClinicOut):
+    description: Optional[str] = None
+    doctors: List[ClinicDoctor] = []
+
+
+# ======== Endpoints ========
+
+@router.get("", response_model=ClinicPage)
+@http_cache(max_age=CLINICS_CACHE_SEC, public=True, shared_ttl=CLINICS_CACHE_SEC)
+async def list_clinics(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+) -> ClinicPage:
+    """Список клиник, keyset по id; только лёгкие колонки (description — в карточке)."""
+    stmt = (
+        select(Clinic.id, Clinic.name, Clinic.address, Clinic.phone)
+        .order_by(Clinic.id)
+        .limit(limit + 1)
+    )
+    after = decode_cursor(cursor, 1)
+    if after:
+        if not isinstance(after[0], int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(Clinic.id > after[0])
+    rows, has_more = split_page((await db.execute(stmt)).all(), limit)
+    return ClinicPage(
+        items=[ClinicOut.model_validate(r) for r in rows],
+        next_cursor=encode_cursor(rows[-1].id) if has_more else None,
+    )
+
+
+@router.get("/{clinic_id}", response_model=ClinicDetail)
+@http_cache(max_age=CLINICS_CACHE_SEC, public=True, shared_ttl=CLINICS_CACHE_SEC)
+async def get_clinic(clinic_id: int, db: AsyncSession = Depends(get_async_db)) -> ClinicDetail:
+    clinic = await db.get(Clinic, clinic_id)
+    if clinic is None:
+        raise HTTPException(status_code=404, detail="Clinic not found")
+    doctors = (
+        await db.execute(
+            select(DoctorProfile.id, DoctorProfile.title)
+            .where(DoctorProfile.clinic_id == clinic_id)
+            .order_by(DoctorProfile.id)
+        )
+    ).all()
+    return ClinicDetail(
+        **ClinicOut.model_validate(clinic).model_dump(),
+        description=clinic.description,
+        doctors=[ClinicDoctor(id=d.id, title=d.title) for d in doctors],
+    )
@@ -0,0 +1,174 @@
+# app/api/v1/content.py
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, joinedload
+
+from app.api.v1.deps import _to_role_name, get_current_user
+from app.api.v1.pagination import cursor_datetime, decode_cursor, encode_cursor, split_page
+from app.core.http_cache import http_cache
+from app.core.principal import Principal
+from app.db.session import get_async_db
+from app.models.content_item import ContentItem
+from app.models.doctor_profile import DoctorProfile
+from app.services.entitlements import can_view, entitled_doctor_ids, filter_entitled
+
+router = APIRouter(prefix="/content", tags=["content"])
+
+MAX_PAGE_SIZE = 100
+CONTENT_CACHE_SEC = 30  # публичная лента: новое появляется с задержкой не больше этого
+
+
+# ======== Schemas ========
+
+class AuthorBrief(BaseModel):
+    id: int
+    title: Optional[str] = None
+
+
+class ContentListItem(BaseModel):
+    id: int
+    title: str
+    kind: str
+    r2_key: Optional[str] = None
+    created_at: datetime
+    author: AuthorBrief
+
+
+class ContentDetail(ContentListItem):
+    body: Optional[str] = None
+
+
+class ContentPage(BaseModel):
+    items: List[ContentListItem]
+    next_cursor: Optional[str] = None
+
+
+class Entitlements(BaseModel):
+    doctor_ids: List[int]
+
+
+# ======== Helpers ========
+
+def _list_stmt(limit: int):
+    """
+    Страница ленты: body не читается (defer + raiseload — случайный доступ
+    упадёт, а не сделает по запросу на строку), автор — в том же запросе
+    (joinedload только id/title врача).
+    """
+    return (
+        select(ContentItem)
+        .options(
+            defer(ContentItem.body, raiseload=True),
+            joinedload(ContentItem.author_doctor).load_only(DoctorProfile.id, DoctorProfile.title, raiseload=True),
+        )
+        .order_by(ContentItem.created_at.desc(), ContentItem.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def _after_cursor(stmt, cursor: Optional[str]):
+    after = decode_cursor(cursor, 2)
+    if not after:
+        return stmt
+    if not isinstance(after[1], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return stmt.where(tuple_(ContentItem.created_at, ContentItem.id) < tuple_(cursor_datetime(after[0]), after[1]))
+
+
+def _list_item(item: ContentItem) -> ContentListItem:
+    return ContentListItem(
+        id=item.id,
+        title=item.title,
+        kind=item.kind,
+        r2_key=item.r2_key,
+        created_at=item.created_at,
+        author=AuthorBrief(id=item.author_doctor.id, title=item.author_doctor.title),
+    )
+
+
+async def _page(db: AsyncSession, stmt, limit: int) -> ContentPage:
+    rows, has_more = split_page((await db.scalars(stmt)).all(), limit)
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    return ContentPage(items=[_list_item(r) for r in rows], next_cursor=next_cursor)
+
+
+# ======== Endpoints ========
+
+@router.get("", response_model=ContentPage)
+@http_cache(max_age=CONTENT_CACHE_SEC, public=True, shared_ttl=CONTENT_CACHE_SEC)
+async def list_content(
+    doctor_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+) -> ContentPage:
+    """Общая лента или лента врача; keyset по (created_at, id), новые сверху."""
+    stmt = _list_stmt(limit)
+    if doctor_id is not None:
+        stmt = stmt.where(ContentItem.author_doctor_id == doctor_id)
+    return await _page(db, _after_cursor(stmt, cursor), limit)
+
+
+@router.get("/feed", response_model=ContentPage)
+@http_cache()
+async def subscription_feed(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> ContentPage:
+    """Лента пациента: материалы врачей, на которых есть активная подписка."""
+    doctors = await entitled_doctor_ids(db, user.id)  # из кэша доступов, без join по подпискам
+    if not doctors:
+        return ContentPage(items=[])
+    stmt = _list_stmt(limit).where(ContentItem.author_doctor_id.in_(sorted(doctors)))
+    return await _page(db, _after_cursor(stmt, cursor), limit)
+
+
+@router.get("/entitlements", response_model=Entitlements)
+async def content_entitlements(
+    doctor_id: List[int] = Query(..., max_length=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> Entitlements:
+    """
+    Каких врачей из списка пациент может смотреть: клиент передаёт авторов
+    страницы публичной ленты (?doctor_id=1&doctor_id=2...) и рисует замки.
+    Вся пачка — максимум один запрос.
+    """
+    return Entitlements(doctor_ids=sorted(await filter_entitled(db, user.id, doctor_id)))
+
+
+@router.get("/{item_id}", response_model=ContentDetail)
+@http_cache()  # body зависит от подписки: только private, без общего кэша
+async def get_content(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> ContentDetail:
+    """
+    Карточка материала. body — только автору, админу или пациенту с
+    действующей подпиской на автора (как и медиа); остальным — без body.
+    """
+    item = await db.scalar(
+        select(ContentItem)
+        .options(
+            joinedload(ContentItem.author_doctor).load_only(
+                DoctorProfile.id, DoctorProfile.title, DoctorProfile.user_id
+            )
+        )
+        .where(ContentItem.id == item_id)
+    )
+    if item is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    entitled = (
+        item.author_doctor.user_id == user.id
+        or _to_role_name(user.role) == "ADMIN"
+        or await can_view(db, user.id, item.author_doctor_id)
+    )
+    return ContentDetail(**_list_item(item).model_dump(), body=item.body if entitled else None)
@@ -2,9 +2,11 @@ from typing import Iterable, Union
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
 
-from app.db.session import get_db as get_db
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, get_db as get_db
+from app.core.principal import Principal, cache_principal, get_cached_principal
 from app.core.security import decode_token
 from app.models.user import User, UserRole
 
@@ -34,25 +36,41 @@ def _to_role_name(val: Union[str, UserRole]) -> str:
     return str(val).upper()
 
 
-def get_current_user(
+async def _load_principal(sub: str) -> Principal | None:
+    """Промах кэша: одна проекция по email, без загрузки ORM-объекта."""
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(select(User.id, User.email, User.role).where(User.email == sub))).first()
+    if not row:
+        return None
+    # is_active в текущей схеме нет — считаем True
+    return Principal(id=row.id, email=row.email, role=row.role, is_active=True)
+
+
+async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db),
-) -> User:
+) -> Principal:
     if not creds or creds.scheme.lower() != "bearer":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
-    payload = decode_token(creds.credentials)
+    try:
+        payload = decode_token(creds.credentials)
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     sub = payload.get("sub")
     if not sub:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.query(User).filter(User.email == sub).first()
-    # is_active может не существовать в старой схеме — тогда считаем True
-    is_active = bool(getattr(user, "is_active", True)) if user else False
-    if not user or not is_active:
+    # горячий путь: без сессии и без запроса в БД
+    principal = get_cached_principal(sub)
+    if principal is None:
+        principal = await _load_principal(sub)
+        if principal is not None:
+            cache_principal(principal)
+
+    if not principal or not principal.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or missing user")
 
-    return user
+    return principal
 
 
 def require_role(allowed: Iterable[Union[str, UserRole]]):
@@ -62,7 +80,7 @@ def require_role(allowed: Iterable[Union[str, UserRole]]):
     """
     allowed_norm = {_to_role_name(r) for r in allowed}
 
-    def _checker(user: User = Depends(get_current_user)) -> User:
+    def _checker(user: Principal = Depends(get_current_user)) -> Principal:
         user_role_norm = _to_role_name(getattr(user, "role", ""))
         if allowed_norm and user_role_norm not in allowed_norm:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
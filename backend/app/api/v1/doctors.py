@@ -0,0 +1,157 @@
+# app/api/v1/doctors.py
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import and_, func, literal, literal_column, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.api.v1.pagination import decode_cursor, encode_cursor, split_page
+from app.core.http_cache import http_cache
+from app.db.dialect import dialect_name
+from app.db.session import get_async_db
+from app.models.clinic import Clinic
+from app.models.doctor_profile import DoctorProfile
+from app.services.doctor_search import CLINIC_TSV, DOCTOR_TSV, LIKE_ESCAPE, like_pattern, prefix_tsquery
+
+router = APIRouter(prefix="/doctors", tags=["doctors"])
+
+MAX_PAGE_SIZE = 100
+SEARCH_CACHE_SEC = 60
+
+
+# ======== Schemas ========
+
+class ClinicBrief(BaseModel):
+    id: int
+    name: str
+    address: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DoctorOut(BaseModel):
+    id: int
+    title: Optional[str] = None
+    clinic: Optional[ClinicBrief] = None
+    score: float = 0.0
+
+    class Config:
+        from_attributes = True
+
+
+class DoctorPage(BaseModel):
+    items: List[DoctorOut]
+    next_cursor: Optional[str] = None
+
+
+# ======== Helpers ========
+
+def _matches(db: AsyncSession, q: str):
+    """
+    id врачей с релевантностью: совпадения по специальности ∪ по клинике.
+    Каждая ветка — отдельный индексируемый предикат (trgm %, ILIKE, tsvector @@),
+    поэтому OR по двум таблицам не превращается в seq scan join'а.
+    """
+    like = like_pattern(q)
+    tsq = prefix_tsquery(q)
+
+    if dialect_name(db) != "postgresql":
+        # dev/SQLite: без pg_trgm — только подстрока, без ранжирования
+        doctors = select(DoctorProfile.id.label("id"), literal(0.0).label("score")).where(
+            DoctorProfile.title.ilike(like, escape=LIKE_ESCAPE)
+        )
+        clinics = (
+            select(DoctorProfile.id.label("id"), literal(0.0).label("score"))
+            .select_from(Clinic)
+            .join(DoctorProfile, DoctorProfile.clinic_id == Clinic.id)
+            .where(or_(Clinic.name.ilike(like, escape=LIKE_ESCAPE), Clinic.address.ilike(like, escape=LIKE_ESCAPE)))
+        )
+        return union_all(doctors, clinics).subquery("matched")
+
+    ts_query = func.to_tsquery(literal_column("'simple'::regconfig"), tsq) if tsq else None
+
+    doctor_pred = [DoctorProfile.title.op("%")(q), DoctorProfile.title.ilike(like, escape=LIKE_ESCAPE)]
+    clinic_pred = [
+        Clinic.name.op("%")(q),
+        Clinic.name.ilike(like, escape=LIKE_ESCAPE),
+        Clinic.address.ilike(like, escape=LIKE_ESCAPE),
+    ]
+    if ts_query is not None:
+        doctor_pred.append(literal_column(DOCTOR_TSV).op("@@")(ts_query))
+        clinic_pred.append(literal_column(CLINIC_TSV).op("@@")(ts_query))
+
+    doctors = select(
+        DoctorProfile.id.label("id"),
+        func.similarity(DoctorProfile.title, q).label("score"),
+    ).where(or_(*doctor_pred))
+    clinics = (
+        select(
+            DoctorProfile.id.label("id"),
+            # совпадение по клинике чуть ниже прямого совпадения по специальности
+            (func.greatest(func.similarity(Clinic.name, q), func.similarity(Clinic.address, q)) * 0.9).label("score"),
+        )
+        .select_from(Clinic)
+        .join(DoctorProfile, DoctorProfile.clinic_id == Clinic.id)
+        .where(or_(*clinic_pred))
+    )
+    return union_all(doctors, clinics).subquery("matched")
+
+
+# ======== Endpoints ========
+
+@router.get("/search", response_model=DoctorPage)
+@http_cache(max_age=SEARCH_CACHE_SEC, public=True, shared_ttl=SEARCH_CACHE_SEC)
+async def search_doctors(
+    q: str = Query(..., min_length=2, max_length=100),
+    clinic_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+) -> DoctorPage:
+    """
+    Поиск по специальности, названию и адресу клиники: префикс по словам
+    (tsvector), опечатки (pg_trgm), подстрока (ILIKE по trgm-индексу).
+    Сортировка — по релевантности, курсор — (score, id). Клиника грузится
+    joinedload'ом в том же запросе.
+    """
+    q = q.strip()
+    matched = _matches(db, q)
+    ranked = (
+        select(matched.c.id, func.max(matched.c.score).label("score"))
+        .group_by(matched.c.id)
+        .subquery("ranked")
+    )
+
+    stmt = (
+        select(DoctorProfile, ranked.c.score)
+        .join(ranked, ranked.c.id == DoctorProfile.id)
+        .options(joinedload(DoctorProfile.clinic))
+        .order_by(ranked.c.score.desc(), DoctorProfile.id)
+        .limit(limit + 1)
+    )
+    if clinic_id is not None:
+        stmt = stmt.where(DoctorProfile.clinic_id == clinic_id)
+    after = decode_cursor(cursor, 2)
+    if after:
+        score, last_id = after
+        if not isinstance(score, (int, float)) or not isinstance(last_id, int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        stmt = stmt.where(
+            or_(ranked.c.score < score, and_(ranked.c.score == score, DoctorProfile.id > last_id))
+        )
+
+    rows, has_more = split_page((await db.execute(stmt)).all(), limit)
+    items = [
+        DoctorOut(
+            id=doctor.id,
+            title=doctor.title,
+            clinic=ClinicBrief.model_validate(doctor.clinic) if doctor.clinic else None,
+            score=float(score or 0.0),
+        )
+        for doctor, score in rows
+    ]
+    next_cursor = encode_cursor(float(rows[-1].score or 0.0), rows[-1][0].id) if has_more else None
+    return DoctorPage(items=items, next_cursor=next_cursor)
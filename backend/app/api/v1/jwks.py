@@ -0,0 +1,19 @@
+# app/api/v1/jwks.py
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.http_cache import http_cache
+from app.core.security import get_keyring
+
+router = APIRouter(tags=["auth"])
+
+
+@router.get("/.well-known/jwks.json")
+@http_cache(max_age=settings.JWKS_MAX_AGE_SEC, public=True)
+async def jwks():
+    """
+    Публичные ключи проверки access-токенов (RFC 7517) для других сервисов.
+    Тело собрано один раз при загрузке ключей; при HS256 список пуст.
+    """
+    return Response(get_keyring().jwks, media_type="application/jwk-set+json")
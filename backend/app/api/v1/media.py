@@ -0,0 +1,193 @@
+# app/api/v1/media.py
+import math
+import uuid
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import RedirectResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.deps import _to_role_name, get_current_user
+from app.core.config import settings
+from app.core.principal import Principal
+from app.core.s3 import Presigner, StorageNotConfigured, get_presigner
+from app.db.session import get_async_db
+from app.models.content_item import ContentItem
+from app.models.doctor_profile import DoctorProfile
+from app.services.entitlements import can_view
+
+# Медиа материалов: API только выдаёт presigned URL, байты идут мимо нас.
+router = APIRouter(prefix="/content", tags=["media"])
+
+MAX_PARTS = 10_000
+MIN_PART_BYTES = 5 * 1024 * 1024
+
+
+# ======== Schemas ========
+
+class PresignedUrl(BaseModel):
+    method: str
+    url: str
+    key: str
+    expires_in: int
+
+
+class MultipartInit(BaseModel):
+    size_bytes: int = Field(gt=0)
+
+
+class MultipartPlan(BaseModel):
+    key: str
+    part_size: int
+    parts: int
+    create: PresignedUrl  # POST ?uploads -> XML с UploadId
+
+
+class MultipartPartsRequest(BaseModel):
+    part_numbers: List[int] = Field(min_length=1, max_length=1000)
+
+
+class MultipartPartUrl(BaseModel):
+    part_number: int
+    url: str
+
+
+class MultipartUrls(BaseModel):
+    upload_id: str
+    parts: List[MultipartPartUrl]
+    complete: PresignedUrl
+    abort: PresignedUrl
+    expires_in: int
+
+
+# ======== Helpers ========
+
+def _presigner() -> Presigner:
+    try:
+        return get_presigner()
+    except StorageNotConfigured:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Media storage is not configured")
+
+
+async def _claim_media_key(db: AsyncSession, item_id: int, user: Principal) -> str:
+    """
+    Ключ объекта для материала автора: один UPDATE ... RETURNING и проверяет
+    авторство, и назначает r2_key при первой загрузке (coalesce — без гонок).
+    """
+    new_key = f"content/{item_id}/{uuid.uuid4().hex}"
+    key = await db.scalar(
+        update(ContentItem)
+        .where(
+            ContentItem.id == item_id,
+            ContentItem.author_doctor_id.in_(select(DoctorProfile.id).where(DoctorProfile.user_id == user.id)),
+        )
+        .values(r2_key=func.coalesce(ContentItem.r2_key, new_key))
+        .returning(ContentItem.r2_key)
+        .execution_options(synchronize_session=False)
+    )
+    if key is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    await db.commit()
+    return key
+
+
+def _url(method: str, url: str, key: str) -> PresignedUrl:
+    return PresignedUrl(method=method, url=url, key=key, expires_in=settings.MEDIA_URL_EXPIRES_SEC)
+
+
+# ======== Endpoints ========
+
+@router.post("/{item_id}/media/upload", response_model=PresignedUrl)
+async def media_upload_url(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> PresignedUrl:
+    """Одиночный PUT (до 5 ГБ); для больших видео — /media/multipart."""
+    presigner = _presigner()
+    key = await _claim_media_key(db, item_id, user)
+    return _url("PUT", presigner.put_url(key, settings.MEDIA_URL_EXPIRES_SEC), key)
+
+
+@router.post("/{item_id}/media/multipart", response_model=MultipartPlan)
+async def media_multipart_init(
+    item_id: int,
+    body: MultipartInit,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> MultipartPlan:
+    """
+    План multipart: размер части и число частей + presigned CreateMultipartUpload.
+    Клиент сам получает UploadId от хранилища и запрашивает URL частей.
+    """
+    presigner = _presigner()
+    part_size = max(settings.MEDIA_MULTIPART_PART_MB * 1024 * 1024, MIN_PART_BYTES, math.ceil(body.size_bytes / MAX_PARTS))
+    key = await _claim_media_key(db, item_id, user)
+    return MultipartPlan(
+        key=key,
+        part_size=part_size,
+        parts=math.ceil(body.size_bytes / part_size),
+        create=_url("POST", presigner.create_multipart_url(key, settings.MEDIA_URL_EXPIRES_SEC), key),
+    )
+
+
+@router.post("/{item_id}/media/multipart/{upload_id}/parts", response_model=MultipartUrls)
+async def media_multipart_parts(
+    item_id: int,
+    upload_id: str,
+    body: MultipartPartsRequest,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+) -> MultipartUrls:
+    """URL частей (можно порциями) + Complete/Abort для того же UploadId."""
+    if any(n < 1 or n > MAX_PARTS for n in body.part_numbers):
+        raise HTTPException(status_code=400, detail=f"part_number must be in 1..{MAX_PARTS}")
+    presigner = _presigner()
+    key = await _claim_media_key(db, item_id, user)
+    expires = settings.MEDIA_URL_EXPIRES_SEC
+    return MultipartUrls(
+        upload_id=upload_id,
+        parts=[
+            MultipartPartUrl(part_number=n, url=presigner.upload_part_url(key, upload_id, n, expires))
+            for n in body.part_numbers
+        ],
+        complete=_url("POST", presigner.complete_multipart_url(key, upload_id, expires), key),
+        abort=_url("DELETE", presigner.abort_multipart_url(key, upload_id, expires), key),
+        expires_in=expires,
+    )
+
+
+@router.get("/{item_id}/media", response_model=PresignedUrl)
+async def media_download_url(
+    item_id: int,
+    redirect: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_user),
+):
+    """
+    Presigned GET; redirect=true — сразу 307 на хранилище (для <video src>).
+    Доступ: автор, админ или пациент с действующей подпиской на автора.
+    """
+    presigner = _presigner()
+    row = (
+        await db.execute(
+            select(ContentItem.r2_key, ContentItem.author_doctor_id, DoctorProfile.user_id)
+            .join(DoctorProfile, DoctorProfile.id == ContentItem.author_doctor_id)
+            .where(ContentItem.id == item_id)
+        )
+    ).first()
+    if row is None or not row.r2_key:
+        raise HTTPException(status_code=404, detail="Media not found")
+    key = row.r2_key
+    if (
+        row.user_id != user.id
+        and _to_role_name(user.role) != "ADMIN"
+        and not await can_view(db, user.id, row.author_doctor_id)
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Subscription required")
+    url = presigner.get_url(key, settings.MEDIA_URL_EXPIRES_SEC)
+    if redirect:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return _url("GET", url, key)
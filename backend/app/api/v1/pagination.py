@@ -0,0 +1,47 @@
+# app/api/v1/pagination.py
+"""
+Keyset (seek) пагинация: вместо OFFSET клиент возвращает курсор — значения
+ключа сортировки последней строки, и следующая страница берётся по индексу
+условием (a, b) < (:a, :b). Стоимость страницы не зависит от её номера.
+
+Курсор непрозрачный: base64url(JSON-список значений ключа).
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List[Any]]:
+    """None — первая страница; битый курсор — 400."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def cursor_datetime(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def split_page(rows: Sequence[Any], limit: int) -> tuple[Sequence[Any], bool]:
+    """Запрашиваем limit + 1 строк: лишняя строка = есть следующая страница."""
+    return rows[:limit], len(rows) > limit
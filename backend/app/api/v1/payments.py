@@ -0,0 +1,76 @@
+# app/api/v1/payments.py
+import hashlib
+import hmac
+from decimal import Decimal
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Request, status
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_async_db
+from app.services.payments import record_webhook
+
+router = APIRouter(prefix="/payments", tags=["payments"])
+
+
+# ======== Schemas ========
+
+class PaymentWebhook(BaseModel):
+    transaction_id: str = Field(min_length=1, max_length=128)  # ключ идемпотентности
+    status: Literal["pending", "succeeded", "failed"]
+    user_id: int
+    amount: Decimal = Field(gt=0, max_digits=12, decimal_places=2)
+    currency: str = Field("UZS", min_length=3, max_length=8)
+    doctor_id: Optional[int] = None  # оплата подписки на врача
+
+
+# ======== Helpers ========
+
+def sign_payload(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def _verify_signature(body: bytes, signature: Optional[str]) -> None:
+    secret = settings.PAYMENT_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Payment webhooks are not configured")
+    expected = sign_payload(body, secret)
+    given = (signature or "").removeprefix("sha256=")
+    if not hmac.compare_digest(expected, given):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid signature")
+
+
+# ======== Endpoints ========
+
+@router.post("/webhooks/{provider}")
+async def payment_webhook(
+    request: Request,
+    provider: str = Path(..., pattern=r"^[a-z0-9_-]{1,64}$"),
+    x_signature: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Вебхук провайдера. Подпись — HMAC-SHA256 сырого тела (X-Signature).
+    Ответ — после одного INSERT ... ON CONFLICT и COMMIT; побочные эффекты
+    выполняет outbox-воркер. Повторы отвечают тем же 200.
+    """
+    raw = await request.body()
+    _verify_signature(raw, x_signature)
+    try:
+        event = PaymentWebhook.model_validate_json(raw)
+    except ValidationError as e:
+        # без ctx/input: там Decimal и сырые bytes, JSON-ответ из них не собрать (-> 500 и ретраи провайдера)
+        detail = e.errors(include_url=False, include_context=False, include_input=False)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+    try:
+        await record_webhook(db, provider=provider, **event.model_dump())
+        await db.commit()
+    except IntegrityError:
+        # неизвестный user_id/doctor_id: 4xx, чтобы провайдер не ретраил вечно
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown user or doctor")
+    return {"status": "ok"}
@@ -1,8 +1,33 @@
 # app/api/v1/routes_health.py
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.db.session import async_engine, pool_status
 
 router = APIRouter(tags=["health"])
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/health/db")
+async def health_db():
+    """
+    Readiness по БД. Если пул исчерпан — отвечаем 503 сразу по счётчикам,
+    не вставая в очередь за соединением и не открывая новое.
+    """
+    pools = pool_status()
+    if pools["async"].get("exhausted"):
+        return JSONResponse(status_code=503, content={"status": "saturated", "pools": pools})
+
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "error": type(e).__name__, "pools": pool_status()},
+        )
+    return {"status": "ok", "pools": pool_status()}
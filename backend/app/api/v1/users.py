@@ -3,7 +3,9 @@ from fastapi import APIRouter, Depends
 from pydantic import BaseModel, EmailStr
 
 from app.api.v1.deps import get_current_user
-from app.models.user import User
+from app.core.http_cache import http_cache, principal_version
+from app.core.principal import Principal
+from app.core.responses import serialize_only
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -16,5 +18,7 @@ class UserOut(BaseModel):
         from_attributes = True  # pydantic v2 (для .from_orm в v1: orm_mode=True)
 
 @router.get("/me", response_model=UserOut)
-def read_me(current_user: User = Depends(get_current_user)) -> UserOut:
+@http_cache(version=principal_version)
+@serialize_only
+async def read_me(current_user: Principal = Depends(get_current_user)) -> UserOut:
     return UserOut(id=current_user.id, email=current_user.email, is_active=True)
@@ -13,13 +13,138 @@ class Settings(BaseSettings):
     APP_PORT: int = 8000
 
     DATABASE_URL: str
+    # по умолчанию выводится из DATABASE_URL (драйвер psycopg 3 в async-режиме)
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Пул соединений (на каждый движок: sync и async)
+    DB_POOL_SIZE: int = 5
+    DB_POOL_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SEC: float = 30.0
+    DB_POOL_RECYCLE_SEC: int = 1800  # -1 — не пересоздавать
+    # pre-ping = лишний round-trip на каждый checkout; по умолчанию полагаемся
+    # на recycle + инвалидацию пула при обрыве соединения
+    DB_POOL_PRE_PING: bool = False
+
+    # Чистка просроченных/отозванных refresh и reset токенов
+    TOKEN_REAPER_INTERVAL_SEC: int = 600  # 0 — не запускать в процессе API
+    TOKEN_REAPER_BATCH_SIZE: int = 1000
+    TOKEN_REAPER_MAX_BATCHES: int = 100  # за один проход
+
+    # Хранилище refresh-токенов: sql (таблица refresh_tokens) | redis | memory
+    TOKEN_STORE_BACKEND: str = "sql"
+    REDIS_URL: str = "redis://redis:6379/0"
 
     JWT_SECRET: str
-    JWT_ALG: str = "HS256"
+    JWT_ALG: str = "HS256"  # HS256 | RS256 | ES256 (асимметричные — ключи из JWT_KEYS_DIR)
     JWT_EXPIRES_MIN: int = 60  # access TTL (мин)
+    # Асимметричная подпись (app/core/jwt_keys.py): <kid>.pem / <kid>.pub.pem,
+    # ключи — python -m app.services.jwt_keygen
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KID: str | None = None  # None — последний по имени приватный ключ
+    JWT_ACCEPT_HS256: bool = False  # переход с HS256: токены без kid ещё проверяются по JWT_SECRET
+    JWKS_MAX_AGE_SEC: int = 3600  # Cache-Control для /.well-known/jwks.json
 
     # Новые настройки
     REFRESH_EXPIRES_DAYS: int = 30
     RESET_TOKEN_EXPIRES_MIN: int = 30
 
+    # Кэш принципалов (get_current_user без похода в users)
+    PRINCIPAL_CACHE_TTL_SEC: int = 60
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+
+    # Кэш проверенных JWT (ключ — sha256 от токена, живёт не дольше exp)
+    JWT_DECODE_CACHE_TTL_SEC: int = 900
+    JWT_DECODE_CACHE_MAXSIZE: int = 50_000
+
+    # KDF паролей: первая схема — для новых хешей, остальные только проверяются;
+    # устаревшие хеши (другая схема или стоимость) перехешируются при логине.
+    # Подбор стоимости под целевую латентность: python -m app.services.kdf_calibrate
+    PASSWORD_SCHEMES: str = "pbkdf2_sha256"
+    PASSWORD_HASH_ROUNDS: int | None = None  # None — по умолчанию passlib (pbkdf2_sha256: 29000)
+
+    # Пул для хеширования паролей (PBKDF2 не должен занимать threadpool Starlette)
+    PASSWORD_HASH_EXECUTOR: str = "thread"  # thread | process
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64  # сверх workers; дальше — 503
+
+    # Rate limit для /auth (формат "запросов/секунд"); memory — на воркер, redis — общий
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis (REDIS_URL)
+    RATE_LIMIT_MEMORY_MAXSIZE: int = 100_000  # ключей в памяти процесса (LRU)
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # True — IP из X-Forwarded-For (за прокси)
+    RATE_LIMIT_TRUSTED_PROXIES: int = 1  # сколько наших прокси дописывают X-Forwarded-For
+    RATE_LIMIT_LOGIN_IP: str = "30/60"
+    RATE_LIMIT_LOGIN_EMAIL: str = "10/300"
+    RATE_LIMIT_REGISTER_IP: str = "10/3600"
+    RATE_LIMIT_FORGOT_IP: str = "10/300"
+    RATE_LIMIT_FORGOT_EMAIL: str = "3/900"
+    RATE_LIMIT_RESET_IP: str = "10/300"
+
+    # Запись к врачу: рабочие часы (локальное время клиники) и сетка слотов
+    APPOINTMENT_TZ: str = "Asia/Tashkent"
+    APPOINTMENT_WORK_START: str = "09:00"
+    APPOINTMENT_WORK_END: str = "18:00"
+    APPOINTMENT_WORK_DAYS: str = "0,1,2,3,4"  # пн=0 … вс=6
+    APPOINTMENT_SLOT_MINUTES: int = 30
+    APPOINTMENT_MAX_MINUTES: int = 240  # длиннее не бывает — этим ограничен поиск пересечений
+    APPOINTMENT_MAX_RANGE_DAYS: int = 31  # окно /slots за один запрос
+
+    # Объектное хранилище медиа (R2/S3/MinIO): URL подписываются локально
+    S3_ENDPOINT_URL: str | None = None  # None — AWS S3
+    S3_REGION: str = "auto"  # R2 — "auto"
+    S3_BUCKET: str | None = None
+    S3_ACCESS_KEY_ID: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+    S3_PATH_STYLE: bool = True
+    MEDIA_URL_EXPIRES_SEC: int = 900
+    MEDIA_MULTIPART_PART_MB: int = 16  # S3: часть ≥ 5 МБ (кроме последней), частей ≤ 10000
+
+    # Кэш доступов пациента к материалам врачей (набор по действующим подпискам)
+    ENTITLEMENT_CACHE_TTL_SEC: int = 60
+    ENTITLEMENT_CACHE_MAXSIZE: int = 50_000
+
+    # Платежи: вебхуки провайдеров (HMAC-SHA256 тела в X-Signature) и outbox
+    PAYMENT_WEBHOOK_SECRET: str | None = None  # None — приём вебхуков выключен (503)
+    SUBSCRIPTION_PERIOD_DAYS: int = 30
+    OUTBOX_INTERVAL_SEC: float = 2.0  # 0 — не запускать воркер в процессе API
+    OUTBOX_BATCH_SIZE: int = 100
+    OUTBOX_MAX_BATCHES: int = 50  # за один проход
+    OUTBOX_MAX_ATTEMPTS: int = 10  # дальше событие остаётся в таблице как «мёртвое»
+
+    # Почта: очередь email_outbox + фоновый диспетчер (app/services/mailer.py)
+    MAIL_BACKEND: str = "log"  # log (dev: письмо в лог) | smtp
+    MAIL_FROM: str = "MedPlatform <no-reply@medplatform.local>"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025  # python -m bench.smtp_sink — локальная замена SMTP
+    SMTP_USER: str | None = None
+    SMTP_PASSWORD: str | None = None
+    SMTP_STARTTLS: bool = False
+    SMTP_TIMEOUT_SEC: float = 10.0
+    MAIL_DISPATCH_INTERVAL_SEC: float = 2.0  # 0 — не запускать диспетчер в процессе API
+    MAIL_BATCH_SIZE: int = 50
+    MAIL_CONCURRENCY: int = 8  # одновременных SMTP-сессий
+    MAIL_LEASE_SEC: int = 120  # пачка «арендована» на время отправки
+    MAIL_MAX_ATTEMPTS: int = 8
+    PASSWORD_RESET_URL: str = "http://localhost:3000/reset-password?token={token}"
+
+    # HTTP-кэш: общий in-process кэш публичных GET-ответов (см. app/core/http_cache.py)
+    HTTP_SHARED_CACHE_MAXSIZE: int = 2048
+    HTTP_SHARED_CACHE_TTL_SEC: int = 60  # по умолчанию; маршрут задаёт свой shared_ttl
+
+    # Сериализация JSON-ответов (app/core/responses.py): orjson | msgspec | std;
+    # если библиотеки нет — std
+    JSON_RESPONSE: str = "orjson"
+
+    # Метрики запросов (app/core/instrumentation.py), GET /metrics в формате Prometheus.
+    # False — ни middleware, ни хуков на движках: накладных расходов нет.
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str | None = None  # если задан — /metrics требует Authorization: Bearer <token>
+
+    # Отладка SQL (тесты/staging, app/core/query_debug.py): журнал запросов на
+    # HTTP-запрос, предупреждение о N+1, заголовок X-DB-Queries
+    QUERY_DEBUG: bool = False
+    QUERY_DEBUG_NPLUSONE_THRESHOLD: int = 5  # одинаковых SELECT за запрос
+    SLOW_QUERY_MS: float = 0  # 0 — выключено; иначе лог запросов дольше порога
+    SLOW_QUERY_EXPLAIN: bool = True  # добавлять к логу EXPLAIN (без ANALYZE)
+
 settings = Settings()  # type: ignore
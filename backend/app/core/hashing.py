@@ -0,0 +1,131 @@
+# app/core/hashing.py
+"""
+Выделенный пул для PBKDF2: хеширование/проверка паролей уходят в отдельный
+executor (thread или process — см. Settings.PASSWORD_HASH_EXECUTOR), а хендлеры
+только await'ят результат. Очередь ограничена: при переполнении сразу
+бросаем HashPoolSaturated (роутер отвечает 503), а не копим задачи.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+class HashPoolSaturated(RuntimeError):
+    """Очередь пула хеширования заполнена."""
+
+
+def _timed_call(op: str, *args: str) -> Tuple[Any, float, float]:
+    """Выполняется внутри воркера (в т.ч. в дочернем процессе)."""
+    from app.core import security
+
+    started = time.monotonic()
+    if op == "verify":
+        result: Any = security.verify_password(*args)
+    elif op == "verify_and_update":
+        result = security.verify_and_update_password(*args)
+    else:
+        result = security.get_password_hash(*args)
+    return result, started, time.monotonic()
+
+
+class PasswordHasher:
+    def __init__(self, kind: str = "thread", workers: int = 4, max_queue: int = 64) -> None:
+        self.kind = kind.lower()
+        self.workers = max(1, int(workers))
+        self.max_queue = max(0, int(max_queue))
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._inflight = 0
+
+        # метрики
+        self.completed = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hash_total = 0.0
+        self.hash_max = 0.0
+
+    @property
+    def limit(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="pwhash"
+                        )
+        return self._executor
+
+    async def _submit(self, op: str, *args: str) -> Any:
+        with self._lock:
+            if self._inflight >= self.limit:
+                self.rejected += 1
+                raise HashPoolSaturated("password hashing pool is saturated")
+            self._inflight += 1
+        try:
+            submitted = time.monotonic()
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self._get_executor(), _timed_call, op, *args
+            )
+        finally:
+            with self._lock:
+                self._inflight -= 1
+
+        wait, took = max(0.0, started - submitted), finished - started
+        with self._lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.hash_total += took
+            self.hash_max = max(self.hash_max, took)
+        return result
+
+    async def verify(self, plain_password: str, password_hash: str) -> bool:
+        return await self._submit("verify", plain_password, password_hash)
+
+    async def verify_and_update(self, plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Проверка + новый хеш, если старый устарел (второй KDF только в этом случае)."""
+        return await self._submit("verify_and_update", plain_password, password_hash)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        done = self.completed or 1
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "inflight": self._inflight,
+            "limit": self.limit,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": round(self.wait_total / done * 1000, 3),
+            "queue_wait_max_ms": round(self.wait_max * 1000, 3),
+            "hash_avg_ms": round(self.hash_total / done * 1000, 3),
+            "hash_max_ms": round(self.hash_max * 1000, 3),
+        }
+
+
+password_hasher = PasswordHasher(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
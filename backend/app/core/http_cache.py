@@ -0,0 +1,276 @@
+# app/core/http_cache.py
+"""
+HTTP-кэширование GET-ответов: слабые ETag, 304 на If-None-Match,
+Cache-Control по маршруту и общий in-process кэш для публичных данных.
+
+Маршрут объявляет политику декоратором (под @router.get):
+
+    @router.get("/me")
+    @http_cache(max_age=0, version=principal_version)
+    async def read_me(...): ...
+
+Политику читает чистый ASGI-middleware (HttpCacheMiddleware). Маршруты
+без политики проходят насквозь, тело не буферизуется.
+
+Есть три пути, от самого дешёвого к самому дорогому:
+  1. shared_ttl > 0 (только public): готовый ответ лежит в TTLCache процесса,
+     хендлер и БД не трогаются.
+  2. version: дешёвый ключ версии (например, из кэша принципалов). ETag
+     считается из него ДО хендлера, и при совпадении сразу отдаётся 304.
+  3. Иначе хендлер отрабатывает, ETag — хеш тела. 304 экономит трафик,
+     но не CPU.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.principal import get_cached_principal
+from app.core.security import decode_token
+
+VersionFn = Callable[[Request], Union[Optional[str], Awaitable[Optional[str]]]]
+
+_POLICY_ATTR = "__http_cache_policy__"
+_ROUTE_CACHE_MAX = 4096
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    max_age: int = 0
+    public: bool = False
+    shared_ttl: float = 0  # > 0 — ответ хранится в общем кэше процесса (только public)
+    version: Optional[VersionFn] = None
+
+    @property
+    def cache_control(self) -> str:
+        scope = "public" if self.public else "private"
+        if self.max_age > 0:
+            return f"{scope}, max-age={self.max_age}"
+        return f"{scope}, no-cache"  # хранить можно, но каждый раз с ревалидацией
+
+
+def http_cache(
+    max_age: int = 0,
+    public: bool = False,
+    shared_ttl: float = 0,
+    version: Optional[VersionFn] = None,
+):
+    """Декоратор эндпоинта: объявляет политику кэширования маршрута."""
+    if shared_ttl and not public:
+        raise ValueError("shared_ttl is allowed only for public responses")
+    policy = CachePolicy(max_age=max_age, public=public, shared_ttl=shared_ttl, version=version)
+
+    def decorator(fn):
+        setattr(fn, _POLICY_ATTR, policy)
+        return fn
+
+    return decorator
+
+
+def principal_version(request: Request) -> Optional[str]:
+    """
+    Версия ответа, собранного только из Principal (/users/me, /admin/whoami).
+    Берётся из кэша токенов и кэша принципалов, без БД. Промах кэша — None,
+    и тогда ETag считается по телу. invalidate_principal() при изменении
+    пользователя сбрасывает и эту версию.
+    """
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        sub = decode_token(token).get("sub")
+    except Exception:
+        return None  # пусть хендлер сам ответит 401
+    principal = get_cached_principal(sub) if sub else None
+    if principal is None or not principal.is_active:
+        return None
+    role = getattr(principal.role, "value", principal.role)
+    return f"{principal.id}:{principal.email}:{role}"
+
+
+def weak_etag(*parts: Union[str, bytes]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else part.encode())
+        h.update(b"\0")
+    return f'W/"{h.hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Слабое сравнение (RFC 9110 §13.1.2): W/ не учитывается, '*' совпадает со всем."""
+    if not if_none_match:
+        return False
+    target = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == target:
+            return True
+    return False
+
+
+@dataclass(frozen=True, slots=True)
+class _Stored:
+    etag: str
+    body: bytes
+    headers: List[Tuple[bytes, bytes]]
+
+
+shared_cache: TTLCache[str, _Stored] = TTLCache(
+    maxsize=settings.HTTP_SHARED_CACHE_MAXSIZE,
+    ttl=settings.HTTP_SHARED_CACHE_TTL_SEC,
+)
+
+# заголовки, которые пересчитываются при отдаче из кэша или для 304
+_SKIP_HEADERS = {b"content-length", b"etag", b"cache-control", b"vary", b"set-cookie", b"date"}
+
+
+class HttpCacheMiddleware:
+    def __init__(self, app: ASGIApp, routes) -> None:
+        self.app = app
+        self.routes = routes
+        self._policies: Dict[Tuple[str, str], Tuple[Optional[CachePolicy], Any]] = {}
+
+    def _policy(self, scope: Scope) -> Optional[CachePolicy]:
+        key = (scope["method"], scope["path"])
+        entry = self._policies.get(key)
+        if entry is None:
+            entry = (None, None)
+            for route in self.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    entry = (getattr(getattr(route, "endpoint", None), _POLICY_ATTR, None), route)
+                    break
+            if len(self._policies) >= _ROUTE_CACHE_MAX:
+                self._policies.clear()  # пути с параметрами: не даём словарю расти без предела
+            self._policies[key] = entry
+        policy, route = entry
+        if policy is not None:
+            # маршрут для метрик, если ответим сами (роутер его потом перезапишет тем же)
+            scope["route"] = route
+        return policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        policy = self._policy(scope)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        cache_key = f"{scope['path']}?{scope.get('query_string', b'').decode('latin-1')}"
+
+        # 1. общий кэш публичных ответов
+        if policy.shared_ttl:
+            stored = shared_cache.get(cache_key)
+            if stored is not None:
+                await self._send_stored(scope, send, policy, stored, if_none_match)
+                return
+
+        # 2. дешёвая версия: 304 без хендлера
+        etag = await self._version_etag(policy, scope, cache_key)
+        if etag is not None and etag_matches(if_none_match, etag):
+            await self._send_not_modified(send, policy, etag)
+            return
+
+        if scope["method"] == "HEAD" and etag is None:
+            # тела нет — ни ETag по нему, ни записи в общий кэш
+            await self.app(scope, receive, send)
+            return
+
+        # 3. хендлер; буферизуем только успешный ответ
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    await send(message)
+                    return
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            # хендлер мог прогреть кэш (принципал загружен из БД) — тогда ETag
+            # уже версионный и совпадёт со следующим запросом
+            final_etag = etag or await self._version_etag(policy, scope, cache_key)
+            await self._finish(scope, send, policy, start, b"".join(chunks), final_etag, if_none_match, cache_key)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _version_etag(policy: CachePolicy, scope: Scope, cache_key: str) -> Optional[str]:
+        if policy.version is None:
+            return None
+        version = policy.version(Request(scope))
+        if hasattr(version, "__await__"):
+            version = await version  # type: ignore[misc]
+        return weak_etag(cache_key, version) if version is not None else None
+
+    async def _finish(
+        self,
+        scope: Scope,
+        send: Send,
+        policy: CachePolicy,
+        start: Message,
+        body: bytes,
+        etag: Optional[str],
+        if_none_match: Optional[str],
+        cache_key: str,
+    ) -> None:
+        etag = etag or weak_etag(body)
+        headers = [(k, v) for k, v in start["headers"] if k.lower() not in _SKIP_HEADERS]
+        if policy.shared_ttl and scope["method"] == "GET" and not any(k.lower() == b"set-cookie" for k, _ in start["headers"]):
+            stored = _Stored(etag=etag, body=body, headers=headers)
+            shared_cache.set(cache_key, stored, ttl=policy.shared_ttl)
+            await self._send_stored(scope, send, policy, stored, if_none_match)
+            return
+        if etag_matches(if_none_match, etag):
+            await self._send_not_modified(send, policy, etag)
+            return
+        out = MutableHeaders(raw=list(start["headers"]))
+        self._set_cache_headers(out, policy, etag)
+        await send({"type": "http.response.start", "status": 200, "headers": out.raw})
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    def _set_cache_headers(headers: MutableHeaders, policy: CachePolicy, etag: str) -> None:
+        headers["etag"] = etag
+        headers["cache-control"] = policy.cache_control
+        if not policy.public:
+            headers.add_vary_header("Authorization")
+
+    async def _send_not_modified(self, send: Send, policy: CachePolicy, etag: str) -> None:
+        headers = MutableHeaders(raw=[])
+        self._set_cache_headers(headers, policy, etag)
+        await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_stored(
+        self, scope: Scope, send: Send, policy: CachePolicy, stored: _Stored, if_none_match: Optional[str]
+    ) -> None:
+        if etag_matches(if_none_match, stored.etag):
+            await self._send_not_modified(send, policy, stored.etag)
+            return
+        headers = MutableHeaders(raw=list(stored.headers))
+        headers["content-length"] = str(len(stored.body))
+        self._set_cache_headers(headers, policy, stored.etag)
+        body = b"" if scope["method"] == "HEAD" else stored.body
+        await send({"type": "http.response.start", "status": 200, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": body})
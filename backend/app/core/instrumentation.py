@@ -0,0 +1,225 @@
+# app/core/instrumentation.py
+"""
+Метрики запросов для Prometheus (GET /metrics).
+
+  - InstrumentationMiddleware (чистый ASGI, самый внешний): латентность,
+    статус, а также число SQL-запросов, время в БД и ожидание соединения из
+    пула — по шаблону маршрута (/content/{item_id}, а не конкретный путь);
+  - instrument_engine: хуки before/after_cursor_execute на движке. Время
+    запроса добавляется к RequestStats текущего HTTP-запроса (contextvar) и
+    к общей гистограмме по движку, где учитываются и фоновые воркеры;
+  - render_metrics: текстовый формат, включая уже существующие счётчики
+    (пулы БД, пул хеширования, in-process кэши, rate limit).
+
+Middleware и хуки подключаются при METRICS_ENABLED, QUERY_DEBUG или
+SLOW_QUERY_MS > 0 (отладка SQL — app/core/query_debug.py). Если всё
+выключено, нет ни middleware, ни слушателей на движках.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import query_debug
+from app.core.config import settings
+from app.core.metrics import Counter, HistogramFamily, RequestStats, render_histogram, render_sample, request_stats
+
+_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+REQUEST_SECONDS = HistogramFamily(
+    "http_request_duration_seconds", "Total request time.", ("method", "route"),
+)
+REQUEST_QUERIES = HistogramFamily(
+    "http_request_db_queries", "SQL statements per request.", ("method", "route"), buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = HistogramFamily(
+    "http_request_db_seconds", "Time spent in SQL statements per request.", ("method", "route"),
+)
+REQUEST_POOL_WAIT = HistogramFamily(
+    "http_request_pool_wait_seconds", "Time spent waiting for a pooled DB connection per request.", ("method", "route"),
+)
+DB_QUERY_SECONDS = HistogramFamily(
+    "db_query_duration_seconds", "SQL statement time (HTTP requests and background workers).", ("engine",),
+)
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+_instrumented_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def _route_label(scope: Scope) -> str:
+    # APIRoute.matches кладёт маршрут в scope; HttpCacheMiddleware — тоже, если ответил сам
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        debug = settings.QUERY_DEBUG
+        stats = RequestStats(log=query_debug.QueryLog() if debug else None)
+        token = request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if debug:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.queries).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        with _in_flight_lock:
+            _in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_stats.reset(token)
+            with _in_flight_lock:
+                _in_flight -= 1
+            method = scope["method"] if scope["method"] in _METHODS else "OTHER"
+            route = _route_label(scope)
+            REQUESTS.inc(method, route, str(status_code))
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(method, route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.db_time)
+            REQUEST_POOL_WAIT.labels(method, route).observe(stats.pool_wait)
+            if stats.log is not None:
+                query_debug.warn_repeated(f"{method} {route}", stats.log)
+
+
+# ======== Хуки движков ========
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Для async-движка передаётся async_engine.sync_engine. Повторный вызов ничего не делает."""
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    histogram = DB_QUERY_SECONDS.labels(name)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        # запросы на одном соединении идут строго по очереди — хватает одного слота
+        conn.info["metrics_query_started"] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info.pop("metrics_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed)
+        current = request_stats.get()
+        if current is not None:
+            current.queries += 1
+            current.db_time += elapsed
+            if current.log is not None:
+                current.log.record(statement, elapsed)
+        for log in query_debug.active_logs():
+            log.record(statement, elapsed)
+        slow_ms = settings.SLOW_QUERY_MS
+        if slow_ms and elapsed * 1000 >= slow_ms:
+            query_debug.log_slow_query(conn, statement, parameters, elapsed, executemany)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+# ======== Экспозиция ========
+
+def _pool_lines() -> List[str]:
+    from app.db.session import async_pool_stats, pool_status, sync_pool_stats
+
+    pools = pool_status()
+    lines: List[str] = []
+    for metric, key, kind in (
+        ("db_pool_checked_out", "checked_out", "gauge"),
+        ("db_pool_capacity", "capacity", "gauge"),
+        ("db_pool_checkouts_total", "checkouts", "counter"),
+        ("db_pool_checkout_failures_total", "checkout_failures", "counter"),
+    ):
+        samples = [([("pool", name)], info[key]) for name, info in pools.items() if key in info]
+        if samples:
+            lines.extend(render_sample(metric, kind, f"Connection pool {key.replace('_', ' ')}.", samples))
+    lines += ["# HELP db_pool_wait_seconds Connection checkout wait.", "# TYPE db_pool_wait_seconds histogram"]
+    for name, stats in (("sync", sync_pool_stats), ("async", async_pool_stats)):
+        lines.extend(render_histogram("db_pool_wait_seconds", [("pool", name)], stats.wait))
+    return lines
+
+
+def _hasher_lines() -> List[str]:
+    from app.core.hashing import password_hasher
+
+    h = password_hasher
+    return [
+        *render_sample("password_hash_inflight", "gauge", "Password hashing jobs queued or running.", [([], h._inflight)]),
+        *render_sample("password_hash_completed_total", "counter", "Password hashing jobs completed.", [([], h.completed)]),
+        *render_sample("password_hash_rejected_total", "counter", "Jobs rejected because the pool was saturated.", [([], h.rejected)]),
+        *render_sample("password_hash_queue_wait_seconds_total", "counter", "Total queue wait of hashing jobs.", [([], h.wait_total)]),
+        *render_sample("password_hash_seconds_total", "counter", "Total KDF time of hashing jobs.", [([], h.hash_total)]),
+    ]
+
+
+def _cache_lines() -> List[str]:
+    from app.core.http_cache import shared_cache
+    from app.core.principal import principal_cache
+    from app.core.security import _decode_cache
+    from app.services.entitlements import entitlement_cache
+
+    caches = {
+        "principal": principal_cache,
+        "jwt_decode": _decode_cache,
+        "http_shared": shared_cache,
+        "entitlements": entitlement_cache,
+    }
+    lines: List[str] = []
+    for metric, attr, kind in (
+        ("cache_entries", None, "gauge"),
+        ("cache_hits_total", "hits", "counter"),
+        ("cache_misses_total", "misses", "counter"),
+        ("cache_evictions_total", "evictions", "counter"),
+    ):
+        samples = [([("cache", name)], len(c) if attr is None else getattr(c, attr)) for name, c in caches.items()]
+        lines.extend(render_sample(metric, kind, f"In-process cache {attr or 'entries'}.", samples))
+    return lines
+
+
+def _rate_limit_lines() -> List[str]:
+    from app.core import rate_limit
+
+    limiter = rate_limit._limiter  # не создаём лимитер (и соединение с Redis) ради метрик
+    if not isinstance(limiter, rate_limit.MemoryRateLimiter):
+        return []
+    return [
+        *render_sample("rate_limit_keys", "gauge", "Rate limit keys held in memory.", [([], len(limiter))]),
+        *render_sample("rate_limit_evictions_total", "counter", "Rate limit keys evicted (LRU).", [([], limiter.evictions)]),
+    ]
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for family in (REQUESTS, REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_DB_SECONDS, REQUEST_POOL_WAIT, DB_QUERY_SECONDS):
+        lines.extend(family.render())
+    lines.extend(render_sample("http_requests_in_flight", "gauge", "Requests being processed.", [([], _in_flight)]))
+    lines.extend(_pool_lines())
+    lines.extend(_hasher_lines())
+    lines.extend(_cache_lines())
+    lines.extend(_rate_limit_lines())
+    return "\n".join(lines) + "\n"
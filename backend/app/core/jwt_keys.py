@@ -0,0 +1,149 @@
+# app/core/jwt_keys.py
+"""
+Ключи подписи JWT: разбираются один раз (jose Key-объекты), а не на каждый
+вызов encode/decode.
+
+HS256 (по умолчанию) — общий JWT_SECRET, JWKS пустой.
+
+RS256/ES256 — ключи в каталоге JWT_KEYS_DIR, kid = имя файла:
+  <kid>.pem      — приватный ключ (PKCS#8/PEM): может подписывать;
+  <kid>.pub.pem  — только публичный: «выведенный» ключ, токены с ним ещё
+                   проверяются, новые не подписываются.
+Подписывает JWT_ACTIVE_KID, по умолчанию — последний по имени приватный ключ
+(kid с датой в начале, см. python -m app.services.jwt_keygen). В заголовке
+токена — kid, ключ проверки выбирается по нему. Все ключи публикуются в
+/.well-known/jwks.json, и другие сервисы проверяют access-токены сами.
+
+Ротация:
+  1. положить новый ключ, оставив JWT_ACTIVE_KID на старом, и выкатить.
+     Новый kid появляется в JWKS заранее, за время не меньше JWKS_MAX_AGE_SEC;
+  2. переключить JWT_ACTIVE_KID (или убрать его, если новый kid последний);
+  3. через срок жизни самых долгих токенов (REFRESH_EXPIRES_DAYS) старый
+     ключ вывести (--retire) и потом удалить.
+
+JWT_ACCEPT_HS256 — переходный режим при смене HS256 на асимметричный
+алгоритм: токены без kid ещё проверяются по JWT_SECRET (только HS256).
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+RSA_ALGS = ("RS256", "RS384", "RS512")
+EC_CURVE_ALGS = {"secp256r1": "ES256", "secp384r1": "ES384", "secp521r1": "ES512"}
+ASYMMETRIC_ALGS = RSA_ALGS + tuple(EC_CURVE_ALGS.values())
+PUBLIC_SUFFIX = ".pub.pem"
+
+
+@dataclass(frozen=True)
+class KeyRing:
+    alg: str
+    signing_key: Key
+    signing_kid: Optional[str]
+    # kid -> (алгоритм, ключ проверки); kid None — токены без kid (HS256)
+    verify_keys: Dict[Optional[str], Tuple[str, Key]] = field(default_factory=dict)
+    jwks: bytes = b'{"keys":[]}'
+
+    @property
+    def headers(self) -> Optional[Dict[str, str]]:
+        return {"kid": self.signing_kid} if self.signing_kid else None
+
+    def encode(self, payload: Dict) -> str:
+        return jwt.encode(payload, self.signing_key, algorithm=self.alg, headers=self.headers)
+
+    def decode(self, token: str) -> Dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        entry = self.verify_keys.get(kid)
+        if entry is None:
+            raise JWTError("Unknown signing key")
+        alg, key = entry
+        return jwt.decode(token, key, algorithms=[alg])
+
+    @property
+    def kids(self) -> List[str]:
+        return sorted(k for k in self.verify_keys if k is not None)
+
+
+def pem_algs(pem: bytes, public: bool = False) -> Tuple[str, ...]:
+    """Алгоритмы JWT, подходящие ключу: RSA — RS256/384/512, EC — ES* по кривой."""
+    if public:
+        key = serialization.load_pem_public_key(pem)
+    else:
+        key = serialization.load_pem_private_key(pem, password=None)
+    if isinstance(key, (rsa.RSAPrivateKey, rsa.RSAPublicKey)):
+        return RSA_ALGS
+    if isinstance(key, (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey)) and key.curve.name in EC_CURVE_ALGS:
+        return (EC_CURVE_ALGS[key.curve.name],)
+    return ()
+
+
+def _read_keys(keys_dir: str, alg: str) -> Tuple[Dict[str, Key], Dict[str, Key]]:
+    """(приватные, только публичные) ключи каталога по kid."""
+    private: Dict[str, Key] = {}
+    public: Dict[str, Key] = {}
+    for name in sorted(os.listdir(keys_dir)):
+        if not name.endswith(".pem"):
+            continue
+        path = os.path.join(keys_dir, name)
+        with open(path, "rb") as f:
+            pem = f.read()
+        is_public = name.endswith(PUBLIC_SUFFIX)
+        # jose разбирает PEM без проверки типа: EC-ключ при RS256 «загрузится»
+        # и упадёт позже, на подписи или JWKS
+        try:
+            algs = pem_algs(pem, public=is_public)
+        except (ValueError, TypeError) as e:
+            raise RuntimeError(f"{path}: not a PEM {'public' if is_public else 'private'} key: {e}") from e
+        if alg not in algs:
+            raise RuntimeError(f"{path}: {'/'.join(algs) or 'unsupported'} key does not match JWT_ALG={alg}")
+        if is_public:
+            public[name[: -len(PUBLIC_SUFFIX)]] = jwk.construct(pem, alg)
+        else:
+            private[name[: -len(".pem")]] = jwk.construct(pem, alg)
+    return private, public
+
+
+def _jwks(alg: str, keys: Dict[str, Key]) -> bytes:
+    entries = [{**key.to_dict(), "kid": kid, "use": "sig", "alg": alg} for kid, key in sorted(keys.items())]
+    return json.dumps({"keys": entries}, separators=(",", ":")).encode()
+
+
+def load_keyring(
+    alg: str,
+    secret: Optional[str] = None,
+    keys_dir: Optional[str] = None,
+    active_kid: Optional[str] = None,
+    accept_hs256: bool = False,
+) -> KeyRing:
+    alg = alg.upper()
+    if alg not in ASYMMETRIC_ALGS:
+        key = jwk.construct(secret or "", alg)
+        return KeyRing(alg=alg, signing_key=key, signing_kid=None, verify_keys={None: (alg, key)})
+
+    if not keys_dir or not os.path.isdir(keys_dir):
+        raise RuntimeError(f"JWT_ALG={alg} requires JWT_KEYS_DIR with <kid>.pem keys")
+    private, public = _read_keys(keys_dir, alg)
+    if not private:
+        raise RuntimeError(f"no private keys (<kid>.pem) in {keys_dir}")
+    kid = active_kid or max(private)
+    if kid not in private:
+        raise RuntimeError(f"JWT_ACTIVE_KID={kid!r}: no {kid}.pem in {keys_dir}")
+
+    published = {k: key.public_key() for k, key in {**public, **private}.items()}
+    verify_keys: Dict[Optional[str], Tuple[str, Key]] = {k: (alg, key) for k, key in published.items()}
+    if accept_hs256 and secret:
+        verify_keys[None] = ("HS256", jwk.construct(secret, "HS256"))
+    return KeyRing(
+        alg=alg,
+        signing_key=private[kid],
+        signing_kid=kid,
+        verify_keys=verify_keys,
+        jwks=_jwks(alg, published),
+    )
@@ -0,0 +1,139 @@
+# app/core/kv.py
+"""
+Key-value хранилище с нативным TTL (протокол Redis).
+
+Используем подмножество команд redis.asyncio.Redis: get/set(ex)/getdel/delete/
+incr/expire + pipeline(). InMemoryKV реализует то же подмножество в памяти
+процесса — для тестов, локальной разработки и однопроцессного запуска.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class InMemoryKV:
+    """fakeredis-подобная заглушка: значения — bytes, TTL проверяется лениво."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    # -- внутреннее --
+    def _alive(self, key: str) -> Optional[Tuple[Optional[float], bytes]]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, _ = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return item
+
+    @staticmethod
+    def _to_bytes(value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode("utf-8")
+
+    # -- команды --
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._alive(key)
+            return item[1] if item else None
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            if nx and self._alive(key) is not None:
+                return None
+            expires_at = time.monotonic() + ex if ex else None
+            self._data[key] = (expires_at, self._to_bytes(value))
+            return True
+
+    async def getdel(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._alive(key)
+            if item is None:
+                return None
+            del self._data[key]
+            return item[1]
+
+    async def delete(self, *keys: str) -> int:
+        with self._lock:
+            n = 0
+            for key in keys:
+                if self._alive(key) is not None:
+                    del self._data[key]
+                    n += 1
+            return n
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        with self._lock:
+            item = self._alive(key)
+            expires_at, raw = item if item else (None, b"0")
+            value = int(raw) + amount
+            self._data[key] = (expires_at, str(value).encode())
+            return value
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            item = self._alive(key)
+            if item is None:
+                return False
+            self._data[key] = (time.monotonic() + seconds, item[1])
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "_InMemoryPipeline":
+        return _InMemoryPipeline(self)
+
+    async def flushall(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    async def aclose(self) -> None:
+        return None
+
+
+class _InMemoryPipeline:
+    def __init__(self, kv: InMemoryKV) -> None:
+        self._kv = kv
+        self._calls: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def _queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return _queue
+
+    async def execute(self) -> List[Any]:
+        calls, self._calls = self._calls, []
+        return [await getattr(self._kv, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+    async def __aenter__(self) -> "_InMemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._calls = []
+
+
+_clients: Dict[str, Any] = {}
+
+
+def get_kv(kind: str) -> Any:
+    """Общий клиент на процесс: "redis" -> redis.asyncio.Redis(REDIS_URL), иначе InMemoryKV."""
+    kind = "redis" if kind.lower() == "redis" else "memory"
+    client = _clients.get(kind)
+    if client is None:
+        if kind == "redis":
+            try:
+                import redis.asyncio as redis_asyncio
+            except ImportError as e:  # pragma: no cover
+                raise RuntimeError("redis backend requires the 'redis' package") from e
+            client = redis_asyncio.from_url(settings.REDIS_URL)
+        else:
+            client = InMemoryKV()
+        _clients[kind] = client
+    return client
@@ -0,0 +1,154 @@
+# app/core/metrics.py
+"""
+Минимальные примитивы метрик (без внешних зависимостей) и текстовый формат
+Prometheus для них.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# секунды; последний бакет (+Inf) добавляется неявно
+DEFAULT_BUCKETS: Sequence[float] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Кумулятивная гистограмма в стиле Prometheus (le-бакеты, sum, count)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """[(le, count), ...] включая '+Inf'."""
+        with self._lock:
+            counts = list(self._counts)
+        out, acc = [], 0
+        for le, c in zip(list(self.buckets) + [float("inf")], counts):
+            acc += c
+            out.append(("+Inf" if le == float("inf") else repr(le), acc))
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"count": self._count, "sum": round(self._sum, 6), "buckets": dict(self.cumulative())}
+
+
+class Counter:
+    """Счётчик с метками: labels -> значение."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{format_labels(zip(self.labelnames, labels))} {_num(value)}")
+        return lines
+
+
+class HistogramFamily:
+    """Набор гистограмм с метками (одна Histogram на комбинацию меток)."""
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labels: str) -> Histogram:
+        child = self._children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labels, Histogram(self.buckets))
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = list(self._children.items())
+        for labels, hist in items:
+            lines.extend(render_histogram(self.name, list(zip(self.labelnames, labels)), hist))
+        return lines
+
+
+# ======== Текстовый формат Prometheus ========
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def format_labels(pairs: Iterable[Tuple[str, Any]]) -> str:
+    inner = ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+    return f"{{{inner}}}" if inner else ""
+
+
+def render_histogram(name: str, labels: List[Tuple[str, Any]], hist: Histogram) -> List[str]:
+    lines = [f"{name}_bucket{format_labels(labels + [('le', le)])} {count}" for le, count in hist.cumulative()]
+    lines.append(f"{name}_sum{format_labels(labels)} {_num(hist.sum)}")
+    lines.append(f"{name}_count{format_labels(labels)} {hist.count}")
+    return lines
+
+
+def render_sample(name: str, kind: str, help: str, samples: Iterable[Tuple[List[Tuple[str, Any]], float]]) -> List[str]:
+    """Gauge/counter, значения которого уже посчитаны где-то ещё (пулы, кэши)."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{format_labels(labels)} {_num(value)}" for labels, value in samples)
+    return lines
+
+
+# ======== Статистика текущего запроса ========
+
+@dataclass(slots=True)
+class RequestStats:
+    """Заполняется хуками движков (app/core/instrumentation.py) в рамках одного HTTP-запроса."""
+
+    queries: int = 0
+    db_time: float = 0.0
+    pool_wait: float = 0.0
+    log: Any = None  # QueryLog при QUERY_DEBUG (app/core/query_debug.py)
+
+
+# mutable-объект в contextvar: его видят и greenlet'ы async-движка, и
+# threadpool sync-хендлеров (контекст копируется, объект — тот же)
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
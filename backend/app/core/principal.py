@@ -0,0 +1,44 @@
+# app/core/principal.py
+"""
+Кэш «принципалов» — минимального набора полей пользователя, нужного
+для авторизации. Ключ — `sub` из access-токена (email).
+
+Кэш живёт в памяти процесса: при нескольких воркерах инвалидация локальная,
+поэтому TTL держим коротким — он и ограничивает «устаревание» в соседних воркерах.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    email: str
+    role: Union[UserRole, str]
+    is_active: bool = True
+
+
+principal_cache: TTLCache[str, Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SEC,
+)
+
+
+def get_cached_principal(sub: str) -> Optional[Principal]:
+    return principal_cache.get(sub)
+
+
+def cache_principal(principal: Principal) -> None:
+    principal_cache.set(principal.email, principal)
+
+
+def invalidate_principal(sub: Optional[str]) -> None:
+    """Вызывать после любых изменений пользователя (пароль, сессии, роль)."""
+    if sub:
+        principal_cache.pop(sub)
@@ -0,0 +1,152 @@
+# app/core/query_debug.py
+"""
+Отладка SQL (тесты, staging): журнал запросов, детектор N+1 и лог медленных
+запросов с планом.
+
+  - QueryLog — список выполненных запросов и счётчик по «форме» запроса
+    (normalize_sql: литералы и плейсхолдеры заменяются на ?, IN-списки
+    сворачиваются). N+1 выглядит как один и тот же SELECT, повторённый
+    десятки раз за запрос: repeated(threshold) возвращает такие формы;
+  - при QUERY_DEBUG InstrumentationMiddleware заводит QueryLog на каждый
+    HTTP-запрос, пишет предупреждение о повторах и добавляет заголовок
+    X-DB-Queries;
+  - track_queries() — журнал «всего, что выполнилось», для тестов (TestClient
+    выполняет приложение в другом потоке, поэтому нужен глобальный реестр, а
+    не contextvar); pytest-фикстура query_budget лежит в app/testing.py;
+  - при SLOW_QUERY_MS > 0 запросы дольше порога пишутся в лог вместе с
+    EXPLAIN (в Postgres — без ANALYZE, то есть запрос повторно не выполняется).
+
+Хуки на движках ставит app.core.instrumentation.instrument_engine.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_EXPLAIN_PREFIX = {"postgresql": "EXPLAIN ", "sqlite": "EXPLAIN QUERY PLAN "}
+_EXPLAINABLE = ("select", "with", "update", "delete", "insert")
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """Форма запроса: одинакова для запросов, отличающихся только значениями."""
+    sql = _SPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    return _IN_LIST.sub("(?, ...)", sql)
+
+
+def _is_select(shape: str) -> bool:
+    sql = shape.lower()
+    if sql.startswith("select"):
+        return True
+    return sql.startswith("with") and not any(k in sql for k in (" insert ", " update ", " delete "))
+
+
+class QueryLog:
+    def __init__(self) -> None:
+        self.statements: List[Tuple[str, float]] = []
+        self.shapes: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = normalize_sql(statement)
+        with self._lock:
+            self.statements.append((statement, elapsed))
+            self.shapes[shape] += 1
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """SELECT-формы, выполненные threshold и более раз, — кандидаты в N+1."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold and _is_select(shape)]
+
+    def report(self, limit: int = 20) -> str:
+        lines = [f"{len(self)} statements, {len(self.shapes)} distinct:"]
+        for shape, n in self.shapes.most_common(limit):
+            lines.append(f"  {n:>4} x {shape[:300]}")
+        return "\n".join(lines)
+
+
+# ======== Глобальный реестр журналов (тесты) ========
+
+# кортеж заменяется целиком: хуки читают его без блокировки
+_active: Tuple[QueryLog, ...] = ()
+_active_lock = threading.Lock()
+
+
+def active_logs() -> Tuple[QueryLog, ...]:
+    return _active
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryLog]:
+    """Журнал всех запросов, выполненных на инструментированных движках, пока открыт блок."""
+    from app.core.instrumentation import instrument_engine
+    from app.db.session import async_engine, engine
+
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    global _active
+    log = QueryLog()
+    with _active_lock:
+        _active = _active + (log,)
+    try:
+        yield log
+    finally:
+        with _active_lock:
+            _active = tuple(x for x in _active if x is not log)
+
+
+def warn_repeated(route: str, log: QueryLog) -> None:
+    for shape, n in log.repeated(settings.QUERY_DEBUG_NPLUSONE_THRESHOLD):
+        logger.warning("possible N+1 in %s: %d x %s", route, n, shape[:500])
+
+
+# ======== Медленные запросы ========
+
+def _explain(conn: Any, statement: str, parameters: Any) -> Optional[str]:
+    prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip()[:6].lower().startswith(_EXPLAINABLE):
+        return None
+    # курсор DBAPI напрямую: мимо событий движка (без рекурсии) и на том же
+    # соединении/транзакции, что и исходный запрос
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return "\n".join(" | ".join(str(v) for v in row) for row in rows)
+
+
+def log_slow_query(conn: Any, statement: str, parameters: Any, elapsed: float, executemany: bool) -> None:
+    plan = None
+    if settings.SLOW_QUERY_EXPLAIN and not executemany:
+        try:
+            plan = _explain(conn, statement, parameters)
+        except Exception as e:
+            plan = f"<explain failed: {type(e).__name__}: {e}>"
+    logger.warning(
+        "slow query %.1f ms: %s\nparams: %.500r%s",
+        elapsed * 1000,
+        _SPACE.sub(" ", statement).strip()[:2000],
+        parameters,
+        f"\nplan:\n{plan}" if plan else "",
+    )
@@ -0,0 +1,191 @@
+# app/core/rate_limit.py
+"""
+Ограничение частоты запросов (логин, регистрация, сброс пароля).
+
+Алгоритм — sliding window counter: два счётчика (текущее и предыдущее
+фиксированное окно), оценка = prev * (доля prev-окна, ещё попадающая в
+скользящее окно) + curr. Это O(1) на проверку и O(1) памяти на ключ.
+Считаются все попытки, включая отклонённые: под перебором ключ не «остывает».
+
+Бэкенды (Settings.RATE_LIMIT_BACKEND):
+  - memory — словарь процесса с LRU-вытеснением (RATE_LIMIT_MEMORY_MAXSIZE);
+    у каждого воркера свой счётчик;
+  - redis  — общий для всех воркеров: INCR+EXPIRE текущего окна и GET
+    предыдущего одним pipeline (get_kv).
+
+Зависимость проверяет лимит до хендлера, то есть до запроса в БД и PBKDF2.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, List, Optional, Protocol, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.kv import get_kv
+
+
+@lru_cache(maxsize=64)
+def parse_rate(spec: str) -> Tuple[int, int]:
+    """Спецификация "10/60" -> (10 запросов, окно 60 с)."""
+    limit, _, window = spec.partition("/")
+    return int(limit), int(window or 60)
+
+
+def _estimate(prev: int, curr: int, window: int, elapsed: float) -> float:
+    return prev * (window - elapsed) / window + curr
+
+
+def _retry_after(prev: int, curr: int, limit: int, window: int, elapsed: float) -> int:
+    """Через сколько секунд оценка опустится до лимита (prev «выветривается» линейно)."""
+    if curr >= limit or prev == 0:
+        return max(1, math.ceil(window - elapsed))
+    # prev * (window - elapsed - t) / window + curr <= limit
+    t = (window - elapsed) - (limit - curr) * window / prev
+    return max(1, math.ceil(t))
+
+
+class RateLimiter(Protocol):
+    async def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        """(разрешено, Retry-After в секундах)."""
+
+
+class MemoryRateLimiter:
+    """Счётчики в памяти процесса; число ключей ограничено (LRU)."""
+
+    def __init__(self, maxsize: int, clock=time.time) -> None:
+        self.maxsize = max(1, maxsize)
+        self._clock = clock
+        # key -> [индекс окна, prev, curr]
+        self._data: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    async def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        now = self._clock()
+        idx = int(now // window)
+        elapsed = now - idx * window
+        with self._lock:
+            state = self._data.get(key)
+            if state is None:
+                state = [idx, 0, 0]
+                self._data[key] = state
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._data.move_to_end(key)
+                if state[0] != idx:
+                    # окно сдвинулось: curr -> prev (или обнуление, если пропущено больше окна)
+                    state[1] = state[2] if state[0] == idx - 1 else 0
+                    state[2] = 0
+                    state[0] = idx
+            state[2] += 1
+            prev, curr = state[1], state[2]
+        if _estimate(prev, curr, window, elapsed) <= limit:
+            return True, 0
+        return False, _retry_after(prev, curr, limit, window, elapsed)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class KVRateLimiter:
+    """Общие счётчики в KV (Redis): ключ на окно, живёт два окна."""
+
+    def __init__(self, kv: Any, prefix: str = "rl:", clock=time.time) -> None:
+        self.kv = kv
+        self.prefix = prefix
+        self._clock = clock
+
+    async def hit(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        now = self._clock()
+        idx = int(now // window)
+        elapsed = now - idx * window
+        curr_key = f"{self.prefix}{key}:{idx}"
+        pipe = self.kv.pipeline(transaction=False)
+        pipe.incr(curr_key)
+        pipe.expire(curr_key, window * 2)
+        pipe.get(f"{self.prefix}{key}:{idx - 1}")
+        curr, _, prev = await pipe.execute()
+        curr, prev = int(curr), int(prev or 0)
+        if _estimate(prev, curr, window, elapsed) <= limit:
+            return True, 0
+        return False, _retry_after(prev, curr, limit, window, elapsed)
+
+
+_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        if settings.RATE_LIMIT_BACKEND.lower() == "redis":
+            _limiter = KVRateLimiter(get_kv("redis"))
+        else:
+            _limiter = MemoryRateLimiter(settings.RATE_LIMIT_MEMORY_MAXSIZE)
+    return _limiter
+
+
+def client_ip(request: Request) -> str:
+    """
+    За прокси — адрес из X-Forwarded-For, который дописал самый внешний из
+    RATE_LIMIT_TRUSTED_PROXIES наших прокси (N-й справа). Левее него — то,
+    что прислал клиент: подделать можно, в ключ лимита не берём.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+        if forwarded:
+            hops = max(1, settings.RATE_LIMIT_TRUSTED_PROXIES)
+            return forwarded[-hops] if len(forwarded) >= hops else forwarded[0]
+    return request.client.host if request.client else "unknown"
+
+
+def _digest(value: str) -> str:
+    # email в ключах KV не храним открытым текстом
+    return hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+
+
+async def _body_email(request: Request) -> Optional[str]:
+    """email из JSON-тела; FastAPI уже прочитал тело, request.json() берёт его из кэша."""
+    try:
+        data = await request.json()
+    except Exception:
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+def rate_limit(scope: str, per_ip: Optional[str] = None, per_email: Optional[str] = None):
+    """
+    Зависимость маршрута: dependencies=[Depends(rate_limit("login", per_ip=..., per_email=...))].
+    per_ip/per_email — имена настроек вида "N/секунды" (читаются на каждом вызове).
+    """
+    async def _check(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        checks = []
+        if per_ip:
+            checks.append((f"{scope}:ip:{client_ip(request)}", getattr(settings, per_ip)))
+        if per_email:
+            email = await _body_email(request)
+            if email:
+                checks.append((f"{scope}:email:{_digest(email)}", getattr(settings, per_email)))
+        limiter = get_rate_limiter()
+        for key, spec in checks:
+            limit, window = parse_rate(spec)
+            allowed, retry_after = await limiter.hit(key, limit, window)
+            if not allowed:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many requests",
+                    headers={"Retry-After": str(retry_after)},
+                )
+
+    return _check
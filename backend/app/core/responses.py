@@ -0,0 +1,104 @@
+# app/core/responses.py
+"""
+Быстрая сериализация JSON-ответов.
+
+  - json_response_class(): класс ответа по умолчанию для всего приложения
+    (Settings.JSON_RESPONSE: orjson | msgspec | std). Если библиотеки нет,
+    используется стандартный JSONResponse. Касается ответов-словарей и
+    списков, которые FastAPI сначала прогоняет через response_model/jsonable_encoder;
+  - @serialize_only: для ответов, которые хендлер только что собрал из своих
+    же данных (TokenPair, UserOut, WhoAmI), повторная валидация по
+    response_model не нужна. Модель сразу сериализуется в JSON-байты
+    pydantic-core (model.__pydantic_serializer__.to_json). response_model на
+    маршруте остаётся и нужен для OpenAPI.
+
+Декоратор ставится под @router.*, как и @http_cache:
+
+    @router.get("/me", response_model=UserOut)
+    @serialize_only
+    async def read_me(...) -> UserOut: ...
+"""
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+from typing import Any, Callable, Mapping, Optional, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+from app.core.config import settings
+
+try:  # опциональные зависимости
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover
+    msgspec = None  # type: ignore[assignment]
+
+
+class StdJSONResponse(JSONResponse):
+    """stdlib json, но без пробелов-разделителей (как у orjson)."""
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MsgspecJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return msgspec.json.encode(content)
+
+
+def json_response_class(name: Optional[str] = None) -> Type[JSONResponse]:
+    name = (name or settings.JSON_RESPONSE).lower()
+    if name == "orjson" and orjson is not None:
+        return ORJSONResponse
+    if name == "msgspec" and msgspec is not None:
+        return MsgspecJSONResponse
+    return StdJSONResponse
+
+
+class ModelResponse(Response):
+    """Pydantic-модель -> JSON-байты одним вызовом pydantic-core, без валидации."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        model: BaseModel,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        super().__init__(model.__pydantic_serializer__.to_json(model), status_code, headers, None, background)
+
+
+def serialize_only(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Декоратор эндпоинта: возвращённая pydantic-модель уходит в ModelResponse без response_model-валидации."""
+
+    def wrap(result: Any) -> Any:
+        return ModelResponse(result) if isinstance(result, BaseModel) else result
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_endpoint(*args: Any, **kwargs: Any) -> Any:
+            return wrap(await fn(*args, **kwargs))
+
+        return async_endpoint
+
+    @functools.wraps(fn)
+    def endpoint(*args: Any, **kwargs: Any) -> Any:
+        return wrap(fn(*args, **kwargs))
+
+    return endpoint
@@ -0,0 +1,143 @@
+# app/core/s3.py
+"""
+Presigned URL для S3-совместимого хранилища (Cloudflare R2, AWS S3, MinIO).
+
+Подпись AWS SigV4 (query-string) считается локально: ни одного сетевого
+вызова на запрос, байты медиа идут клиент <-> хранилище напрямую, мимо
+воркеров uvicorn. Ключ подписи зависит только от (secret, дата, регион,
+сервис) — кэшируем его, на URL остаются один SHA-256 и один HMAC.
+
+Multipart целиком на стороне клиента: он получает presigned
+POST ?uploads (CreateMultipartUpload), затем — URL частей и Complete/Abort.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Mapping, Optional
+from urllib.parse import quote, urlsplit
+
+from app.core.config import settings
+
+ALGORITHM = "AWS4-HMAC-SHA256"
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+MAX_EXPIRES_SEC = 7 * 24 * 3600  # предел SigV4
+
+
+class StorageNotConfigured(RuntimeError):
+    pass
+
+
+def _uri_encode(value: str, safe: str = "-_.~") -> str:
+    # RFC 3986, как требует SigV4 (quote по умолчанию оставляет '/' — здесь нельзя)
+    return quote(value, safe=safe)
+
+
+@lru_cache(maxsize=32)
+def signing_key(secret: str, datestamp: str, region: str, service: str = "s3") -> bytes:
+    """kSigning = HMAC(HMAC(HMAC(HMAC("AWS4"+secret, date), region), service), "aws4_request")."""
+    k = hmac.new(("AWS4" + secret).encode(), datestamp.encode(), hashlib.sha256).digest()
+    k = hmac.new(k, region.encode(), hashlib.sha256).digest()
+    k = hmac.new(k, service.encode(), hashlib.sha256).digest()
+    return hmac.new(k, b"aws4_request", hashlib.sha256).digest()
+
+
+@dataclass(frozen=True)
+class Presigner:
+    access_key: str
+    secret_key: str
+    bucket: str
+    region: str = "auto"
+    endpoint_url: Optional[str] = None  # None — AWS (https://{bucket}.s3.{region}.amazonaws.com)
+    path_style: bool = True  # R2/MinIO: https://endpoint/{bucket}/{key}
+
+    def _host_and_path(self, key: str) -> tuple[str, str, str]:
+        encoded_key = _uri_encode(key.lstrip("/"), safe="-_.~/")
+        if self.endpoint_url:
+            parts = urlsplit(self.endpoint_url)
+            scheme, host = parts.scheme or "https", parts.netloc
+            base = parts.path.rstrip("/")
+            if self.path_style:
+                return scheme, host, f"{base}/{self.bucket}/{encoded_key}"
+            return scheme, f"{self.bucket}.{host}", f"{base}/{encoded_key}"
+        return "https", f"{self.bucket}.s3.{self.region}.amazonaws.com", f"/{encoded_key}"
+
+    def presign(
+        self,
+        method: str,
+        key: str,
+        expires_in: int,
+        params: Optional[Mapping[str, str]] = None,
+        now: Optional[datetime] = None,
+    ) -> str:
+        now = now or datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        datestamp = amz_date[:8]
+        scope = f"{datestamp}/{self.region}/s3/aws4_request"
+        scheme, host, path = self._host_and_path(key)
+
+        query: Dict[str, str] = {
+            "X-Amz-Algorithm": ALGORITHM,
+            "X-Amz-Credential": f"{self.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(max(1, min(expires_in, MAX_EXPIRES_SEC))),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if params:
+            query.update({k: str(v) for k, v in params.items()})
+        canonical_query = "&".join(
+            f"{_uri_encode(k)}={_uri_encode(v)}" for k, v in sorted(query.items())
+        )
+
+        canonical_request = "\n".join(
+            (method.upper(), path, canonical_query, f"host:{host}\n", "host", UNSIGNED_PAYLOAD)
+        )
+        string_to_sign = "\n".join(
+            (ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest())
+        )
+        signature = hmac.new(
+            signing_key(self.secret_key, datestamp, self.region), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return f"{scheme}://{host}{path}?{canonical_query}&X-Amz-Signature={signature}"
+
+    # -- операции --
+    def get_url(self, key: str, expires_in: int) -> str:
+        return self.presign("GET", key, expires_in)
+
+    def put_url(self, key: str, expires_in: int) -> str:
+        return self.presign("PUT", key, expires_in)
+
+    def create_multipart_url(self, key: str, expires_in: int) -> str:
+        return self.presign("POST", key, expires_in, {"uploads": ""})
+
+    def upload_part_url(self, key: str, upload_id: str, part_number: int, expires_in: int) -> str:
+        return self.presign("PUT", key, expires_in, {"partNumber": str(part_number), "uploadId": upload_id})
+
+    def complete_multipart_url(self, key: str, upload_id: str, expires_in: int) -> str:
+        return self.presign("POST", key, expires_in, {"uploadId": upload_id})
+
+    def abort_multipart_url(self, key: str, upload_id: str, expires_in: int) -> str:
+        return self.presign("DELETE", key, expires_in, {"uploadId": upload_id})
+
+
+_presigner: Optional[Presigner] = None
+
+
+def get_presigner() -> Presigner:
+    """Presigner из настроек (S3_*); StorageNotConfigured, если хранилище не задано."""
+    global _presigner
+    if _presigner is None:
+        if not (settings.S3_BUCKET and settings.S3_ACCESS_KEY_ID and settings.S3_SECRET_ACCESS_KEY):
+            raise StorageNotConfigured("S3_BUCKET / S3_ACCESS_KEY_ID / S3_SECRET_ACCESS_KEY are not set")
+        _presigner = Presigner(
+            access_key=settings.S3_ACCESS_KEY_ID,
+            secret_key=settings.S3_SECRET_ACCESS_KEY,
+            bucket=settings.S3_BUCKET,
+            region=settings.S3_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            path_style=settings.S3_PATH_STYLE,
+        )
+    return _presigner
@@ -1,11 +1,18 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import hashlib
 import os
-from typing import Dict, Any, Union
+import time
+from typing import Dict, Any, Optional, Tuple, Union
 import uuid
 
-from jose import jwt, JWTError
+from jose import JWTError
+from jose.exceptions import ExpiredSignatureError
 from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
+from app.core.jwt_keys import KeyRing, load_keyring
+
 try:
     from app.core.config import settings  # type: ignore
 
@@ -14,14 +21,44 @@ try:
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRES_MIN", str(getattr(settings, "JWT_EXPIRES_MIN", 60))))
     REFRESH_EXPIRES_DAYS = int(os.getenv("REFRESH_EXPIRES_DAYS", str(getattr(settings, "REFRESH_EXPIRES_DAYS", 30))))
     RESET_TOKEN_EXPIRES_MIN = int(os.getenv("RESET_TOKEN_EXPIRES_MIN", str(getattr(settings, "RESET_TOKEN_EXPIRES_MIN", 30))))
+    JWT_DECODE_CACHE_TTL_SEC = int(getattr(settings, "JWT_DECODE_CACHE_TTL_SEC", 900))
+    JWT_DECODE_CACHE_MAXSIZE = int(getattr(settings, "JWT_DECODE_CACHE_MAXSIZE", 50_000))
+    PASSWORD_SCHEMES = str(getattr(settings, "PASSWORD_SCHEMES", "pbkdf2_sha256"))
+    PASSWORD_HASH_ROUNDS = getattr(settings, "PASSWORD_HASH_ROUNDS", None)
+    JWT_KEYS_DIR = getattr(settings, "JWT_KEYS_DIR", None)
+    JWT_ACTIVE_KID = getattr(settings, "JWT_ACTIVE_KID", None)
+    JWT_ACCEPT_HS256 = bool(getattr(settings, "JWT_ACCEPT_HS256", False))
 except Exception:
     JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret")
     JWT_ALG = os.getenv("JWT_ALG", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRES_MIN", "60"))
     REFRESH_EXPIRES_DAYS = int(os.getenv("REFRESH_EXPIRES_DAYS", "30"))
     RESET_TOKEN_EXPIRES_MIN = int(os.getenv("RESET_TOKEN_EXPIRES_MIN", "30"))
+    JWT_DECODE_CACHE_TTL_SEC = int(os.getenv("JWT_DECODE_CACHE_TTL_SEC", "900"))
+    JWT_DECODE_CACHE_MAXSIZE = int(os.getenv("JWT_DECODE_CACHE_MAXSIZE", "50000"))
+    PASSWORD_SCHEMES = os.getenv("PASSWORD_SCHEMES", "pbkdf2_sha256")
+    PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS")) if os.getenv("PASSWORD_HASH_ROUNDS") else None
+    JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+    JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+    JWT_ACCEPT_HS256 = os.getenv("JWT_ACCEPT_HS256", "").lower() in ("1", "true", "yes")
+
+
+def build_password_context(schemes: str, rounds: int | None = None) -> CryptContext:
+    """
+    Первая схема — для новых хешей, остальные только проверяются (deprecated).
+    rounds задаёт стоимость первой схемы жёстко (min = default = max), поэтому
+    needs_update срабатывает на любой хеш с другой стоимостью — и при
+    повышении, и при понижении.
+    """
+    names = [s.strip() for s in schemes.split(",") if s.strip()]
+    kwargs: Dict[str, Any] = {}
+    if rounds is not None:
+        for opt in ("default_rounds", "min_rounds", "max_rounds"):
+            kwargs[f"{names[0]}__{opt}"] = int(rounds)
+    return CryptContext(schemes=names, default=names[0], deprecated="auto", **kwargs)
+
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+pwd_context = build_password_context(PASSWORD_SCHEMES, PASSWORD_HASH_ROUNDS)
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
@@ -31,6 +68,14 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
         return False
 
 
+def verify_and_update_password(plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """(совпал ли пароль, новый хеш — если старый устарел по схеме/стоимости, иначе None)."""
+    try:
+        return pwd_context.verify_and_update((plain_password or "")[:72], password_hash or "")
+    except Exception:
+        return False, None
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash((password or "")[:72])
 
@@ -47,6 +92,37 @@ def _jwt_exp_in_days(days: int) -> tuple[int, int]:
     return int(now.timestamp()), int(exp.timestamp())
 
 
+# ======== Кэш проверенных токенов ========
+# Ключ — sha256 от сырого токена, значение — уже проверенный payload.
+# Запись живёт не дольше exp токена (и не дольше JWT_DECODE_CACHE_TTL_SEC).
+_decode_cache: TTLCache[bytes, Dict[str, Any]] = TTLCache(
+    maxsize=JWT_DECODE_CACHE_MAXSIZE,
+    ttl=JWT_DECODE_CACHE_TTL_SEC,
+)
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _remember_payload(token: str, payload: Dict[str, Any]) -> None:
+    exp = payload.get("exp")
+    ttl = float(JWT_DECODE_CACHE_TTL_SEC)
+    if exp is not None:
+        ttl = min(ttl, float(exp) - time.time())
+    _decode_cache.set(_token_key(token), dict(payload), ttl=ttl)
+
+
+@lru_cache(maxsize=1)
+def get_keyring() -> KeyRing:
+    """Ключи подписи/проверки (app/core/jwt_keys.py); разбираются один раз — при старте API."""
+    return load_keyring(JWT_ALG, JWT_SECRET, JWT_KEYS_DIR, JWT_ACTIVE_KID, JWT_ACCEPT_HS256)
+
+
+def _encode(payload: Dict[str, Any]) -> str:
+    return get_keyring().encode(payload)
+
+
 def create_access_token(subject: Union[str, Dict[str, Any]], expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES) -> str:
     _, exp = _jwt_now_exp(expires_minutes)
     payload: Dict[str, Any]
@@ -55,25 +131,65 @@ def create_access_token(subject: Union[str, Dict[str, Any]], expires_minutes: in
     else:
         payload = {"sub": str(subject)}
     payload["exp"] = exp
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+    token = _encode(payload)
+    # access-токен клиент предъявит почти сразу — кладём в кэш заранее
+    _remember_payload(token, payload)
+    return token
+
+
+def issue_refresh_token(
+    user_email: str, jti: str | None = None, family_id: str | None = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Refresh-токен + его claims (jti/fam/exp), чтобы не декодировать только что выпущенное.
+    fam — «семейство» ротаций: новый при логине, наследуется при /auth/refresh.
+    """
+    _, exp = _jwt_exp_in_days(REFRESH_EXPIRES_DAYS)
+    payload: Dict[str, Any] = {
+        "sub": user_email,
+        "type": "refresh",
+        "jti": jti or str(uuid.uuid4()),
+        "fam": family_id or str(uuid.uuid4()),
+        "exp": exp,
+    }
+    return _encode(payload), payload
 
 
 def create_refresh_token(user_email: str, jti: str | None = None) -> str:
     """Refresh-токен: sub=email, jti=UUID, срок жизни в днях."""
-    _, exp = _jwt_exp_in_days(REFRESH_EXPIRES_DAYS)
-    payload: Dict[str, Any] = {"sub": user_email, "type": "refresh", "jti": jti or str(uuid.uuid4()), "exp": exp}
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+    return issue_refresh_token(user_email, jti)[0]
 
 
-def create_reset_token(user_email: str) -> str:
-    """Токен для сброса пароля (короткоживущий)."""
+def issue_reset_token(user_email: str) -> Tuple[str, Dict[str, Any]]:
+    """Reset-токен + его claims."""
     _, exp = _jwt_now_exp(RESET_TOKEN_EXPIRES_MIN)
     payload: Dict[str, Any] = {"sub": user_email, "type": "reset", "exp": exp, "jti": str(uuid.uuid4())}
-    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
+    return _encode(payload), payload
+
+
+def create_reset_token(user_email: str) -> str:
+    """Токен для сброса пароля (короткоживущий)."""
+    return issue_reset_token(user_email)[0]
+
+
+def claims_expires_at(payload: Dict[str, Any]) -> datetime:
+    """exp из claims -> aware datetime (для колонок expires_at)."""
+    return datetime.fromtimestamp(int(payload["exp"]), tz=timezone.utc)
 
 
 def decode_token(token: str) -> Dict[str, Any]:
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
+    key = _token_key(token)
+    cached = _decode_cache.get(key)
+    if cached is not None:
+        exp = cached.get("exp")
+        if exp is not None and float(exp) <= time.time():
+            _decode_cache.pop(key)
+            raise ExpiredSignatureError("Signature has expired.")
+        return dict(cached)
+
+    payload = get_keyring().decode(token)
+    _remember_payload(token, payload)
+    return payload
 
 
 def get_token_jti(token: str) -> str | None:
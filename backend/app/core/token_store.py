@@ -0,0 +1,375 @@
+# app/core/token_store.py
+"""
+Хранилище refresh-токенов (whitelist jti) за единым интерфейсом.
+
+  SqlTokenStore — таблица refresh_tokens; изменения ставятся в сессию запроса,
+                  коммитит роутер (вместе с остальными изменениями).
+  KVTokenStore  — Redis-протокол с нативным TTL: ротация = GETDEL старого + SET
+                  нового, Postgres при /auth/refresh не трогается вовсе.
+
+Семантика одинаковая: refresh-токен одноразовый (consume атомарен), «выйти
+со всех устройств» гасит все сессии пользователя.
+
+Семейства (family_id, claim fam в JWT): все токены одной цепочки ротаций.
+Живой токен в семействе всегда один. Если предъявлен уже погашенный (или
+неизвестный) токен — это повторное использование, и rotate() гасит всё
+семейство: украденный и «легальный» токены перестают работать одновременно.
+"""
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Optional, Protocol, Sequence
+
+from fastapi import Depends
+from sqlalchemy import DateTime, String, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.kv import get_kv
+from app.db.dialect import dialect_name, upsert_insert
+from app.db.session import get_async_db
+from app.models.auth_tokens import RefreshToken
+
+
+class UserLike(Protocol):
+    id: int
+    email: str
+
+
+@dataclass(frozen=True, slots=True)
+class RefreshRecord:
+    jti: str
+    user_id: int
+    email: str
+    expires_at: datetime
+    user_agent: Optional[str] = None
+    ip: Optional[str] = None
+    family_id: Optional[str] = None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class TokenStore(ABC):
+    @abstractmethod
+    async def add(self, record: RefreshRecord) -> None:
+        """Запомнить выпущенный refresh-токен."""
+
+    @abstractmethod
+    async def consume(self, jti: str, email: str) -> Optional[RefreshRecord]:
+        """Атомарно «погасить» токен; None — неизвестен, отозван или истёк."""
+
+    @abstractmethod
+    async def revoke(self, jti: str, email: str) -> bool:
+        """Отозвать одну сессию."""
+
+    @abstractmethod
+    async def revoke_family(self, family_id: str) -> None:
+        """Отозвать все токены семейства (цепочки ротаций)."""
+
+    @abstractmethod
+    async def revoke_user(self, user: UserLike) -> None:
+        """Отозвать все сессии пользователя."""
+
+    async def revoke_users(self, users: Sequence[UserLike]) -> None:
+        """Массовый отзыв (админка). Бэкенды переопределяют одним set-based вызовом."""
+        for user in users:
+            await self.revoke_user(user)
+
+    async def rotate(self, jti: str, email: str, new: RefreshRecord) -> Optional[RefreshRecord]:
+        """
+        /auth/refresh: погасить jti и сохранить new (того же семейства).
+        Возвращает погашенную запись; None — токен недействителен, и тогда
+        семейство new.family_id уже отозвано (reuse detection).
+        """
+        old = await self.consume(jti, email)
+        if old is None:
+            if new.family_id:
+                await self.revoke_family(new.family_id)
+            return None
+        await self.add(replace(new, user_id=old.user_id))
+        return old
+
+    async def create_with_user(self, db: AsyncSession, user_insert: Any, record: RefreshRecord) -> Optional[int]:
+        """
+        Регистрация: INSERT пользователя (ON CONFLICT DO NOTHING RETURNING id) + сессия.
+        None — email занят. Коммит — за вызывающим.
+        """
+        user_id = await db.scalar(user_insert)
+        if user_id is None:
+            return None
+        await self.add(replace(record, user_id=user_id))
+        return user_id
+
+
+# ======== SQL ========
+
+class SqlTokenStore(TokenStore):
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def add(self, record: RefreshRecord) -> None:
+        self.db.add(
+            RefreshToken(
+                user_id=record.user_id,
+                jti=record.jti,
+                family_id=record.family_id,
+                expires_at=record.expires_at,
+                user_agent=record.user_agent,
+                ip=record.ip,
+            )
+        )
+
+    @staticmethod
+    def _consume_stmt(jti: str):
+        # UPDATE ... RETURNING: проверка и погашение без гонки между read и write;
+        # условие по expires_at заодно отсекает истекшие секции refresh_tokens
+        return (
+            update(RefreshToken)
+            .where(
+                RefreshToken.jti == jti,
+                RefreshToken.revoked == False,  # noqa: E712
+                RefreshToken.expires_at > _utcnow(),
+            )
+            .values(revoked=True)
+            .returning(
+                RefreshToken.user_id,
+                RefreshToken.expires_at,
+                RefreshToken.user_agent,
+                RefreshToken.ip,
+                RefreshToken.family_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _revoke_family_stmt(family_id: str):
+        # идёт по частичному индексу ix_refresh_tokens_family_active
+        return (
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked == False)  # noqa: E712
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def consume(self, jti: str, email: str) -> Optional[RefreshRecord]:
+        row = (await self.db.execute(self._consume_stmt(jti))).first()
+        if row is None:
+            return None
+        return RefreshRecord(jti, row.user_id, email, row.expires_at, row.user_agent, row.ip, row.family_id)
+
+    async def revoke(self, jti: str, email: str) -> bool:
+        res = await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.jti == jti, RefreshToken.revoked == False)  # noqa: E712
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+        return bool(res.rowcount)
+
+    async def revoke_family(self, family_id: str) -> None:
+        await self.db.execute(self._revoke_family_stmt(family_id))
+
+    async def rotate(self, jti: str, email: str, new: RefreshRecord) -> Optional[RefreshRecord]:
+        if dialect_name(self.db) != "postgresql":
+            return await super().rotate(jti, email, new)
+
+        # Postgres: погашение старого и вставка нового — один statement.
+        # Отзыв семейства при reuse — отдельным statement'ом: CTE видят снимок,
+        # снятый до ожидания блокировки строки old. При конкурентном повторе
+        # того же токена проигравший в этом снимке не видит преемника, которого
+        # вставил и закоммитил победитель, и тот остался бы живым. Новый
+        # statement (READ COMMITTED) берёт свежий снимок и гасит всё семейство.
+        old = self._consume_stmt(jti).cte("old")
+        stmt = (
+            upsert_insert(self.db, RefreshToken)
+            .from_select(
+                ["user_id", "jti", "family_id", "expires_at", "user_agent", "ip"],
+                select(
+                    old.c.user_id,
+                    literal(new.jti, String),
+                    literal(new.family_id, String),
+                    literal(new.expires_at, DateTime(timezone=True)),
+                    literal(new.user_agent, String),
+                    literal(new.ip, String),
+                ),
+            )
+            .returning(RefreshToken.user_id)
+        )
+        user_id = await self.db.scalar(stmt)
+        if user_id is None:
+            if new.family_id:
+                await self.revoke_family(new.family_id)
+            return None
+        return RefreshRecord(jti, user_id, email, new.expires_at, family_id=new.family_id)
+
+    async def revoke_user(self, user: UserLike) -> None:
+        await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id == user.id, RefreshToken.revoked == False)  # noqa: E712
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def revoke_users(self, users: Sequence[UserLike]) -> None:
+        if not users:
+            return
+        # один UPDATE на всех: по ix_refresh_tokens_user_active, без загрузки строк
+        await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.user_id.in_([u.id for u in users]), RefreshToken.revoked == False)  # noqa: E712
+            .values(revoked=True)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def create_with_user(self, db: AsyncSession, user_insert: Any, record: RefreshRecord) -> Optional[int]:
+        if dialect_name(db) != "postgresql":
+            return await super().create_with_user(db, user_insert, record)
+
+        # Postgres: пользователь и refresh-токен — один statement (INSERT в CTE)
+        new_user = user_insert.cte("new_user")
+        stmt = (
+            upsert_insert(db, RefreshToken)
+            .from_select(
+                ["user_id", "jti", "family_id", "expires_at", "user_agent", "ip"],
+                select(
+                    new_user.c.id,
+                    literal(record.jti, String),
+                    literal(record.family_id, String),
+                    literal(record.expires_at, DateTime(timezone=True)),
+                    literal(record.user_agent, String),
+                    literal(record.ip, String),
+                ),
+            )
+            .returning(RefreshToken.user_id)
+        )
+        return await db.scalar(stmt)
+
+
+# ======== KV (Redis-протокол) ========
+
+class KVTokenStore(TokenStore):
+    """
+    rt:{jti}    -> JSON записи, EX = остаток жизни токена;
+    rtg:{email} -> «поколение» сессий пользователя. revoke_user = INCR (O(1)):
+                   записи со старым поколением считаются отозванными.
+    rtf:{fam}   -> jti живого токена семейства; revoke_family = DEL двух ключей.
+    """
+
+    def __init__(self, kv: Any) -> None:
+        self.kv = kv
+
+    @staticmethod
+    def _key(jti: str) -> str:
+        return f"rt:{jti}"
+
+    @staticmethod
+    def _gen_key(email: str) -> str:
+        return f"rtg:{email}"
+
+    @staticmethod
+    def _family_key(family_id: str) -> str:
+        return f"rtf:{family_id}"
+
+    @staticmethod
+    def _ttl(expires_at: datetime) -> int:
+        return int((expires_at - _utcnow()).total_seconds())
+
+    async def _generation(self, email: str) -> int:
+        raw = await self.kv.get(self._gen_key(email))
+        return int(raw) if raw else 0
+
+    async def _write(self, record: RefreshRecord, gen: int) -> None:
+        ttl = self._ttl(record.expires_at)
+        if ttl <= 0:
+            return
+        value = {
+            "uid": record.user_id,
+            "email": record.email,
+            "exp": int(record.expires_at.timestamp()),
+            "ua": record.user_agent,
+            "ip": record.ip,
+            "fam": record.family_id,
+            "gen": gen,
+        }
+        pipe = self.kv.pipeline(transaction=True)
+        pipe.set(self._key(record.jti), json.dumps(value), ex=ttl)
+        if record.family_id:
+            pipe.set(self._family_key(record.family_id), record.jti, ex=ttl)
+        await pipe.execute()
+
+    async def add(self, record: RefreshRecord) -> None:
+        await self._write(record, await self._generation(record.email))
+
+    async def _take(self, jti: str, email: str, family_id: Optional[str] = None):
+        # один round-trip: GETDEL записи + поколение пользователя (+ живой jti семейства)
+        pipe = self.kv.pipeline(transaction=False)
+        pipe.getdel(self._key(jti))
+        pipe.get(self._gen_key(email))
+        if family_id:
+            pipe.get(self._family_key(family_id))
+        raw, gen, *current = await pipe.execute()
+        gen = int(gen) if gen else 0
+        record = None
+        if raw:
+            data = json.loads(raw)
+            if data.get("email") == email and data.get("gen", 0) >= gen:
+                record = RefreshRecord(
+                    jti=jti,
+                    user_id=int(data["uid"]),
+                    email=email,
+                    expires_at=datetime.fromtimestamp(data["exp"], tz=timezone.utc),
+                    user_agent=data.get("ua"),
+                    ip=data.get("ip"),
+                    family_id=data.get("fam"),
+                )
+        return record, gen, (current[0] if current else None)
+
+    async def consume(self, jti: str, email: str) -> Optional[RefreshRecord]:
+        record, _, _ = await self._take(jti, email)
+        return record
+
+    async def rotate(self, jti: str, email: str, new: RefreshRecord) -> Optional[RefreshRecord]:
+        old, gen, current = await self._take(jti, email, new.family_id)
+        if old is None:
+            # reuse: гасим живой токен семейства, если он ещё есть
+            if current:
+                jti_now = current.decode() if isinstance(current, bytes) else current
+                await self.kv.delete(self._key(jti_now), self._family_key(new.family_id))
+            return None
+        await self._write(replace(new, user_id=old.user_id), gen)
+        return old
+
+    async def revoke(self, jti: str, email: str) -> bool:
+        return bool(await self.kv.delete(self._key(jti)))
+
+    async def revoke_family(self, family_id: str) -> None:
+        current = await self.kv.getdel(self._family_key(family_id))
+        if current:
+            await self.kv.delete(self._key(current.decode() if isinstance(current, bytes) else current))
+
+    async def revoke_user(self, user: UserLike) -> None:
+        await self.revoke_users([user])
+
+    async def revoke_users(self, users: Sequence[UserLike]) -> None:
+        if not users:
+            return
+        # все INCR одним round-trip; после срока жизни refresh старые записи
+        # истекли сами — ключ поколения можно забыть
+        pipe = self.kv.pipeline(transaction=True)
+        for user in users:
+            key = self._gen_key(user.email)
+            pipe.incr(key)
+            pipe.expire(key, settings.REFRESH_EXPIRES_DAYS * 86400)
+        await pipe.execute()
+
+
+async def get_token_store(db: AsyncSession = Depends(get_async_db)) -> TokenStore:
+    backend = settings.TOKEN_STORE_BACKEND.lower()
+    if backend in ("redis", "memory"):
+        return KVTokenStore(get_kv(backend))
+    return SqlTokenStore(db)
@@ -17,5 +17,18 @@ try:
 except Exception:
     pass
 
+# Пациенты и запись к врачу
+from app.models.patient_profile import PatientProfile  # noqa: F401
+from app.models.appointment import Appointment  # noqa: F401
+
+# Контент и подписки
+from app.models.content_item import ContentItem  # noqa: F401
+from app.models.subscription import Subscription  # noqa: F401
+
+# Платежи и outbox побочных эффектов
+from app.models.payment import Payment  # noqa: F401
+from app.models.outbox import OutboxEvent  # noqa: F401
+from app.models.email_outbox import EmailOutbox  # noqa: F401
+
 # Токены аутентификации
 from app.models.auth_tokens import RefreshToken, PasswordResetToken  # noqa: F401
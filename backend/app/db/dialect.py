@@ -0,0 +1,24 @@
+# app/db/dialect.py
+"""
+Диалектно-зависимые конструкции (INSERT ... ON CONFLICT и т.п.).
+Основная БД — Postgres; SQLite поддерживаем как стенд для локальных бенчмарков.
+"""
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_name(db: Any) -> str:
+    """Имя диалекта для Session/AsyncSession/Engine/Connection."""
+    bind = db.get_bind() if hasattr(db, "get_bind") else db
+    return bind.dialect.name
+
+
+def upsert_insert(db: Any, table: Any):
+    """insert() с поддержкой .on_conflict_do_nothing()/.on_conflict_do_update()."""
+    name = dialect_name(db)
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT is not supported for dialect {name!r}")
@@ -1,11 +1,76 @@
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, Generator
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 from app.core.config import settings
+from app.core.metrics import Histogram, request_stats
+
+
+# ======== Пул соединений + статистика ========
+
+class PoolStats:
+    """Счётчики checkout'ов одного пула: время ожидания, отказы по таймауту."""
+
+    def __init__(self) -> None:
+        self.wait = Histogram()
+        self.checkouts = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def observe(self, waited: float, ok: bool) -> None:
+        self.wait.observe(waited)
+        with self._lock:
+            if ok:
+                self.checkouts += 1
+            else:
+                self.failures += 1
+
+
+def _instrumented(base: type, stats: PoolStats) -> type:
+    """Подкласс QueuePool, замеряющий ожидание соединения (переживает pool.recreate())."""
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+    def _do_get(self):
+        started = time.perf_counter()
+        ok = False
+        try:
+            conn = base._do_get(self)
+            ok = True
+            return conn
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.observe(waited, ok)
+            current = request_stats.get()
+            if current is not None:
+                current.pool_wait += waited
+
+    return type(f"Instrumented{base.__name__}", (base,), {"stats": stats, "_do_get": _do_get})
+
+
+def _engine_kwargs(url: str, pool_base: type, stats: PoolStats) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if make_url(url).get_backend_name() == "sqlite":
+        return kwargs  # у SQLite свои пулы, размеры к ним неприменимы
+    kwargs.update(
+        poolclass=_instrumented(pool_base, stats),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SEC,
+        pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+    )
+    return kwargs
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL, QueuePool, sync_pool_stats))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-from typing import Generator
 
 def get_db() -> Generator:
     db = SessionLocal()
@@ -13,3 +78,73 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+# ======== Async-стек ========
+# Sync-движок остаётся для Alembic и старого кода; горячие эндпоинты
+# (/auth/*, /users/me) работают через AsyncSession прямо в event loop.
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def _async_url(url: str) -> str:
+    """postgresql[+psycopg2]:// -> postgresql+psycopg:// (psycopg 3 умеет async)."""
+    u = make_url(url)
+    driver = _ASYNC_DRIVERS.get(u.drivername, u.drivername)
+    return u.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    **_engine_kwargs(ASYNC_DATABASE_URL, AsyncAdaptedQueuePool, async_pool_stats),
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,  # после commit не ходим в БД за атрибутами
+)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ======== Снимок состояния пулов ========
+
+def _describe_pool(pool: Pool, stats: PoolStats) -> Dict[str, Any]:
+    info: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        size = pool.size()
+        capacity = size + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        info.update(
+            size=size,
+            capacity=capacity,
+            checked_out=checked_out,
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            saturation=round(checked_out / capacity, 3) if capacity else 0.0,
+            exhausted=capacity > 0 and checked_out >= capacity,
+        )
+    info.update(
+        checkouts=stats.checkouts,
+        checkout_failures=stats.failures,
+        wait_seconds=stats.wait.snapshot(),
+    )
+    return info
+
+
+def pool_status() -> Dict[str, Dict[str, Any]]:
+    """Читает только счётчики пулов — соединений не открывает."""
+    return {
+        "sync": _describe_pool(engine.pool, sync_pool_stats),
+        "async": _describe_pool(async_engine.sync_engine.pool, async_pool_stats),
+    }
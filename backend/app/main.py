@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -5,11 +8,45 @@ from app.api.v1.routes_health import router as health_router
 from app.api.v1.users import router as users_router
 from app.api.v1.auth import router as auth_router
 from app.api.v1.admin import router as admin_router
+from app.api.v1.appointments import router as appointments_router
+from app.api.v1.doctors import router as doctors_router
+from app.api.v1.content import router as content_router
+from app.api.v1.media import router as media_router
+from app.api.v1.clinics import router as clinics_router
+from app.api.v1.payments import router as payments_router
+from app.api.v1.metrics import router as metrics_router
+from app.api.v1.jwks import router as jwks_router
 
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.http_cache import HttpCacheMiddleware
+from app.core.responses import json_response_class
+from app.core.security import get_keyring
+from app.core.instrumentation import InstrumentationMiddleware, instrument_engine
+from app.db.session import async_engine, engine
+from app.services import mailer, outbox, token_reaper
 import app.db.base  # noqa: F401
 
 
-app = FastAPI(title="Med Platform API")
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    get_keyring()  # ключи JWT разбираются при старте: ошибка конфигурации — сразу, а не на первом логине
+    tasks = []
+    if settings.TOKEN_REAPER_INTERVAL_SEC > 0:
+        tasks.append(asyncio.create_task(token_reaper.run_forever(settings.TOKEN_REAPER_INTERVAL_SEC)))
+    if settings.OUTBOX_INTERVAL_SEC > 0:
+        tasks.append(asyncio.create_task(outbox.run_forever(settings.OUTBOX_INTERVAL_SEC)))
+    if settings.MAIL_DISPATCH_INTERVAL_SEC > 0:
+        tasks.append(asyncio.create_task(mailer.run_forever(settings.MAIL_DISPATCH_INTERVAL_SEC)))
+    yield
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    password_hasher.shutdown()
+
+
+app = FastAPI(title="Med Platform API", lifespan=lifespan, default_response_class=json_response_class())
 
 # CORS
 app.add_middleware(
@@ -20,8 +57,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag / Cache-Control / общий кэш публичных GET (политика — @http_cache на маршруте)
+app.add_middleware(HttpCacheMiddleware, routes=app.router.routes)
+
+# Метрики и отладка SQL: самый внешний слой, чтобы учитывать и ответы из HTTP-кэша
+if settings.METRICS_ENABLED or settings.QUERY_DEBUG or settings.SLOW_QUERY_MS > 0:
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    app.add_middleware(InstrumentationMiddleware)
+
 # Роутеры
 app.include_router(health_router, prefix="/api/v1")
 app.include_router(users_router,  prefix="/api/v1")
 app.include_router(auth_router,   prefix="/api/v1")
 app.include_router(admin_router,  prefix="/api/v1")
+app.include_router(appointments_router, prefix="/api/v1")
+app.include_router(doctors_router, prefix="/api/v1")
+app.include_router(content_router, prefix="/api/v1")
+app.include_router(media_router, prefix="/api/v1")
+app.include_router(clinics_router, prefix="/api/v1")
+app.include_router(payments_router, prefix="/api/v1")
+app.include_router(jwks_router)  # /.well-known/jwks.json — без префикса
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)  # /metrics — без префикса, как ждёт Prometheus
@@ -2,5 +2,12 @@
 from .user import User
 from .clinic import Clinic
 from .doctor_profile import DoctorProfile
+from .patient_profile import PatientProfile
+from .appointment import Appointment
+from .content_item import ContentItem
+from .subscription import Subscription
+from .payment import Payment
+from .outbox import OutboxEvent
+from .email_outbox import EmailOutbox
 
-__all__ = ["User", "Clinic", "DoctorProfile"]
+__all__ = ["User", "Clinic", "DoctorProfile", "PatientProfile", "Appointment", "ContentItem", "Subscription", "Payment", "OutboxEvent", "EmailOutbox"]
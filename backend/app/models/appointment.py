@@ -1,16 +1,30 @@
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey
+from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
+# Статусы, которые НЕ занимают время врача (см. exclusion constraint в миграции)
+FREE_STATUSES = ("cancelled",)
+
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
     id = Column(Integer, primary_key=True)
     doctor_id = Column(Integer, ForeignKey("doctor_profiles.id"), nullable=False)
     patient_id = Column(Integer, ForeignKey("patient_profiles.id"), nullable=False)
-    starts_at = Column(DateTime, nullable=False)
-    ends_at = Column(DateTime, nullable=False)
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
     status = Column(String(32), nullable=False, server_default="scheduled")
 
     doctor = relationship("DoctorProfile", back_populates="appointments")
     patient = relationship("PatientProfile", back_populates="appointments")
+
+    # Postgres дополнительно держит EXCLUDE USING gist (doctor_id WITH =,
+    # tstzrange(starts_at, ends_at) WITH &&) WHERE status <> 'cancelled' —
+    # двойная запись невозможна без блокировок (миграция 20251026_appt_exclusion).
+    __table_args__ = (
+        CheckConstraint("ends_at > starts_at", name="ck_appointments_range"),
+        # пересечения с окном [from, to): doctor_id = :d AND starts_at BETWEEN from - max AND to
+        Index("ix_appointments_doctor_starts", "doctor_id", "starts_at"),
+        Index("ix_appointments_patient_starts", "patient_id", "starts_at"),
+    )
@@ -1,6 +1,6 @@
 # backend/app/models/auth_tokens.py
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy import (
     Column,
     Integer,
@@ -9,12 +9,17 @@ from sqlalchemy import (
     Boolean,
     ForeignKey,
     Index,
+    text,
 )
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
@@ -24,8 +29,15 @@ class RefreshToken(Base):
     # уникальный идентификатор refresh-токена (jti)
     jti: str = Column(String(64), nullable=False, unique=True, index=True)
 
+    # семейство ротаций (claim fam): при повторном предъявлении старого токена
+    # гасим всё семейство одним UPDATE по индексу
+    family_id: str | None = Column(String(36), nullable=True)
+
+    # значение ставит приложение (server_default — для сырого SQL): на SQLite
+    # CURRENT_TIMESTAMP пишет текст без долей секунды, а курсор списка сессий
+    # связывается как 'ГГГГ-ММ-ДД ЧЧ:ММ:СС.ffffff', и keyset не сдвигался бы
     created_at: datetime = Column(
-        DateTime(timezone=True), nullable=False, server_default="CURRENT_TIMESTAMP"
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default="CURRENT_TIMESTAMP"
     )
     expires_at: datetime = Column(DateTime(timezone=True), nullable=False)
 
@@ -39,6 +51,14 @@ class RefreshToken(Base):
 
     __table_args__ = (
         Index("ix_refresh_tokens_user_active", "user_id", "revoked"),
+        # список сессий пользователя в админке: keyset по (created_at, id)
+        Index("ix_refresh_tokens_user_created", "user_id", "created_at", "id"),
+        Index(
+            "ix_refresh_tokens_family_active",
+            "family_id",
+            postgresql_where=text("NOT revoked"),
+            sqlite_where=text("NOT revoked"),
+        ),
     )
 
 
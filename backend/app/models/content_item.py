@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, text
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # created_at — timestamp без зоны
+
+
 class ContentItem(Base):
     __tablename__ = "content_items"
 
@@ -9,8 +16,18 @@ class ContentItem(Base):
     author_doctor_id = Column(Integer, ForeignKey("doctor_profiles.id"), nullable=False)
     title = Column(String(255), nullable=False)
     kind = Column(String(32), nullable=False)
+    # тяжёлая колонка: в списках не грузится (defer в запросах ленты)
     body = Column(Text)
     r2_key = Column(String(512))
-    created_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    # значение ставит приложение (server_default — для сырого SQL): на SQLite
+    # CURRENT_TIMESTAMP пишет текст без долей секунды, а курсор ленты
+    # связывается как 'ГГГГ-ММ-ДД ЧЧ:ММ:СС.ffffff', и keyset не сдвигался бы
+    created_at = Column(DateTime, nullable=False, default=_utcnow, server_default=text("CURRENT_TIMESTAMP"))
 
     author_doctor = relationship("DoctorProfile", back_populates="contents")
+
+    # keyset-лента: ORDER BY created_at DESC, id DESC — глобально и по автору
+    __table_args__ = (
+        Index("ix_content_items_created_id", "created_at", "id"),
+        Index("ix_content_items_author_created_id", "author_doctor_id", "created_at", "id"),
+    )
@@ -31,5 +31,9 @@ class DoctorProfile(Base):
     # актуальное поле из миграций
     title: str | None = Column(String, nullable=True)
 
+    appointments = relationship("Appointment", back_populates="doctor", passive_deletes=True)
+    contents = relationship("ContentItem", back_populates="author_doctor", passive_deletes=True)
+    subscriptions = relationship("Subscription", back_populates="doctor", passive_deletes=True)
+
     def __repr__(self) -> str:
         return f"<DoctorProfile id={self.id} user_id={self.user_id} clinic_id={self.clinic_id}>"
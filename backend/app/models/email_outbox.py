@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from app.db.base_class import Base
+
+
+class EmailOutbox(Base):
+    """
+    Очередь писем. Строка пишется в транзакции запроса, отправляет
+    app/services/mailer.py. SMTP идёт вне транзакций: пачка «арендуется»
+    сдвигом available_at, отправленные письма удаляются.
+    """
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_addr = Column(String(320), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(Text)
+
+    __table_args__ = (Index("ix_email_outbox_available_id", "available_at", "id"),)
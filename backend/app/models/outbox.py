@@ -0,0 +1,23 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text, text
+from app.db.base_class import Base
+
+
+class OutboxEvent(Base):
+    """
+    Транзакционный outbox: событие пишется в той же транзакции, что и
+    изменение, а побочные эффекты выполняет воркер (app/services/outbox.py).
+    Обработанные события удаляются — в таблице только очередь и «мёртвые»
+    (attempts >= OUTBOX_MAX_ATTEMPTS) записи.
+    """
+    __tablename__ = "outbox_events"
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String(64), nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    available_at = Column(DateTime(timezone=True), nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    attempts = Column(Integer, nullable=False, server_default=text("0"))
+    last_error = Column(Text)
+
+    # выборка воркера: WHERE available_at <= now ORDER BY available_at, id LIMIT n
+    __table_args__ = (Index("ix_outbox_events_available_id", "available_at", "id"),)
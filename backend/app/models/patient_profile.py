@@ -9,3 +9,5 @@ class PatientProfile(Base):
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
 
     user = relationship("User", back_populates="patient_profile")
+    appointments = relationship("Appointment", back_populates="patient", passive_deletes=True)
+    subscriptions = relationship("Subscription", back_populates="patient", passive_deletes=True)
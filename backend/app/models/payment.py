@@ -1,16 +1,27 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, text
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
+PAYMENT_STATUSES = ("pending", "succeeded", "failed")
+
+
 class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     provider = Column(String(64), nullable=False)
+    # id транзакции у провайдера: ретраи вебхука попадают в ON CONFLICT
+    idempotency_key = Column(String(128))
+    # за что платёж: подписка на врача (None — прочие оплаты)
+    doctor_id = Column(Integer, ForeignKey("doctor_profiles.id"))
     amount = Column(Numeric(12, 2), nullable=False)
     currency = Column(String(8), nullable=False, server_default="UZS")
     status = Column(String(32), nullable=False, server_default="pending")
     created_at = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
 
     user = relationship("User")
+
+    __table_args__ = (
+        Index("uq_payments_provider_idempotency", "provider", "idempotency_key", unique=True),
+    )
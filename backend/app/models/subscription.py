@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, text
+from sqlalchemy import Column, Integer, Boolean, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 
@@ -14,3 +14,14 @@ class Subscription(Base):
 
     patient = relationship("PatientProfile", back_populates="subscriptions")
     doctor = relationship("DoctorProfile", back_populates="subscriptions")
+
+    # проверка доступа: только действующие подписки; expires_at в индексе,
+    # т.к. now() в предикат частичного индекса не положить
+    __table_args__ = (
+        Index(
+            "ix_subscriptions_active_patient_doctor",
+            "patient_id", "doctor_id", "expires_at",
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active"),
+        ),
+    )
@@ -1,5 +1,5 @@
 # backend/app/models/user.py
-from sqlalchemy import Column, Integer, String, Enum
+from sqlalchemy import Column, Integer, String, Enum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -40,6 +40,14 @@ class User(Base):
         cascade="all, delete-orphan",
     )
 
+    # Профиль пациента (создаётся при первой записи к врачу)
+    patient_profile = relationship(
+        "PatientProfile",
+        back_populates="user",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
+
     # НОВОЕ: связи для токенов — строго через back_populates
     refresh_tokens = relationship(
         "RefreshToken",
@@ -55,5 +63,10 @@ class User(Base):
         passive_deletes=True,
     )
 
+    __table_args__ = (
+        # фильтр по роли + keyset по id в админке
+        Index("ix_users_role_id", "role", "id"),
+    )
+
     def __repr__(self) -> str:
         return f"<User id={self.id} email={self.email!r} role={self.role}>"
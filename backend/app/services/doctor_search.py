@@ -0,0 +1,39 @@
+# app/services/doctor_search.py
+"""
+Выражения полнотекстового поиска по врачам и клиникам.
+
+Текст выражений должен совпадать с индексами из миграции
+20251102_doctor_search (иначе планировщик не подставит expression-индекс) —
+меняя их здесь, добавляй миграцию с новыми индексами.
+Конфигурация 'simple': без стемминга, одинаково для русского/узбекского/латиницы.
+"""
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+DOCTOR_TSV = "to_tsvector('simple'::regconfig, coalesce(title, ''))"
+CLINIC_TSV = (
+    "to_tsvector('simple'::regconfig, "
+    "coalesce(name, '') || ' ' || coalesce(address, '') || ' ' || coalesce(description, ''))"
+)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def prefix_tsquery(q: str) -> Optional[str]:
+    """'карди ташк' -> 'карди:* & ташк:*' (каждое слово — префикс). None — слов нет."""
+    words = _WORD.findall(q.lower())
+    if not words:
+        return None
+    return " & ".join(f"{w}:*" for w in words)
+
+
+# '!' вместо '\\': обратный слэш в ESCAPE зависит от standard_conforming_strings
+LIKE_ESCAPE = "!"
+
+
+def like_pattern(q: str) -> str:
+    """Подстрока для ILIKE (по GIN gin_trgm_ops) с экранированием спецсимволов."""
+    escaped = q.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
@@ -0,0 +1,90 @@
+# app/services/entitlements.py
+"""
+Доступ пациента к материалам врача по действующим подпискам.
+
+Набор «врач -> до какого момента доступ» грузится одним запросом по
+частичному индексу ix_subscriptions_active_patient_doctor и кэшируется в
+процессе по user_id пациента (пустой набор тоже кэшируется: не-подписчиков
+большинство). Срок действия хранится рядом, поэтому подписка, истёкшая
+внутри TTL, перестаёт действовать сразу. После изменения подписок вызывать
+invalidate_entitlements(); в соседних воркерах устаревание ограничено TTL.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.patient_profile import PatientProfile
+from app.models.subscription import Subscription
+
+# doctor_id -> expires_at (naive UTC, как в subscriptions) | None — бессрочно
+Entitlements = Dict[int, Optional[datetime]]
+
+entitlement_cache: TTLCache[int, Entitlements] = TTLCache(
+    maxsize=settings.ENTITLEMENT_CACHE_MAXSIZE,
+    ttl=settings.ENTITLEMENT_CACHE_TTL_SEC,
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # subscriptions.* — timestamp без зоны
+
+
+async def load_entitlements(db: AsyncSession, user_id: int) -> Entitlements:
+    cached = entitlement_cache.get(user_id)
+    if cached is not None:
+        return cached
+    rows = await db.execute(
+        select(Subscription.doctor_id, Subscription.expires_at)
+        .join(PatientProfile, PatientProfile.id == Subscription.patient_id)
+        .where(
+            PatientProfile.user_id == user_id,
+            Subscription.is_active,  # ровно предикат частичного индекса
+            or_(Subscription.expires_at.is_(None), Subscription.expires_at > _utcnow()),
+        )
+    )
+    entitlements: Entitlements = {}
+    for doctor_id, expires_at in rows:
+        # несколько подписок на одного врача: берём самую долгую
+        if doctor_id in entitlements:
+            current = entitlements[doctor_id]
+            if current is None or (expires_at is not None and expires_at <= current):
+                continue
+        entitlements[doctor_id] = expires_at
+    entitlement_cache.set(user_id, entitlements)
+    return entitlements
+
+
+def _active(entitlements: Entitlements, doctor_id: int, now: datetime) -> bool:
+    if doctor_id not in entitlements:
+        return False
+    expires_at = entitlements[doctor_id]
+    return expires_at is None or expires_at > now
+
+
+async def entitled_doctor_ids(db: AsyncSession, user_id: int) -> Set[int]:
+    entitlements = await load_entitlements(db, user_id)
+    now = _utcnow()
+    return {d for d in entitlements if _active(entitlements, d, now)}
+
+
+async def can_view(db: AsyncSession, user_id: int, doctor_id: int) -> bool:
+    return _active(await load_entitlements(db, user_id), doctor_id, _utcnow())
+
+
+async def filter_entitled(db: AsyncSession, user_id: int, doctor_ids: Iterable[int]) -> Set[int]:
+    """Пакетная проверка (авторы страницы ленты): не больше одного запроса на всю пачку."""
+    entitlements = await load_entitlements(db, user_id)
+    now = _utcnow()
+    return {d for d in set(doctor_ids) if _active(entitlements, d, now)}
+
+
+def invalidate_entitlements(user_id: Optional[int]) -> None:
+    """Вызывать после создания/продления/отмены подписки пациента."""
+    if user_id is not None:
+        entitlement_cache.pop(user_id)
@@ -0,0 +1,107 @@
+# app/services/jwt_keygen.py
+"""
+Ключи для асимметричной подписи JWT (JWT_KEYS_DIR, см. app/core/jwt_keys.py).
+
+    python -m app.services.jwt_keygen --alg RS256 --dir keys           # новый ключ, kid = ГГГГММДД-xxxx
+    python -m app.services.jwt_keygen --dir keys --retire 20251201-1a2b # оставить только публичную часть
+    python -m app.services.jwt_keygen --dir keys --list
+
+Без --alg алгоритм определяется по ключам каталога (RSA -> RS256, EC -> ES*
+по кривой), для пустого каталога — RS256.
+
+kid начинается с даты, поэтому «последний по имени» = самый новый: без
+JWT_ACTIVE_KID подписывает он. Приватные ключи пишутся с правами 0600.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import secrets
+from datetime import datetime, timezone
+from typing import Tuple
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+
+from app.core.jwt_keys import PUBLIC_SUFFIX, load_keyring, pem_algs
+
+_CURVES = {"ES256": ec.SECP256R1, "ES384": ec.SECP384R1, "ES512": ec.SECP521R1}
+
+
+def generate(alg: str, rsa_bits: int = 2048):
+    alg = alg.upper()
+    if alg.startswith("RS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits)
+    if alg in _CURVES:
+        return ec.generate_private_key(_CURVES[alg]())
+    raise SystemExit(f"unsupported algorithm {alg!r} (RS256/384/512, ES256/384/512)")
+
+
+def new_kid() -> str:
+    return f"{datetime.now(timezone.utc):%Y%m%d}-{secrets.token_hex(2)}"
+
+
+def write_private(keys_dir: str, kid: str, key) -> str:
+    os.makedirs(keys_dir, exist_ok=True)
+    path = os.path.join(keys_dir, f"{kid}.pem")
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(pem)
+    return path
+
+
+def retire(keys_dir: str, kid: str) -> str:
+    """<kid>.pem -> <kid>.pub.pem: ключ больше не подписывает, но ещё проверяет."""
+    src = os.path.join(keys_dir, f"{kid}.pem")
+    with open(src, "rb") as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+    dst = os.path.join(keys_dir, f"{kid}{PUBLIC_SUFFIX}")
+    with open(dst, "wb") as f:
+        f.write(key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ))
+    os.remove(src)
+    return dst
+
+
+def dir_algs(keys_dir: str) -> Tuple[str, ...]:
+    """Алгоритмы, подходящие ключам каталога (по первому ключу); () — ключей нет."""
+    if not os.path.isdir(keys_dir):
+        return ()
+    for name in sorted(os.listdir(keys_dir)):
+        if name.endswith(".pem"):
+            with open(os.path.join(keys_dir, name), "rb") as f:
+                return pem_algs(f.read(), public=name.endswith(PUBLIC_SUFFIX))
+    return ()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate, retire or list JWT signing keys.")
+    parser.add_argument("--dir", required=True, help="JWT_KEYS_DIR")
+    parser.add_argument("--alg", default=None, help="default: from keys in --dir, RS256 for an empty dir")
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    parser.add_argument("--kid", default=None, help="default: YYYYMMDD-<random>")
+    parser.add_argument("--retire", metavar="KID", default=None)
+    parser.add_argument("--list", action="store_true")
+    args = parser.parse_args()
+
+    existing = dir_algs(args.dir)
+    alg = args.alg.upper() if args.alg else (existing[0] if existing else "RS256")
+    if existing and alg not in existing:
+        raise SystemExit(f"keys in {args.dir} are {'/'.join(existing)}, not {alg}")
+
+    if args.retire:
+        print(retire(args.dir, args.retire))
+    elif not args.list:
+        kid = args.kid or new_kid()
+        print(write_private(args.dir, kid, generate(alg, args.rsa_bits)))
+    try:
+        ring = load_keyring(alg, keys_dir=args.dir)
+    except RuntimeError as e:
+        raise SystemExit(f"error: {e}")
+    print(f"alg={ring.alg} signing (latest)={ring.signing_kid} published={', '.join(ring.kids)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# app/services/kdf_calibrate.py
+"""
+Подбор стоимости KDF паролей под целевую латентность логина.
+
+Меряем хеширование так же, как его выполняет API: пул из
+PASSWORD_HASH_WORKERS воркеров (thread/process по PASSWORD_HASH_EXECUTOR),
+на который одновременно приходят --concurrency логинов. Латентность считаем
+от постановки в очередь до результата, то есть вместе с ожиданием свободного
+воркера. Бюджет KDF равен --target-ms * --kdf-share (остальное уходит на
+SELECT пользователя, INSERT refresh и сеть).
+
+Алгоритм:
+  1. пробный замер на текущей стоимости (PASSWORD_HASH_ROUNDS или значение
+     passlib по умолчанию);
+  2. экстраполяция: для pbkdf2 время растёт линейно от rounds, для bcrypt —
+     как 2**rounds;
+  3. проверочный замер; пока p99 выше бюджета, стоимость снижается на 10%
+     (для bcrypt — на единицу).
+
+    python -m app.services.kdf_calibrate --target-ms 250 --concurrency 8
+
+Результат — JSON с замерами и строкой для .env. Уже сохранённые хеши менять
+не нужно: после смены PASSWORD_HASH_ROUNDS они перехешируются при логине.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from passlib.context import CryptContext
+from passlib.registry import get_crypt_handler
+
+from app.core.config import settings
+from app.core.security import build_password_context
+
+MAX_STEPS = 8
+
+
+@lru_cache(maxsize=16)
+def _context(scheme: str, rounds: int) -> CryptContext:
+    return build_password_context(scheme, rounds)
+
+
+def _hash_once(scheme: str, rounds: int) -> float:
+    """Выполняется внутри воркера; возвращает момент окончания."""
+    _context(scheme, rounds).hash("calibration-password")
+    return time.monotonic()
+
+
+def _percentile(values: List[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p * len(ordered)) - 1))]
+
+
+def measure(executor: Executor, scheme: str, rounds: int, samples: int, concurrency: int) -> Dict[str, Any]:
+    """samples хешей волнами по concurrency одновременных запросов."""
+    _hash_once(scheme, rounds)  # прогрев (и сборка контекста в этом процессе)
+    latencies: List[float] = []
+    while len(latencies) < samples:
+        wave = min(concurrency, samples - len(latencies))
+        submitted = time.monotonic()
+        futures = [executor.submit(_hash_once, scheme, rounds) for _ in range(wave)]
+        wait(futures)
+        latencies.extend((f.result() - submitted) * 1000 for f in futures)
+    return {
+        "rounds": rounds,
+        "p50_ms": round(_percentile(latencies, 0.50), 2),
+        "p99_ms": round(_percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2),
+    }
+
+
+def _extrapolate(rounds: int, p99_ms: float, budget_ms: float, log2_cost: bool, min_rounds: int) -> int:
+    ratio = budget_ms / max(p99_ms, 1e-3)
+    if log2_cost:
+        return max(min_rounds, rounds + math.floor(math.log2(ratio)))
+    return max(min_rounds, int(rounds * ratio))
+
+
+def _step_down(rounds: int, log2_cost: bool, min_rounds: int) -> int:
+    return max(min_rounds, rounds - 1 if log2_cost else int(rounds * 0.9))
+
+
+def calibrate(
+    target_ms: float,
+    kdf_share: float = 0.5,
+    concurrency: int | None = None,
+    samples: int = 200,
+    scheme: str | None = None,
+) -> Dict[str, Any]:
+    scheme = scheme or settings.PASSWORD_SCHEMES.split(",")[0].strip()
+    handler = get_crypt_handler(scheme)
+    if "rounds" not in getattr(handler, "setting_kwds", ()):
+        raise SystemExit(f"scheme {scheme!r} has no configurable cost")
+    log2_cost = getattr(handler, "rounds_cost", "linear") == "log2"
+    min_rounds = int(handler.min_rounds)
+    workers = max(1, settings.PASSWORD_HASH_WORKERS)
+    concurrency = max(1, concurrency or workers)
+    budget_ms = target_ms * kdf_share
+
+    if settings.PASSWORD_HASH_EXECUTOR.lower() == "process":
+        executor: Executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="kdfcal")
+
+    runs: List[Dict[str, Any]] = []
+    try:
+        probe = measure(executor, scheme, int(settings.PASSWORD_HASH_ROUNDS or handler.default_rounds), samples, concurrency)
+        runs.append(probe)
+        rounds = _extrapolate(probe["rounds"], probe["p99_ms"], budget_ms, log2_cost, min_rounds)
+        for _ in range(MAX_STEPS):
+            run = measure(executor, scheme, rounds, samples, concurrency)
+            runs.append(run)
+            if run["p99_ms"] <= budget_ms or rounds == min_rounds:
+                break
+            rounds = _step_down(rounds, log2_cost, min_rounds)
+    finally:
+        executor.shutdown()
+
+    result = runs[-1]
+    return {
+        "scheme": scheme,
+        "executor": settings.PASSWORD_HASH_EXECUTOR,
+        "workers": workers,
+        "concurrency": concurrency,
+        "target_ms": target_ms,
+        "kdf_budget_ms": round(budget_ms, 2),
+        "runs": runs,
+        "recommended_rounds": result["rounds"],
+        "fits": result["p99_ms"] <= budget_ms,
+        "env": f"PASSWORD_HASH_ROUNDS={result['rounds']}",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recommend password KDF cost for a target p99 login latency.")
+    parser.add_argument("--target-ms", type=float, required=True, help="target p99 of /auth/login, ms")
+    parser.add_argument("--kdf-share", type=float, default=0.5, help="share of the target spent in KDF (0..1)")
+    parser.add_argument("--concurrency", type=int, default=None, help="concurrent logins (default: PASSWORD_HASH_WORKERS)")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--scheme", default=None, help="default: first of PASSWORD_SCHEMES")
+    args = parser.parse_args()
+    if not 0 < args.kdf_share <= 1:
+        parser.error("--kdf-share must be in (0, 1]")
+    print(json.dumps(
+        calibrate(args.target_ms, args.kdf_share, args.concurrency, args.samples, args.scheme),
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    main()
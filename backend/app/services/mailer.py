@@ -0,0 +1,206 @@
+# app/services/mailer.py
+"""
+Отправка писем из email_outbox.
+
+Запрос только вставляет строку. Диспетчер работает так:
+  1. «арендует» пачку одним UPDATE ... RETURNING: сдвигает available_at на
+     MAIL_LEASE_SEC и увеличивает attempts (в Postgres выборка под
+     FOR UPDATE SKIP LOCKED). Транзакция сразу коммитится, и SMTP её не держит;
+  2. отправляет письма параллельно, не больше MAIL_CONCURRENCY SMTP-сессий
+     (smtplib в потоках);
+  3. вторым коротким запросом удаляет отправленные, а неудачным пишет
+     ошибку и паузу.
+Если воркер упал посреди отправки, письмо вернётся в очередь по истечении
+аренды (at-least-once).
+
+Запуск:
+  - в процессе API — фоновой задачей (Settings.MAIL_DISPATCH_INTERVAL_SEC > 0);
+  - из CLI:  python -m app.services.mailer [--loop]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import smtplib
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, delete, select, update
+
+from app.core.config import settings
+from app.db.dialect import dialect_name
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+MAX_BACKOFF_SEC = 3600
+
+
+@dataclass(frozen=True, slots=True)
+class Mail:
+    id: int
+    to_addr: str
+    subject: str
+    body: str
+
+
+def password_reset_message(token: str) -> Tuple[str, str]:
+    link = settings.PASSWORD_RESET_URL.format(token=token)
+    body = (
+        "Вы запросили сброс пароля в MedPlatform.\n\n"
+        f"Ссылка действует {settings.RESET_TOKEN_EXPIRES_MIN} мин:\n{link}\n\n"
+        "Если это были не вы — просто проигнорируйте письмо.\n"
+    )
+    return "Сброс пароля", body
+
+
+# ======== Транспорт ========
+
+def _build(mail: Mail) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = settings.MAIL_FROM
+    msg["To"] = mail.to_addr
+    msg["Subject"] = mail.subject
+    msg.set_content(mail.body)
+    return msg
+
+
+def _send_smtp(mail: Mail) -> None:
+    with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=settings.SMTP_TIMEOUT_SEC) as smtp:
+        if settings.SMTP_STARTTLS:
+            smtp.starttls()
+        if settings.SMTP_USER:
+            smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+        smtp.send_message(_build(mail))
+
+
+async def deliver(mail: Mail) -> None:
+    if settings.MAIL_BACKEND == "smtp":
+        await asyncio.to_thread(_send_smtp, mail)
+    else:
+        logger.info("[mail] to=%s subject=%s\n%s", mail.to_addr, mail.subject, mail.body)
+
+
+# ======== Диспетчер ========
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAX_BACKOFF_SEC, 5 * 2 ** attempts))
+
+
+async def _lease(batch_size: int, now: datetime) -> List[Tuple[Mail, int]]:
+    async with AsyncSessionLocal() as db:
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.available_at <= now, EmailOutbox.attempts < settings.MAIL_MAX_ATTEMPTS)
+            .order_by(EmailOutbox.available_at, EmailOutbox.id)
+            .limit(batch_size)
+        )
+        if dialect_name(db) == "postgresql":
+            due = due.with_for_update(skip_locked=True)
+        rows = (
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    available_at=now + timedelta(seconds=settings.MAIL_LEASE_SEC),
+                    attempts=EmailOutbox.attempts + 1,
+                )
+                .returning(EmailOutbox.id, EmailOutbox.to_addr, EmailOutbox.subject, EmailOutbox.body, EmailOutbox.attempts)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+        await db.commit()
+    return [(Mail(r.id, r.to_addr, r.subject, r.body), r.attempts) for r in rows]
+
+
+async def dispatch_batch(batch_size: Optional[int] = None) -> Dict[str, int]:
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    leased = await _lease(batch_size, now)
+    if not leased:
+        return {"leased": 0, "sent": 0, "failed": 0}
+
+    limit = asyncio.Semaphore(max(1, settings.MAIL_CONCURRENCY))
+
+    async def send(mail: Mail) -> Optional[str]:
+        async with limit:
+            try:
+                await deliver(mail)
+                return None
+            except Exception as e:
+                logger.warning("mail %s to %s failed", mail.id, mail.to_addr, exc_info=True)
+                return f"{type(e).__name__}: {e}"[:1000]
+
+    errors = await asyncio.gather(*(send(mail) for mail, _ in leased))
+
+    sent = [mail.id for (mail, _), err in zip(leased, errors) if err is None]
+    failed = [(mail.id, attempts, err) for (mail, attempts), err in zip(leased, errors) if err is not None]
+    async with AsyncSessionLocal() as db:
+        if sent:
+            await db.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(sent)))
+        if failed:
+            done = datetime.now(timezone.utc)
+            await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_([f[0] for f in failed]))
+                .values(
+                    available_at=case({i: done + _backoff(a) for i, a, _ in failed}, value=EmailOutbox.id),
+                    last_error=case({i: e for i, _, e in failed}, value=EmailOutbox.id),
+                )
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
+    return {"leased": len(leased), "sent": len(sent), "failed": len(failed)}
+
+
+async def dispatch(batch_size: Optional[int] = None, max_batches: int = 100) -> Dict[str, int]:
+    batch_size = batch_size or settings.MAIL_BATCH_SIZE
+    total = {"sent": 0, "failed": 0}
+    for _ in range(max_batches):
+        res = await dispatch_batch(batch_size)
+        total["sent"] += res["sent"]
+        total["failed"] += res["failed"]
+        if res["leased"] < batch_size:
+            break
+    return total
+
+
+async def run_forever(interval_sec: float) -> None:
+    """Фоновая задача для lifespan приложения."""
+    while True:
+        try:
+            result = await dispatch()
+            if result["sent"] or result["failed"]:
+                logger.info("mailer: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("mail dispatch failed")
+        await asyncio.sleep(interval_sec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send queued emails from email_outbox.")
+    parser.add_argument("--loop", action="store_true", help="run forever with MAIL_DISPATCH_INTERVAL_SEC pause")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _run() -> None:
+        try:
+            if args.loop:
+                await run_forever(max(0.1, settings.MAIL_DISPATCH_INTERVAL_SEC))
+            else:
+                print(await dispatch(batch_size=args.batch_size))
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
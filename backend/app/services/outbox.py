@@ -0,0 +1,171 @@
+# app/services/outbox.py
+"""
+Воркер транзакционного outbox.
+
+Событие (OutboxEvent) пишется в той же транзакции, что и бизнес-изменение.
+Воркер забирает пачку (в Postgres FOR UPDATE SKIP LOCKED, поэтому несколько
+воркеров не мешают друг другу) и выполняет обработчик темы. Каждое событие
+выполняется в своём SAVEPOINT, и ошибка одного не откатывает пачку. Успешные
+события удаляются в той же транзакции, что и их эффекты. Неудачные
+откладываются с экспоненциальной паузой.
+
+Обработчик может вернуть callback. Он вызывается после COMMIT; там
+инвалидируют кэши процесса.
+
+Запуск:
+  - в процессе API — фоновой задачей (Settings.OUTBOX_INTERVAL_SEC > 0);
+  - из CLI:  python -m app.services.outbox [--loop]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import dialect_name
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+AfterCommit = Optional[Callable[[], None]]
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[AfterCommit]]
+
+# модули, регистрирующие обработчики (@handler) — импортируются лениво
+HANDLER_MODULES = ("app.services.payments",)
+
+_handlers: Dict[str, Handler] = {}
+_loaded = False
+
+MAX_BACKOFF_SEC = 3600
+
+
+def handler(topic: str):
+    def decorator(fn: Handler) -> Handler:
+        _handlers[topic] = fn
+        return fn
+    return decorator
+
+
+def _load_handlers() -> None:
+    global _loaded
+    if not _loaded:
+        for module in HANDLER_MODULES:
+            importlib.import_module(module)
+        _loaded = True
+
+
+def enqueue(db: AsyncSession, topic: str, payload: Dict[str, Any]) -> None:
+    """Событие в текущей транзакции (уйдёт вместе с её COMMIT)."""
+    db.add(OutboxEvent(topic=topic, payload=payload))
+
+
+def _backoff(attempts: int) -> timedelta:
+    return timedelta(seconds=min(MAX_BACKOFF_SEC, 2 ** attempts))
+
+
+async def drain_batch(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Одна пачка — одна транзакция."""
+    _load_handlers()
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    done: List[int] = []
+    callbacks: List[Callable[[], None]] = []
+    failed = 0
+
+    async with AsyncSessionLocal() as db:
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.available_at <= now, OutboxEvent.attempts < settings.OUTBOX_MAX_ATTEMPTS)
+            .order_by(OutboxEvent.available_at, OutboxEvent.id)
+            .limit(batch_size)
+        )
+        if dialect_name(db) == "postgresql":
+            stmt = stmt.with_for_update(skip_locked=True)
+        events = (await db.scalars(stmt)).all()
+
+        for event in events:
+            fn = _handlers.get(event.topic)
+            try:
+                if fn is None:
+                    raise LookupError(f"no outbox handler for topic {event.topic!r}")
+                async with db.begin_nested():
+                    callback = await fn(db, dict(event.payload))
+                done.append(event.id)
+                if callback is not None:
+                    callbacks.append(callback)
+            except Exception as e:
+                failed += 1
+                event.attempts += 1
+                event.available_at = now + _backoff(event.attempts)
+                event.last_error = f"{type(e).__name__}: {e}"[:1000]
+                logger.warning("outbox event %s (%s) failed, attempt %s", event.id, event.topic, event.attempts, exc_info=True)
+
+        if done:
+            await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(done)))
+        await db.commit()
+
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("outbox after-commit callback failed")
+    return {"fetched": len(events), "processed": len(done), "failed": failed}
+
+
+async def drain(batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> Dict[str, int]:
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    max_batches = max_batches or settings.OUTBOX_MAX_BATCHES
+    total = {"processed": 0, "failed": 0}
+    for _ in range(max_batches):
+        res = await drain_batch(batch_size)
+        total["processed"] += res["processed"]
+        total["failed"] += res["failed"]
+        if res["fetched"] < batch_size:
+            break
+    return total
+
+
+async def run_forever(interval_sec: float) -> None:
+    """Фоновая задача для lifespan приложения."""
+    while True:
+        try:
+            result = await drain()
+            if result["processed"] or result["failed"]:
+                logger.info("outbox: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("outbox drain failed")
+        await asyncio.sleep(interval_sec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process transactional outbox events.")
+    parser.add_argument("--loop", action="store_true", help="run forever with OUTBOX_INTERVAL_SEC pause")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _run() -> None:
+        try:
+            if args.loop:
+                await run_forever(max(0.1, settings.OUTBOX_INTERVAL_SEC))
+            else:
+                print(await drain(batch_size=args.batch_size, max_batches=args.max_batches))
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# app/services/patients.py
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.dialect import upsert_insert
+from app.models.patient_profile import PatientProfile
+
+
+async def ensure_patient_profile(db: AsyncSession, user_id: int) -> int:
+    """Профиль пациента создаётся при первой записи/оплате; гонку решает ON CONFLICT."""
+    profile_id = await db.scalar(
+        upsert_insert(db, PatientProfile)
+        .values(user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[PatientProfile.user_id])
+        .returning(PatientProfile.id)
+    )
+    if profile_id is None:
+        profile_id = await db.scalar(select(PatientProfile.id).where(PatientProfile.user_id == user_id))
+    return profile_id
@@ -0,0 +1,134 @@
+# app/services/payments.py
+"""
+Приём платёжных вебхуков и отложенные эффекты оплаты.
+
+Провайдеры повторяют вебхук, пока не получат 2xx, иногда десятками раз.
+Приём — один INSERT ... ON CONFLICT (provider, idempotency_key):
+  - первая доставка вставляет платёж;
+  - повтор с тем же статусом — no-op (DO UPDATE ... WHERE не срабатывает);
+  - переход pending -> succeeded/failed обновляет строку ровно один раз.
+Только реальный переход порождает событие outbox (в Postgres — тем же
+оператором через data-modifying CTE). Активация подписки и уведомления идут
+в воркере, поэтому время ответа вебхука не зависит от шторма ретраев.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, insert, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.dialect import dialect_name, upsert_insert
+from app.models.outbox import OutboxEvent
+from app.models.payment import Payment
+from app.models.subscription import Subscription
+from app.services import outbox
+from app.services.entitlements import invalidate_entitlements
+from app.services.patients import ensure_patient_profile
+
+logger = logging.getLogger(__name__)
+
+
+def _upsert(db: AsyncSession, values: Dict[str, Any]):
+    ins = upsert_insert(db, Payment).values(**values)
+    return ins.on_conflict_do_update(
+        index_elements=[Payment.provider, Payment.idempotency_key],
+        set_={"status": ins.excluded.status},
+        # статус меняется только из pending; повторы и откаты назад — no-op
+        where=and_(Payment.status == "pending", ins.excluded.status != "pending"),
+    ).returning(Payment.id, Payment.user_id, Payment.doctor_id, Payment.status)
+
+
+async def record_webhook(
+    db: AsyncSession,
+    provider: str,
+    transaction_id: str,
+    status: str,
+    user_id: int,
+    amount: Decimal,
+    currency: str,
+    doctor_id: Optional[int] = None,
+) -> None:
+    """Идемпотентная запись платежа + событие outbox при смене статуса. COMMIT — за вызывающим."""
+    values = dict(
+        provider=provider,
+        idempotency_key=transaction_id,
+        user_id=user_id,
+        doctor_id=doctor_id,
+        amount=amount,
+        currency=currency,
+        status=status,
+    )
+    if dialect_name(db) == "postgresql":
+        changed = _upsert(db, values).cte("changed")
+        event = (
+            insert(OutboxEvent)
+            .from_select(
+                ["topic", "payload"],
+                select(
+                    literal_column("'payment.'").op("||")(changed.c.status),
+                    # ключи — литералы SQL: json_build_object(VARIADIC "any")
+                    # не выводит тип у нетипизированных параметров
+                    func.json_build_object(
+                        literal_column("'payment_id'"), changed.c.id,
+                        literal_column("'user_id'"), changed.c.user_id,
+                        literal_column("'doctor_id'"), changed.c.doctor_id,
+                        literal_column("'status'"), changed.c.status,
+                    ),
+                ).where(changed.c.status != "pending"),
+            )
+            .add_cte(changed)
+        )
+        await db.execute(event)
+        return
+
+    # dev/SQLite: без data-modifying CTE — два оператора в одной транзакции
+    row = (await db.execute(_upsert(db, values))).first()
+    if row is not None and row.status != "pending":
+        outbox.enqueue(
+            db,
+            f"payment.{row.status}",
+            {"payment_id": row.id, "user_id": row.user_id, "doctor_id": row.doctor_id, "status": row.status},
+        )
+
+
+# ======== Обработчики outbox ========
+
+@outbox.handler("payment.succeeded")
+async def activate_subscription(db: AsyncSession, payload: Dict[str, Any]):
+    """Подписка на врача: новая или продление действующей на SUBSCRIPTION_PERIOD_DAYS."""
+    user_id, doctor_id = payload["user_id"], payload.get("doctor_id")
+    logger.info("payment %s succeeded for user %s", payload["payment_id"], user_id)
+    if doctor_id is None:
+        return None
+    patient_id = await ensure_patient_profile(db, user_id)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)  # subscriptions.* — timestamp без зоны
+    period = timedelta(days=settings.SUBSCRIPTION_PERIOD_DAYS)
+
+    current = await db.scalar(
+        select(Subscription)
+        .where(
+            Subscription.patient_id == patient_id,
+            Subscription.doctor_id == doctor_id,
+            Subscription.is_active,
+        )
+        .order_by(Subscription.expires_at.desc().nulls_first())
+        .limit(1)
+        .with_for_update()
+    )
+    if current is None:
+        db.add(Subscription(patient_id=patient_id, doctor_id=doctor_id, is_active=True, started_at=now, expires_at=now + period))
+    elif current.expires_at is not None:
+        current.expires_at = max(current.expires_at, now) + period
+    await db.flush()
+    return lambda: invalidate_entitlements(user_id)
+
+
+@outbox.handler("payment.failed")
+async def notify_payment_failed(db: AsyncSession, payload: Dict[str, Any]):
+    logger.info("payment %s failed for user %s", payload["payment_id"], payload["user_id"])
+    return None
@@ -0,0 +1,100 @@
+# app/services/slots.py
+"""
+Свободные слоты врача: рабочие окна минус занятые интервалы.
+
+Всё считается в памяти за один проход по отсортированным спискам
+(O(windows + busy + slots)); из БД нужен только один запрос занятых
+интервалов на весь диапазон дат.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple
+from zoneinfo import ZoneInfo
+
+from app.core.config import settings
+
+Interval = Tuple[datetime, datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class WorkSchedule:
+    tz: ZoneInfo
+    start: time
+    end: time
+    days: FrozenSet[int]
+    slot: timedelta
+
+
+@lru_cache(maxsize=1)
+def schedule_from_settings() -> WorkSchedule:
+    return WorkSchedule(
+        tz=ZoneInfo(settings.APPOINTMENT_TZ),
+        start=time.fromisoformat(settings.APPOINTMENT_WORK_START),
+        end=time.fromisoformat(settings.APPOINTMENT_WORK_END),
+        days=frozenset(int(d) for d in settings.APPOINTMENT_WORK_DAYS.split(",") if d.strip()),
+        slot=timedelta(minutes=settings.APPOINTMENT_SLOT_MINUTES),
+    )
+
+
+def working_windows(day_from: date, day_to: date, schedule: WorkSchedule) -> List[Interval]:
+    """Рабочие окна [day_from, day_to] в UTC (локальное время клиники, с учётом DST)."""
+    windows: List[Interval] = []
+    day = day_from
+    while day <= day_to:
+        if day.weekday() in schedule.days:
+            start = datetime.combine(day, schedule.start, tzinfo=schedule.tz).astimezone(timezone.utc)
+            end = datetime.combine(day, schedule.end, tzinfo=schedule.tz).astimezone(timezone.utc)
+            if end > start:
+                windows.append((start, end))
+        day += timedelta(days=1)
+    return windows
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Склеивает пересекающиеся/смежные интервалы; вход должен быть отсортирован по началу."""
+    merged: List[Interval] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def free_slots(
+    windows: List[Interval],
+    busy: List[Interval],
+    slot: timedelta,
+    not_before: datetime | None = None,
+) -> List[Interval]:
+    """
+    Слоты длины slot на сетке каждого окна (09:00, 09:30, …), не пересекающиеся
+    с busy (отсортированные, склеенные). Два указателя: окна и занятость.
+    """
+    result: List[Interval] = []
+    i = 0
+    for w_start, w_end in windows:
+        t = w_start
+        if not_before is not None and not_before > t:
+            t = _align(w_start, not_before, slot)
+        while t + slot <= w_end:
+            # пропускаем занятость, закончившуюся до кандидата
+            while i < len(busy) and busy[i][1] <= t:
+                i += 1
+            if i < len(busy) and busy[i][0] < t + slot:
+                # кандидат пересекается — прыгаем на ближайшую точку сетки после занятости
+                t = _align(w_start, busy[i][1], slot)
+                continue
+            result.append((t, t + slot))
+            t += slot
+    return result
+
+
+def _align(origin: datetime, moment: datetime, slot: timedelta) -> datetime:
+    """Ближайшая точка сетки origin + k*slot, не раньше moment."""
+    steps = -(-(moment - origin) // slot)  # ceil
+    return origin + max(steps, 0) * slot
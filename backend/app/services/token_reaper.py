@@ -0,0 +1,196 @@
+# app/services/token_reaper.py
+"""
+Чистка refresh_tokens / password_reset_tokens.
+
+Удаляем просроченные и отозванные/использованные записи небольшими батчами
+(в Postgres — FOR UPDATE SKIP LOCKED, так что несколько воркеров не мешают
+друг другу и не блокируют /auth/refresh). Если refresh_tokens секционирована
+по expires_at (миграция 20251005_rt_partitioning), то заодно создаём секции
+наперёд и целиком удаляем секции, где все токены уже истекли.
+
+Запуск:
+  - в процессе API — фоновой задачей (Settings.TOKEN_REAPER_INTERVAL_SEC > 0);
+  - из CLI/cron:  python -m app.services.token_reaper [--loop]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import math
+from datetime import date, datetime, timezone
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.db.session import async_engine
+
+logger = logging.getLogger(__name__)
+
+# ключ advisory-lock, чтобы DDL по секциям делал только один воркер
+_PARTITION_LOCK_KEY = 0x7265_6170  # "reap"
+
+_DELETE_SQL = {
+    "refresh_tokens": "expires_at < :now OR revoked",
+    "password_reset_tokens": "expires_at < :now OR used",
+}
+
+
+def _batch_delete_sql(table: str, where: str, skip_locked: bool) -> str:
+    lock = " FOR UPDATE SKIP LOCKED" if skip_locked else ""
+    return (
+        f"DELETE FROM {table} WHERE id IN ("
+        f"SELECT id FROM {table} WHERE {where} ORDER BY id LIMIT :batch{lock})"
+    )
+
+
+async def _delete_batches(engine: AsyncEngine, table: str, batch_size: int, max_batches: int) -> int:
+    is_pg = engine.dialect.name == "postgresql"
+    stmt = text(_batch_delete_sql(table, _DELETE_SQL[table], skip_locked=is_pg))
+    total = 0
+    for _ in range(max_batches):
+        # каждый батч — своя короткая транзакция
+        async with engine.begin() as conn:
+            res = await conn.execute(stmt, {"now": datetime.now(timezone.utc), "batch": batch_size})
+        deleted = res.rowcount or 0
+        total += deleted
+        if deleted < batch_size:
+            break
+    return total
+
+
+# ======== Секции refresh_tokens ========
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"refresh_tokens_p{month:%Y%m}"
+
+
+async def _is_partitioned(conn: AsyncConnection) -> bool:
+    res = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'refresh_tokens'"
+        )
+    )
+    return res.first() is not None
+
+
+async def _list_partitions(conn: AsyncConnection) -> List[str]:
+    res = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = 'refresh_tokens'"
+        )
+    )
+    return [r[0] for r in res]
+
+
+async def maintain_partitions(engine: AsyncEngine) -> Dict[str, List[str]]:
+    """Создаёт секции на срок жизни refresh-токена вперёд и удаляет полностью истекшие."""
+    created: List[str] = []
+    dropped: List[str] = []
+    if engine.dialect.name != "postgresql":
+        return {"created": created, "dropped": dropped}
+
+    async with engine.begin() as conn:
+        if not await _is_partitioned(conn):
+            return {"created": created, "dropped": dropped}
+        got_lock = (await conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:k)"), {"k": _PARTITION_LOCK_KEY}
+        )).scalar()
+        if not got_lock:
+            return {"created": created, "dropped": dropped}
+
+        today = datetime.now(timezone.utc).date()
+        current = _month_start(today)
+        ahead = math.ceil(settings.REFRESH_EXPIRES_DAYS / 28) + 1
+        existing = set(await _list_partitions(conn))
+
+        for i in range(ahead + 1):
+            start = _add_months(current, i)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF refresh_tokens "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+            ))
+            created.append(name)
+
+        # секция за месяц M содержит только токены с expires_at < M+1 — после этого её можно дропать
+        for name in sorted(existing):
+            suffix = name.rsplit("_p", 1)[-1]
+            if not (name.startswith("refresh_tokens_p") and suffix.isdigit() and len(suffix) == 6):
+                continue  # default-секция и прочее не трогаем
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if _add_months(month, 1) <= today:
+                await conn.execute(text(f"ALTER TABLE refresh_tokens DETACH PARTITION {name}"))
+                await conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+    return {"created": created, "dropped": dropped}
+
+
+async def reap_tokens(
+    engine: AsyncEngine = async_engine,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> Dict[str, object]:
+    batch_size = batch_size or settings.TOKEN_REAPER_BATCH_SIZE
+    max_batches = max_batches or settings.TOKEN_REAPER_MAX_BATCHES
+
+    partitions = await maintain_partitions(engine)
+    result: Dict[str, object] = {"partitions": partitions}
+    for table in _DELETE_SQL:
+        result[table] = await _delete_batches(engine, table, batch_size, max_batches)
+    return result
+
+
+async def run_forever(interval_sec: float, engine: AsyncEngine = async_engine) -> None:
+    """Фоновая задача для lifespan приложения."""
+    while True:
+        try:
+            result = await reap_tokens(engine)
+            logger.info("token reaper: %s", result)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("token reaper failed")
+        await asyncio.sleep(interval_sec)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Delete expired/revoked auth tokens.")
+    parser.add_argument("--loop", action="store_true", help="run forever with TOKEN_REAPER_INTERVAL_SEC pause")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def _run() -> None:
+        try:
+            if args.loop:
+                await run_forever(max(1, settings.TOKEN_REAPER_INTERVAL_SEC))
+            else:
+                print(await reap_tokens(batch_size=args.batch_size, max_batches=args.max_batches))
+        finally:
+            await async_engine.dispose()
+
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
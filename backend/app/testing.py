@@ -0,0 +1,45 @@
+# app/testing.py
+"""
+pytest-плагин: бюджет SQL-запросов на эндпоинт.
+
+Подключение — в conftest.py:  pytest_plugins = ["app.testing"]
+(или pytest -p app.testing). Пример:
+
+    def test_feed(client, auth_headers, query_budget):
+        with query_budget(4):
+            r = client.get("/api/v1/content/feed", headers=auth_headers)
+        assert r.status_code == 200
+
+Тест падает, если внутри блока выполнено больше запросов, чем объявлено, или
+если какой-то SELECT повторился nplusone раз и больше (по умолчанию
+QUERY_DEBUG_NPLUSONE_THRESHOLD). В сообщении — формы запросов с числом
+повторов.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Iterator, Optional
+
+import pytest
+
+from app.core.config import settings
+from app.core.query_debug import QueryLog, track_queries
+
+QueryBudget = Callable[..., ContextManager[QueryLog]]
+
+
+@pytest.fixture
+def query_budget() -> QueryBudget:
+    @contextmanager
+    def budget(max_queries: int, nplusone: Optional[int] = None) -> Iterator[QueryLog]:
+        threshold = nplusone or settings.QUERY_DEBUG_NPLUSONE_THRESHOLD
+        with track_queries() as log:
+            yield log
+        if len(log) > max_queries:
+            pytest.fail(f"query budget exceeded: {len(log)} > {max_queries}\n{log.report()}", pytrace=False)
+        repeated = log.repeated(threshold)
+        if repeated:
+            shapes = "\n".join(f"  {n:>4} x {shape[:300]}" for shape, n in repeated)
+            pytest.fail(f"possible N+1 (>= {threshold} identical SELECTs):\n{shapes}", pytrace=False)
+
+    return budget
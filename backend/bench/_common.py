@@ -0,0 +1,120 @@
+# bench/_common.py
+"""
+Общие помощники для бенчмарков: нагрузка на ASGI-приложение in-process
+(httpx + ASGITransport), перцентили, отчёт в JSON.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies: Iterable[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    lat = sorted(latencies)
+    n = len(lat)
+    return {
+        "requests": n,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(n / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(lat, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(lat, 0.99) * 1000, 3),
+        "max_ms": round((lat[-1] if lat else 0.0) * 1000, 3),
+    }
+
+
+def parse_ints(raw: str) -> List[int]:
+    return [int(x) for x in raw.split(",") if x.strip()]
+
+
+def asgi_client(app, **kwargs) -> httpx.AsyncClient:
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", **kwargs)
+
+
+async def run_load(
+    call: Callable[[int], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int,
+    ok_status: Iterable[int] = (200,),
+) -> Dict[str, Any]:
+    """Гоняем `total` вызовов `call(i)` с ограничением параллелизма."""
+    ok = set(ok_status)
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            t0 = time.perf_counter()
+            try:
+                resp = await call(i)
+                good = resp.status_code in ok
+            except Exception:
+                good = False
+            dt = time.perf_counter() - t0
+            if good:
+                latencies.append(dt)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    result = summarize(latencies, time.perf_counter() - started, errors)
+    result["concurrency"] = concurrency
+    return result
+
+
+def micro(fn: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    """Микробенчмарк синхронной функции: латентность каждого вызова."""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def _git_rev() -> Optional[str]:
+    """GIT_REV из окружения, иначе текущий коммит (если запуск из git-дерева)."""
+    if os.getenv("GIT_REV"):
+        return os.getenv("GIT_REV")
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def write_report(name: str, results: Dict[str, Any], out: Optional[str]) -> None:
+    report = {
+        "benchmark": name,
+        "timestamp": int(time.time()),
+        "python": sys.version.split()[0],
+        "git_rev": _git_rev(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
@@ -0,0 +1,141 @@
+# bench/auth_load.py
+"""
+Нагрузка на горячие пути auth: /auth/login, /auth/refresh, /users/me —
+свип по конкуренции, rps и p50/p95/p99 в JSON.
+
+    python -m bench.auth_load --scenarios login,refresh,me --concurrency 1,8,32,64 --requests 500 --out auth.json
+
+Нужен DATABASE_URL на тестовую БД с применёнными миграциями (Postgres или
+SQLite как замена). Пользователи bench-auth-N@example.com создаются один раз
+(--users). Их хеш — с текущими настройками KDF, так что логин не
+перехеширует. Rate limit на время прогона выключен: весь трафик идёт с одного «IP».
+
+  - login   — логины по кругу пользователей (KDF в пуле хеширования, 503 при
+              переполнении пула считаются ошибками);
+  - refresh — ротация: у каждого «клиента» своя цепочка refresh-токенов;
+  - me      — /users/me с access-токеном; --cold-cache сбрасывает кэши
+              JWT и принципалов перед каждым запросом (путь с походом в БД).
+
+Перед каждым замером — --warmup запросов, которые в отчёт не идут.
+Сравнение двух ревизий:  python -m bench.compare base.json head.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+import httpx
+from sqlalchemy import select
+
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.principal import principal_cache
+from app.db.session import SessionLocal, async_engine
+from app.main import app
+from app.models.user import User
+
+from bench._common import asgi_client, parse_ints, run_load, write_report
+
+PASSWORD = "bench-pass"
+
+
+def email(i: int) -> str:
+    return f"bench-auth-{i}@example.com"
+
+
+def seed(users: int) -> None:
+    password_hash = security.get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        existing = set(db.scalars(select(User.email).where(User.email.like("bench-auth-%@example.com"))))
+        db.add_all(User(email=email(i), password_hash=password_hash) for i in range(users) if email(i) not in existing)
+        db.commit()
+
+
+async def _login(client: httpx.AsyncClient, i: int) -> httpx.Response:
+    return await client.post("/api/v1/auth/login", json={"email": email(i), "password": PASSWORD})
+
+
+async def _sessions(client: httpx.AsyncClient, n: int, users: int) -> List[Dict[str, str]]:
+    pairs = []
+    for i in range(n):
+        resp = await _login(client, i % users)
+        resp.raise_for_status()
+        pairs.append(resp.json())
+    return pairs
+
+
+async def scenario_login(client: httpx.AsyncClient, c: int, args: argparse.Namespace):
+    return lambda i: _login(client, i % args.users)
+
+
+async def scenario_refresh(client: httpx.AsyncClient, c: int, args: argparse.Namespace):
+    chains: asyncio.Queue = asyncio.Queue()
+    for pair in await _sessions(client, c, args.users):
+        chains.put_nowait(pair["refresh_token"])
+
+    async def call(i: int) -> httpx.Response:
+        token = await chains.get()
+        resp = await client.post("/api/v1/auth/refresh", json={"refresh_token": token})
+        if resp.status_code == 200:
+            chains.put_nowait(resp.json()["refresh_token"])
+        else:  # цепочка оборвалась — новый логин, чтобы не терять параллелизм
+            chains.put_nowait((await _sessions(client, 1, args.users))[0]["refresh_token"])
+        return resp
+
+    return call
+
+
+async def scenario_me(client: httpx.AsyncClient, c: int, args: argparse.Namespace):
+    tokens = [p["access_token"] for p in await _sessions(client, min(c, args.users), args.users)]
+
+    async def call(i: int) -> httpx.Response:
+        if args.cold_cache:
+            security._decode_cache.clear()
+            principal_cache.clear()
+        return await client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+
+    return call
+
+
+SCENARIOS = {"login": scenario_login, "refresh": scenario_refresh, "me": scenario_me}
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.RATE_LIMIT_ENABLED = False
+    seed(args.users)
+    results: Dict[str, Any] = {
+        "params": {
+            "dialect": async_engine.dialect.name,
+            "users": args.users,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "cold_cache": args.cold_cache,
+            "db_pool_size": settings.DB_POOL_SIZE,
+            "password_hash_workers": settings.PASSWORD_HASH_WORKERS,
+            "password_hash_rounds": settings.PASSWORD_HASH_ROUNDS,
+        },
+    }
+    async with asgi_client(app) as client:
+        for name in args.scenarios.split(","):
+            results[name] = []
+            for c in parse_ints(args.concurrency):
+                call = await SCENARIOS[name](client, c, args)
+                if args.warmup:
+                    await run_load(call, args.warmup, c)
+                results[name].append(await run_load(call, args.requests, c))
+    results["password_hasher"] = password_hasher.stats()
+    write_report("auth_load", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="login,refresh,me")
+    parser.add_argument("--concurrency", default="1,8,32,64")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--cold-cache", action="store_true")
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+# bench/auth_micro.py
+"""
+Микробенчмарки горячих функций auth (без БД и HTTP).
+
+    python -m bench.auth_micro --iterations 20000 --repeats 5 --out auth_micro.json
+
+Каждая функция: прогрев, затем --repeats прогонов по --iterations вызовов;
+в отчёт идёт медианный по p50 прогон (устойчивее к шуму соседей по машине).
+decode_token меряется дважды: из кэша проверенных JWT и «холодным» (кэш
+сбрасывается перед каждым вызовом — полная проверка подписи). KDF
+(verify_password) на порядки медленнее остального, поэтому итераций у него
+в --kdf-divisor раз меньше.
+
+Сравнение двух ревизий:  python -m bench.compare base.json head.json
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Any, Callable, Dict, List
+
+from app.api.v1.deps import _to_role_name
+from app.core import security
+from app.core.config import settings
+from app.core.deps import _role_to_str
+from app.models.user import UserRole
+
+from bench._common import micro, write_report
+
+EMAIL = "bench-micro@example.com"
+
+
+def _median_run(fn: Callable[[], Any], iterations: int, repeats: int) -> Dict[str, Any]:
+    micro(fn, max(1, iterations // 10))  # прогрев
+    runs: List[Dict[str, Any]] = [micro(fn, iterations) for _ in range(max(1, repeats))]
+    runs.sort(key=lambda r: r["p50_ms"])
+    best = dict(runs[len(runs) // 2])
+    best["p50_ms_spread"] = [runs[0]["p50_ms"], runs[-1]["p50_ms"]]
+    return best
+
+
+def _cold_decode(token: str) -> Callable[[], Any]:
+    def call() -> Any:
+        security._decode_cache.clear()
+        return security.decode_token(token)
+
+    return call
+
+
+def main(args: argparse.Namespace) -> None:
+    token = security.create_access_token(EMAIL)
+    password_hash = security.get_password_hash("bench-pass")
+    kdf_iterations = max(1, args.iterations // args.kdf_divisor)
+
+    cases: Dict[str, tuple[Callable[[], Any], int]] = {
+        "create_access_token": (lambda: security.create_access_token(EMAIL), args.iterations),
+        "decode_token_cached": (lambda: security.decode_token(token), args.iterations),
+        "decode_token_cold": (_cold_decode(token), args.iterations),
+        "verify_password": (lambda: security.verify_password("bench-pass", password_hash), kdf_iterations),
+        "role_to_str_enum": (lambda: _role_to_str(UserRole.DOCTOR), args.iterations),
+        "role_to_str_str": (lambda: _role_to_str("UserRole.doctor"), args.iterations),
+        "to_role_name_enum": (lambda: _to_role_name(UserRole.DOCTOR), args.iterations),
+        "to_role_name_str": (lambda: _to_role_name("doctor"), args.iterations),
+    }
+    only = set(args.only.split(",")) if args.only else None
+
+    results: Dict[str, Any] = {
+        "params": {
+            "iterations": args.iterations,
+            "repeats": args.repeats,
+            "jwt_alg": settings.JWT_ALG,
+            "password_schemes": settings.PASSWORD_SCHEMES,
+            "password_hash_rounds": settings.PASSWORD_HASH_ROUNDS,
+        },
+    }
+    for name, (fn, iterations) in cases.items():
+        if only is None or name in only:
+            results[name] = _median_run(fn, iterations, args.repeats)
+    write_report("auth_micro", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--kdf-divisor", type=int, default=200, help="verify_password: iterations / divisor")
+    parser.add_argument("--only", default=None, help="comma-separated case names")
+    parser.add_argument("--out", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,84 @@
+# bench/compare.py
+"""
+Сравнение двух JSON-отчётов бенчмарков (base — head), например двух ревизий:
+
+    GIT_REV=base python -m bench.auth_load --out base.json
+    GIT_REV=head python -m bench.auth_load --out head.json
+    python -m bench.compare base.json head.json --threshold 10
+
+Сравниваются все замеры с перцентилями (словари с p50_ms). В списках замеры
+сопоставляются по concurrency, иначе по позиции. Регрессия — рост p50/p95/p99
+или падение throughput больше чем на --threshold процентов. Код выхода 1,
+если регрессии есть (для CI).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def _measurements(node: Any, path: str = "") -> Iterator[Tuple[str, Dict[str, Any]]]:
+    if isinstance(node, dict):
+        if "p50_ms" in node:
+            yield path, node
+            return
+        for key, value in node.items():
+            yield from _measurements(value, f"{path}.{key}" if path else key)
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            tag = f"c={value['concurrency']}" if isinstance(value, dict) and "concurrency" in value else str(i)
+            yield from _measurements(value, f"{path}[{tag}]")
+
+
+def _delta(base: float, head: float) -> float:
+    return (head - base) / base * 100 if base else 0.0
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> Tuple[List[str], List[str]]:
+    base_map = dict(_measurements(base.get("results", base)))
+    lines, regressions = [], []
+    for path, h in _measurements(head.get("results", head)):
+        b = base_map.get(path)
+        if b is None:
+            lines.append(f"{path}: new")
+            continue
+        parts = []
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if metric not in b or metric not in h:
+                continue
+            d = _delta(b[metric], h[metric])
+            worse = d > threshold if metric in LOWER_IS_BETTER else -d > threshold
+            parts.append(f"{metric} {b[metric]} -> {h[metric]} ({d:+.1f}%){' !' if worse else ''}")
+            if worse:
+                regressions.append(f"{path} {metric} {d:+.1f}%")
+        lines.append(f"{path}: " + ", ".join(parts))
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent")
+    args = parser.parse_args()
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.head, encoding="utf-8") as f:
+        head = json.load(f)
+
+    print(f"{base.get('benchmark')}: {base.get('git_rev')} -> {head.get('git_rev')}")
+    lines, regressions = compare(base, head, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold}%:")
+        print("\n".join(f"  {r}" for r in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
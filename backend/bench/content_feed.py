@@ -0,0 +1,149 @@
+# bench/content_feed.py
+"""
+Лента /content на большой таблице: keyset (курсор) против OFFSET на разной
+глубине, плюс число SQL-запросов на страницу (проверка отсутствия N+1).
+
+    python -m bench.content_feed --items 1000000 --depths 1,100,1000,10000 --out feed.json
+
+Нужен DATABASE_URL на тестовую БД с применёнными миграциями. Посев идёт
+батчами через executemany и пропускается, если строк уже достаточно
+(--items). Глубина — номер страницы при --page-size строк на страницу.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import event, func, insert, select
+
+from app.api.v1.content import _list_stmt
+from app.api.v1.pagination import encode_cursor
+from app.core.security import get_password_hash
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine
+from app.main import app
+from app.models.content_item import ContentItem
+from app.models.doctor_profile import DoctorProfile
+from app.models.user import User, UserRole
+
+from bench._common import asgi_client, parse_ints, run_load, summarize, write_report
+
+SEED_BATCH = 10_000
+
+
+def seed(items: int, doctors: int) -> None:
+    with SessionLocal() as db:
+        doctor_ids: List[int] = list(db.scalars(select(DoctorProfile.id).limit(doctors)))
+        for i in range(len(doctor_ids), doctors):
+            user = User(email=f"bench-doctor-{i}@example.com", password_hash=get_password_hash("bench"), role=UserRole.DOCTOR)
+            db.add(user)
+            db.flush()
+            profile = DoctorProfile(user_id=user.id, title=f"Bench doctor {i}")
+            db.add(profile)
+            db.flush()
+            doctor_ids.append(profile.id)
+        db.commit()
+
+        have = db.scalar(select(func.count()).select_from(ContentItem)) or 0
+        base = datetime(2024, 1, 1)
+        for start in range(have, items, SEED_BATCH):
+            rows = [
+                {
+                    "author_doctor_id": doctor_ids[n % len(doctor_ids)],
+                    "title": f"Bench item {n}",
+                    "kind": "article" if n % 4 else "video",
+                    "body": "lorem ipsum " * 200,  # ~2.4 КБ: тяжёлая колонка, которую лента не читает
+                    # несколько строк на одну секунду — проверяем тай-брейк по id
+                    "created_at": base + timedelta(seconds=n // 3),
+                }
+                for n in range(start, min(start + SEED_BATCH, items))
+            ]
+            db.execute(insert(ContentItem), rows)
+            db.commit()
+
+
+async def cursor_at(depth: int, page_size: int) -> str | None:
+    """Курсор, с которого начинается страница depth (подготовка — один OFFSET-запрос)."""
+    async with AsyncSessionLocal() as db:
+        row = (
+            await db.execute(
+                select(ContentItem.created_at, ContentItem.id)
+                .order_by(ContentItem.created_at.desc(), ContentItem.id.desc())
+                .offset((depth - 1) * page_size - 1)
+                .limit(1)
+            )
+        ).first()
+    return encode_cursor(row.created_at, row.id) if row else None
+
+
+async def offset_page(depth: int, page_size: int, iterations: int) -> Dict[str, float]:
+    """Та же страница через OFFSET (для сравнения; в API OFFSET не используется)."""
+    latencies = []
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            stmt = _list_stmt(page_size).offset((depth - 1) * page_size)
+            (await db.scalars(stmt)).all()
+            latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def queries_per_page(client, page_size: int) -> int:
+    count = 0
+
+    def _count(*_args, **_kwargs):
+        nonlocal count
+        count += 1
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        await client.get("/api/v1/content", params={"limit": page_size})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", _count)
+    return count
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.skip_seed:
+        seed(args.items, args.doctors)
+
+    results: Dict[str, object] = {"items": args.items, "page_size": args.page_size}
+    async with asgi_client(app) as client:
+        results["queries_per_page"] = await queries_per_page(client, args.page_size)
+        keyset, offset = [], []
+        for depth in parse_ints(args.depths):
+            cursor = await cursor_at(depth, args.page_size) if depth > 1 else None
+            if depth > 1 and cursor is None:
+                continue  # лента короче
+
+            def call(i: int, cursor=cursor):
+                params = {"limit": args.page_size, **({"cursor": cursor} if cursor else {})}
+                return client.get("/api/v1/content", params=params)
+
+            res = await run_load(call, args.requests, args.concurrency)
+            res["depth"] = depth
+            keyset.append(res)
+
+            off = await offset_page(depth, args.page_size, args.offset_iterations)
+            off["depth"] = depth
+            offset.append(off)
+        results["keyset_api"] = keyset
+        results["offset_query"] = offset
+    write_report("content_feed", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--doctors", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--depths", default="1,100,1000,10000")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--offset-iterations", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
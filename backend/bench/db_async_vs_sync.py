@@ -0,0 +1,73 @@
+# bench/db_async_vs_sync.py
+"""
+Сравнение sync (threadpool) и async (event loop) доступа к БД под нагрузкой.
+
+Запуск (из backend/, нужен DATABASE_URL на тестовую БД с применёнными миграциями):
+    python -m bench.db_async_vs_sync --concurrency 1,16,64,256 --requests 2000 --out async.json
+
+Оба эндпоинта делают один и тот же SELECT пользователя по email:
+  /sync  — def-хендлер + Session (ограничен размером threadpool Starlette),
+  /async — async def + AsyncSession.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal, get_async_db, get_db
+from app.models.user import User
+import app.db.base  # noqa: F401
+
+from bench._common import asgi_client, parse_ints, run_load, write_report
+
+BENCH_EMAIL = "bench-db@example.com"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync")
+    def sync_lookup(db: Session = Depends(get_db)):
+        user = db.query(User).filter(User.email == BENCH_EMAIL).first()
+        return {"id": user.id}
+
+    @app.get("/async")
+    async def async_lookup(db: AsyncSession = Depends(get_async_db)):
+        user = await db.scalar(select(User).where(User.email == BENCH_EMAIL))
+        return {"id": user.id}
+
+    return app
+
+
+def seed() -> None:
+    with SessionLocal() as db:
+        if not db.query(User.id).filter(User.email == BENCH_EMAIL).first():
+            db.add(User(email=BENCH_EMAIL, password_hash=get_password_hash("bench")))
+            db.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    seed()
+    app = build_app()
+    results = {}
+    async with asgi_client(app) as client:
+        for mode in ("sync", "async"):
+            results[mode] = []
+            for c in parse_ints(args.concurrency):
+                res = await run_load(lambda i, m=mode: client.get(f"/{m}"), args.requests, c)
+                results[mode].append(res)
+    write_report("db_async_vs_sync", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,16,64,256")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,148 @@
+# bench/json_responses.py
+"""
+Доля сериализации в латентности /auth/login и /users/me: «до» и «после».
+
+    python -m bench.json_responses --iterations 20000 --requests 1000 --concurrency 1,16 --out json.json
+
+  - models: TokenPair/UserOut через штатный путь FastAPI (валидация по
+    response_model в serialize_response + JSONResponse.render) против
+    @serialize_only (pydantic-core to_json одним вызовом);
+  - encoders: render словаря, похожего на страницу /content, классами
+    std / orjson / msgspec (какие установлены);
+  - endpoints: p50 эндпоинтов в текущем дереве и доля сериализации в нём
+    («до» — штатный путь, «после» — to_json).
+
+Нужен DATABASE_URL на тестовую БД с применёнными миграциями (для login —
+пользователь bench-json@example.com создаётся сам).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import select
+
+from app.api.v1.auth import TokenPair
+from app.api.v1.users import UserOut
+from app.core import responses
+from app.core.config import settings
+from app.core.security import create_access_token, create_refresh_token, get_password_hash
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.user import User
+
+from bench._common import asgi_client, micro, parse_ints, run_load, summarize, write_report
+
+EMAIL = "bench-json@example.com"
+PASSWORD = "bench-pass"
+
+
+def seed() -> None:
+    with SessionLocal() as db:
+        if db.scalar(select(User.id).where(User.email == EMAIL)) is None:
+            db.add(User(email=EMAIL, password_hash=get_password_hash(PASSWORD)))
+            db.commit()
+
+
+def _response_field(path: str):
+    route = next(r for r in app.routes if isinstance(r, APIRoute) and r.path == path)
+    return route.secure_cloned_response_field
+
+
+async def amicro(fn: Callable[[], Awaitable[Any]], iterations: int) -> Dict[str, Any]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def bench_models(iterations: int) -> Dict[str, Any]:
+    cases = {
+        "TokenPair": (TokenPair(access_token=create_access_token(EMAIL), refresh_token=create_refresh_token(EMAIL)),
+                      "/api/v1/auth/login"),
+        "UserOut": (UserOut(id=1, email=EMAIL, is_active=True), "/api/v1/users/me"),
+    }
+    out: Dict[str, Any] = {}
+    for name, (model, path) in cases.items():
+        field = _response_field(path)
+
+        async def fastapi_path(model=model, field=field) -> bytes:
+            content = await serialize_response(field=field, response_content=model, is_coroutine=True)
+            return JSONResponse(content).body
+
+        out[name] = {
+            "fastapi_validate_render": await amicro(fastapi_path, iterations),
+            "serialize_only": micro(lambda model=model: responses.ModelResponse(model).body, iterations),
+        }
+    return out
+
+
+def bench_encoders(iterations: int) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc).isoformat()
+    page = {
+        "items": [
+            {"id": i, "title": f"Материал {i}", "author_doctor_id": i % 50, "is_published": True, "created_at": now}
+            for i in range(50)
+        ],
+        "next_cursor": "eyJpZCI6IDUwfQ",
+    }
+    out: Dict[str, Any] = {"fastapi_default": micro(lambda: JSONResponse(page).body, iterations)}
+    for name in ("std", "orjson", "msgspec"):
+        cls = responses.json_response_class(name)
+        if name != "std" and cls is responses.StdJSONResponse:
+            out[name] = "not installed"
+            continue
+        out[name] = micro(lambda cls=cls: cls(page).body, iterations)
+    return out
+
+
+async def bench_endpoints(args: argparse.Namespace, models: Dict[str, Any]) -> Dict[str, Any]:
+    settings.RATE_LIMIT_ENABLED = False
+    seed()
+    out: Dict[str, Any] = {}
+    async with asgi_client(app) as client:
+        login = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        calls = {
+            "login": (lambda i: client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD}), "TokenPair"),
+            "me": (lambda i: client.get("/api/v1/users/me", headers=headers), "UserOut"),
+        }
+        for name, (call, model) in calls.items():
+            out[name] = []
+            requests = args.requests if name == "me" else max(1, args.requests // 20)  # login упирается в KDF
+            for c in parse_ints(args.concurrency):
+                res = await run_load(call, requests, c)
+                p50 = res["p50_ms"] or 1e-9
+                res["serialization_share_before"] = round(models[model]["fastapi_validate_render"]["p50_ms"] / p50, 4)
+                res["serialization_share_after"] = round(models[model]["serialize_only"]["p50_ms"] / p50, 4)
+                out[name].append(res)
+    return out
+
+
+async def main(args: argparse.Namespace) -> None:
+    models = await bench_models(args.iterations)
+    results = {
+        "json_response": responses.json_response_class().__name__,
+        "models": models,
+        "encoders": bench_encoders(args.iterations),
+        "endpoints": await bench_endpoints(args, models),
+    }
+    write_report("json_responses", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", default="1,16")
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
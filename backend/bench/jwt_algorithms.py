@@ -0,0 +1,73 @@
+# bench/jwt_algorithms.py
+"""
+Подпись и проверка JWT по алгоритмам: HS256, RS256 (2048/3072), ES256.
+
+    python -m bench.jwt_algorithms --iterations 5000 --out jwt.json
+
+Для каждого алгоритма:
+  - sign / verify — через KeyRing (Key-объекты разобраны один раз, как в API);
+  - sign_pem / verify_pem — ключ передаётся PEM-строкой и разбирается на
+    каждом вызове (как было до KeyRing);
+  - token_bytes — размер access-токена.
+Ключи генерируются в памяти, БД не нужна. EdDSA в python-jose нет, поэтому
+из эллиптических — ES256.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from typing import Any, Dict
+
+from jose import jwt
+
+from app.core.jwt_keys import load_keyring
+from app.services.jwt_keygen import generate, write_private
+
+from bench._common import micro, write_report
+
+SECRET = "bench-secret-bench-secret-bench-secret"
+CASES = {"HS256": ("HS256", 0), "RS256-2048": ("RS256", 2048), "RS256-3072": ("RS256", 3072), "ES256": ("ES256", 0)}
+
+
+def _case(alg: str, bits: int, iterations: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as keys_dir:
+        if bits or alg.startswith("ES"):
+            path = write_private(keys_dir, "bench", generate(alg, bits or 2048))
+            with open(path, "rb") as f:
+                pem = f.read().decode()
+        else:
+            pem = SECRET
+        ring = load_keyring(alg, SECRET, keys_dir)
+
+    payload = {"sub": "bench@example.com", "exp": int(time.time()) + 3600}
+    token = ring.encode(payload)
+    if alg.startswith("HS"):
+        verify_pem = pem
+    else:
+        verify_pem = ring.verify_keys[ring.signing_kid][1].to_pem().decode()
+    return {
+        "token_bytes": len(token),
+        "sign": micro(lambda: ring.encode(payload), iterations),
+        "verify": micro(lambda: ring.decode(token), iterations),
+        "sign_pem": micro(lambda: jwt.encode(payload, pem, algorithm=alg), iterations),
+        "verify_pem": micro(lambda: jwt.decode(token, verify_pem, algorithms=[alg]), iterations),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    only = set(args.only.split(",")) if args.only else None
+    results = {
+        name: _case(alg, bits, args.iterations)
+        for name, (alg, bits) in CASES.items()
+        if only is None or name in only
+    }
+    write_report("jwt_algorithms", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--only", default=None, help="comma-separated: " + ",".join(CASES))
+    parser.add_argument("--out", default=None)
+    main(parser.parse_args())
@@ -0,0 +1,71 @@
+# bench/password_forgot.py
+"""
+/auth/password/forgot: время ответа для существующих и несуществующих email
+(не должно различаться) и доставка очереди писем через локальный SMTP-приёмник.
+
+    python -m bench.password_forgot --requests 500 --concurrency 16 --smtp-delay 0.2 --out forgot.json
+
+Нужен DATABASE_URL на тестовую БД с применёнными миграциями. --smtp-delay
+имитирует медленный SMTP: на ответ API он влиять не должен, только на
+время работы диспетчера (ограниченного MAIL_CONCURRENCY).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Dict
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.user import User
+from app.services import mailer
+
+from bench._common import asgi_client, run_load, write_report
+from bench.smtp_sink import SmtpSink
+
+KNOWN = "bench-forgot@example.com"
+
+
+def seed() -> None:
+    with SessionLocal() as db:
+        if db.scalar(select(User.id).where(User.email == KNOWN)) is None:
+            db.add(User(email=KNOWN, password_hash=get_password_hash("bench")))
+            db.commit()
+
+
+async def main(args: argparse.Namespace) -> None:
+    seed()
+    settings.RATE_LIMIT_ENABLED = False  # один «IP» и один email на сотни запросов
+    sink = await SmtpSink(port=0, delay_sec=args.smtp_delay).start()
+    settings.MAIL_BACKEND, settings.SMTP_HOST, settings.SMTP_PORT = "smtp", sink.host, sink.port
+    await mailer.dispatch()  # хвосты прошлых прогонов
+
+    results: Dict[str, object] = {"smtp_delay_s": args.smtp_delay, "mail_concurrency": settings.MAIL_CONCURRENCY}
+    async with asgi_client(app) as client:
+        for name, email in (("existing", lambda i: KNOWN), ("missing", lambda i: f"nobody-{i}@example.com")):
+            results[name] = await run_load(
+                lambda i, email=email: client.post("/api/v1/auth/password/forgot", json={"email": email(i)}),
+                args.requests,
+                args.concurrency,
+            )
+
+    t0 = time.perf_counter()
+    results["dispatch"] = await mailer.dispatch()
+    results["dispatch"]["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    results["received"] = len(sink.messages)
+    await sink.stop()
+    write_report("password_forgot", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--smtp-delay", type=float, default=0.2)
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,123 @@
+# bench/payment_webhooks.py
+"""
+Локальный «фейковый провайдер»: шторм ретраев платёжных вебхуков.
+
+    python -m bench.payment_webhooks --transactions 500 --retries 1,5,20 --out webhooks.json
+
+Для каждой транзакции провайдер шлёт pending и succeeded, каждый по
+--retries раз, вперемешку и параллельно (--concurrency). Латентность
+приёма не должна расти с числом повторов. После прогона outbox
+вычищается, и проверяется, что платежей, событий и продлений подписки
+ровно по одному на транзакцию.
+
+Нужен DATABASE_URL на тестовую БД с применёнными миграциями; секрет
+вебхука берётся из PAYMENT_WEBHOOK_SECRET (по умолчанию — bench-secret).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import uuid
+from typing import Dict, List
+
+from sqlalchemy import func, select
+
+from app.api.v1.payments import sign_payload
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.main import app
+from app.models.doctor_profile import DoctorProfile
+from app.models.outbox import OutboxEvent
+from app.models.payment import Payment
+from app.models.user import User, UserRole
+from app.services import outbox
+
+from bench._common import asgi_client, parse_ints, run_load, write_report
+
+PROVIDER = "fakepay"
+
+
+def seed() -> Dict[str, int]:
+    with SessionLocal() as db:
+        ids = {}
+        for email, role in (("bench-payer@example.com", UserRole.PATIENT), ("bench-payee@example.com", UserRole.DOCTOR)):
+            user = db.scalar(select(User).where(User.email == email))
+            if user is None:
+                user = User(email=email, password_hash=get_password_hash("bench"), role=role)
+                db.add(user)
+                db.flush()
+            ids[email] = user.id
+        doctor_id = db.scalar(select(DoctorProfile.id).where(DoctorProfile.user_id == ids["bench-payee@example.com"]))
+        if doctor_id is None:
+            profile = DoctorProfile(user_id=ids["bench-payee@example.com"], title="Bench payee")
+            db.add(profile)
+            db.flush()
+            doctor_id = profile.id
+        db.commit()
+    return {"user_id": ids["bench-payer@example.com"], "doctor_id": doctor_id}
+
+
+def deliveries(transactions: int, retries: int, user_id: int, doctor_id: int) -> List[bytes]:
+    run = uuid.uuid4().hex[:8]
+    bodies = []
+    for n in range(transactions):
+        for status in ("pending", "succeeded"):
+            body = json.dumps({
+                "transaction_id": f"bench-{run}-{n}",
+                "status": status,
+                "user_id": user_id,
+                "doctor_id": doctor_id,
+                "amount": "50000.00",
+            }).encode()
+            bodies.extend([body] * retries)
+    random.shuffle(bodies)  # ретраи и «succeeded раньше pending» — как у живых провайдеров
+    return bodies
+
+
+async def count(model) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(select(func.count()).select_from(model)) or 0
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.PAYMENT_WEBHOOK_SECRET = settings.PAYMENT_WEBHOOK_SECRET or "bench-secret"
+    secret = settings.PAYMENT_WEBHOOK_SECRET
+    ids = seed()
+    await outbox.drain()  # хвосты прошлых прогонов
+
+    results: Dict[str, object] = {"transactions": args.transactions, "runs": []}
+    async with asgi_client(app) as client:
+        for retries in parse_ints(args.retries):
+            bodies = deliveries(args.transactions, retries, ids["user_id"], ids["doctor_id"])
+            payments_before = await count(Payment)
+
+            def call(i: int):
+                body = bodies[i]
+                return client.post(
+                    f"/api/v1/payments/webhooks/{PROVIDER}",
+                    content=body,
+                    headers={"X-Signature": "sha256=" + sign_payload(body, secret), "Content-Type": "application/json"},
+                )
+
+            res = await run_load(call, len(bodies), args.concurrency)
+            res["retries"] = retries
+            res["outbox_pending"] = await count(OutboxEvent)
+            res["outbox"] = await outbox.drain(max_batches=10_000)
+            res["payments_created"] = await count(Payment) - payments_before
+            res["exactly_once"] = (
+                res["payments_created"] == args.transactions and res["outbox"]["processed"] == args.transactions
+            )
+            results["runs"].append(res)
+    write_report("payment_webhooks", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=500)
+    parser.add_argument("--retries", default="1,5,20")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,87 @@
+# bench/presign.py
+"""
+Стоимость выдачи presigned URL (локальная SigV4) и, опционально, проверка
+URL на живом S3-совместимом хранилище (MinIO из docker-compose, профиль media).
+
+    python -m bench.presign --iterations 100000 --out presign.json
+    python -m bench.presign --roundtrip     # нужны S3_* в окружении, бакет создаётся при необходимости
+
+roundtrip: PUT объекта по presigned URL, GET обратно, multipart из двух
+частей (Create/UploadPart/Complete) — всё через URL, выданные Presigner.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from app.core import s3
+from app.core.s3 import Presigner
+
+from bench._common import micro, write_report
+
+EXPIRES = 900
+
+
+def bench_sign(iterations: int) -> dict:
+    p = Presigner("AKIDBENCH", "bench-secret", "media", region="auto", endpoint_url="https://example.r2.cloudflarestorage.com")
+    key = "content/1/" + uuid.uuid4().hex
+    results = {"put_url": micro(lambda: p.put_url(key, EXPIRES), iterations)}
+
+    # холодный ключ подписи на каждый вызов — для сравнения с кэшем
+    def cold() -> None:
+        s3.signing_key.cache_clear()
+        p.put_url(key, EXPIRES)
+
+    results["put_url_no_key_cache"] = micro(cold, max(1, iterations // 10))
+    return results
+
+
+def roundtrip() -> dict:
+    p = s3.get_presigner()
+    with httpx.Client(timeout=30) as client:
+        # бакет (MinIO): PUT /bucket с той же подписью; 409 — уже есть
+        client.put(p.presign("PUT", "", EXPIRES))
+
+        key = f"bench/{uuid.uuid4().hex}.bin"
+        payload = os.urandom(1024 * 64)
+        put = client.put(p.put_url(key, EXPIRES), content=payload)
+        got = client.get(p.get_url(key, EXPIRES))
+        single_ok = put.status_code == 200 and got.status_code == 200 and got.content == payload
+
+        mkey = f"bench/{uuid.uuid4().hex}.mp4"
+        created = client.post(p.create_multipart_url(mkey, EXPIRES))
+        upload_id = re.search(r"<UploadId>([^<]+)</UploadId>", created.text).group(1)
+        parts = [os.urandom(5 * 1024 * 1024), os.urandom(1024)]
+        etags = []
+        for n, chunk in enumerate(parts, start=1):
+            r = client.put(p.upload_part_url(mkey, upload_id, n, EXPIRES), content=chunk)
+            etags.append(r.headers["ETag"])
+        body = "<CompleteMultipartUpload>" + "".join(
+            f"<Part><PartNumber>{n}</PartNumber><ETag>{tag}</ETag></Part>" for n, tag in enumerate(etags, start=1)
+        ) + "</CompleteMultipartUpload>"
+        done = client.post(p.complete_multipart_url(mkey, upload_id, EXPIRES), content=body)
+        size = client.get(p.get_url(mkey, EXPIRES)).headers.get("content-length")
+        multipart_ok = done.status_code == 200 and size == str(sum(len(c) for c in parts))
+
+    return {
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "single_put_get": single_ok,
+        "multipart": multipart_ok,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--roundtrip", action="store_true")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    results = {"sign": bench_sign(args.iterations)}
+    if args.roundtrip:
+        results["roundtrip"] = roundtrip()
+    write_report("presign", results, args.out)
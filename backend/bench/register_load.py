@@ -0,0 +1,51 @@
+# bench/register_load.py
+"""
+Нагрузочный тест регистрации: signups/sec и перцентили при разной конкуренции.
+
+    python -m bench.register_load --concurrency 1,8,32,128 --requests 1000 --out register.json
+
+Для сравнения «до/после» запускайте на двух ревизиях с GIT_REV=<sha> и
+сравнивайте JSON. Каждая регистрация — уникальный email, плюс доля
+повторов (--dup-ratio) для проверки пути 409 под конкуренцией.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import uuid
+
+from app.core.config import settings
+from app.main import app
+
+from bench._common import asgi_client, parse_ints, run_load, write_report
+
+
+async def main(args: argparse.Namespace) -> None:
+    settings.RATE_LIMIT_ENABLED = False  # весь трафик бенча идёт с одного «IP»
+    run_id = uuid.uuid4().hex[:8]
+    dup_every = int(1 / args.dup_ratio) if args.dup_ratio > 0 else 0
+    results = []
+    async with asgi_client(app) as client:
+        for c in parse_ints(args.concurrency):
+            prefix = f"bench-{run_id}-c{c}"
+
+            def call(i: int, prefix=prefix):
+                n = i - 1 if dup_every and i % dup_every == 0 and i > 0 else i
+                return client.post(
+                    "/api/v1/auth/register",
+                    json={"email": f"{prefix}-{n}@example.com", "password": "bench-pass"},
+                )
+
+            res = await run_load(call, args.requests, c, ok_status=(200, 409))
+            res["signups_per_sec"] = res["throughput_rps"]
+            results.append(res)
+    write_report("register_load", results, args.out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--dup-ratio", type=float, default=0.0)
+    parser.add_argument("--out", default=None)
+    asyncio.run(main(parser.parse_args()))
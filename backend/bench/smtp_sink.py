@@ -0,0 +1,106 @@
+# bench/smtp_sink.py
+"""
+Локальный SMTP-«приёмник» (замена почтового сервера для dev и бенчей):
+принимает письма и складывает их в память / печатает. Никуда не пересылает.
+
+    python -m bench.smtp_sink --port 1025          # SMTP_HOST=localhost SMTP_PORT=1025 MAIL_BACKEND=smtp
+
+Поддержан минимальный диалог RFC 5321 (EHLO/HELO, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT) — ровно то, что нужно smtplib.send_message без TLS и AUTH.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class Received:
+    mail_from: str
+    rcpt_to: List[str]
+    data: bytes
+
+
+@dataclass
+class SmtpSink:
+    host: str = "127.0.0.1"
+    port: int = 1025
+    echo: bool = False
+    delay_sec: float = 0.0  # имитация медленного SMTP
+    messages: List[Received] = field(default_factory=list)
+    _server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> "SmtpSink":
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def reply(line: str) -> None:
+            writer.write((line + "\r\n").encode())
+            await writer.drain()
+
+        mail_from, rcpt = "", []
+        await reply("220 smtp-sink ready")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                cmd = raw.decode("latin-1").rstrip("\r\n")
+                verb = cmd[:4].upper()
+                if verb in ("EHLO", "HELO"):
+                    await reply("250 smtp-sink")
+                elif verb == "MAIL":
+                    mail_from, rcpt = cmd.partition(":")[2].strip(), []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    rcpt.append(cmd.partition(":")[2].strip())
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if line in (b".\r\n", b".\n", b""):
+                            break
+                        lines.append(line[1:] if line.startswith(b"..") else line)
+                    if self.delay_sec:
+                        await asyncio.sleep(self.delay_sec)
+                    msg = Received(mail_from, rcpt, b"".join(lines))
+                    self.messages.append(msg)
+                    if self.echo:
+                        print(f"--- from {mail_from} to {', '.join(rcpt)}\n{msg.data.decode(errors='replace')}")
+                    await reply("250 OK queued")
+                elif verb == "RSET":
+                    mail_from, rcpt = "", []
+                    await reply("250 OK")
+                elif verb == "NOOP":
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    sink = await SmtpSink(host=args.host, port=args.port, echo=True).start()
+    print(f"smtp sink on {sink.host}:{sink.port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    asyncio.run(_serve(parser.parse_args()))
@@ -0,0 +1,195 @@
+# tests/conftest.py
+"""
+Тесты API на временной SQLite.
+
+Схема — Base.metadata.create_all (миграции частично только для Postgres).
+Окружение выставляется до импорта app.*: Settings и движки создаются при
+импорте. Фоновые задачи (reaper, outbox, mailer) в процессе не запускаются —
+тесты вызывают их сами.
+
+    cd backend && pip install -r requirements-test.txt && pytest
+"""
+import os
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+_DB_DIR = tempfile.mkdtemp(prefix="medplatform-tests-")
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{_DB_DIR}/test.sqlite",
+    JWT_SECRET="test-secret",
+    JWT_ALG="HS256",
+    PASSWORD_HASH_ROUNDS="1000",  # KDF по умолчанию — сотни мс на логин
+    RATE_LIMIT_ENABLED="false",
+    TOKEN_REAPER_INTERVAL_SEC="0",
+    OUTBOX_INTERVAL_SEC="0",
+    MAIL_DISPATCH_INTERVAL_SEC="0",
+    MAIL_BACKEND="log",
+    PAYMENT_WEBHOOK_SECRET="test-webhook-secret",
+)
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import DateTime, select, text  # noqa: E402
+from sqlalchemy.schema import DefaultClause  # noqa: E402
+from sqlalchemy.types import TypeDecorator  # noqa: E402
+
+from app.core.principal import invalidate_principal  # noqa: E402
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.content_item import ContentItem  # noqa: E402
+from app.models.doctor_profile import DoctorProfile  # noqa: E402
+from app.models.patient_profile import PatientProfile  # noqa: E402
+from app.models.subscription import Subscription  # noqa: E402
+from app.models.user import User, UserRole  # noqa: E402
+from app.services.entitlements import invalidate_entitlements  # noqa: E402
+
+pytest_plugins = ["app.testing"]
+
+PASSWORD = "test-pass-123"
+
+
+class _UtcDateTime(TypeDecorator):
+    """SQLite не хранит зону: timestamptz читается как naive — возвращаем UTC, как Postgres."""
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
+def _adapt_for_sqlite(metadata) -> None:
+    for table in metadata.tables.values():
+        for column in table.c:
+            default = column.server_default
+            # server_default="CURRENT_TIMESTAMP"/"FALSE" строкой SQLite понимает как литерал в кавычках
+            if default is not None and getattr(default, "arg", None) in ("CURRENT_TIMESTAMP", "FALSE"):
+                column.server_default = DefaultClause(text(default.arg))
+            if isinstance(column.type, DateTime) and column.type.timezone:
+                column.type = _UtcDateTime(timezone=True)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    _adapt_for_sqlite(Base.metadata)
+    Base.metadata.create_all(engine)
+    yield
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def run(client):
+    """Корутина в event loop приложения (async-движок привязан к нему)."""
+    return lambda fn, *args, **kwargs: client.portal.call(lambda: fn(*args, **kwargs))
+
+
+@pytest.fixture
+def make_user(client):
+    """Регистрирует нового пользователя: {"id", "email", "password", "headers"}."""
+
+    def make() -> dict:
+        email = f"u-{uuid.uuid4().hex[:12]}@example.com"
+        body = {"email": email, "password": PASSWORD}
+        r = client.post("/api/v1/auth/register", json=body)
+        assert r.status_code in (200, 201), r.text
+        r = client.post("/api/v1/auth/login", json=body)
+        assert r.status_code == 200, r.text
+        with SessionLocal() as db:
+            user_id = db.scalar(select(User.id).where(User.email == email))
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        return {"id": user_id, "email": email, "password": PASSWORD, "headers": headers}
+
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    return make_user()
+
+
+@pytest.fixture
+def auth_headers(user):
+    return user["headers"]
+
+
+@pytest.fixture
+def set_role():
+    def apply(user: dict, role: UserRole) -> dict:
+        with SessionLocal() as db:
+            db.get(User, user["id"]).role = role
+            db.commit()
+        invalidate_principal(user["email"])
+        return user
+
+    return apply
+
+
+@pytest.fixture
+def admin(make_user, set_role):
+    return set_role(make_user(), UserRole.ADMIN)
+
+
+@pytest.fixture
+def walk(client):
+    """walk(path, params, headers): все страницы по next_cursor -> (id подряд, число страниц)."""
+
+    def pages(path: str, params: Optional[dict] = None, headers: Optional[dict] = None, max_pages: int = 20):
+        ids, count, cursor = [], 0, None
+        while count < max_pages:
+            query = {**(params or {}), **({"cursor": cursor} if cursor else {})}
+            r = client.get(path, params=query, headers=headers or {})
+            assert r.status_code == 200, r.text
+            page = r.json()
+            ids += [item["id"] for item in page["items"]]
+            count += 1
+            if page["next_cursor"] is None:
+                return ids, count
+            assert page["next_cursor"] != cursor, "курсор не сдвинулся"
+            cursor = page["next_cursor"]
+        pytest.fail(f"{path}: больше {max_pages} страниц, курсор зациклился на {ids[-2:]}")
+
+    return pages
+
+
+@pytest.fixture
+def doctor(make_user):
+    """Врач с одним материалом: поля пользователя + doctor_id, item_id, body."""
+    author = make_user()
+    with SessionLocal() as db:
+        profile = DoctorProfile(user_id=author["id"], title="Кардиолог")
+        db.add(profile)
+        db.flush()
+        item = ContentItem(author_doctor_id=profile.id, title="Статья", kind="article", body="полный текст материала")
+        db.add(item)
+        db.commit()
+        author.update(doctor_id=profile.id, item_id=item.id, body=item.body)
+    return author
+
+
+@pytest.fixture
+def subscribe():
+    """subscribe(user_id, doctor_id, expires_at=None): действующая подписка пациента (naive UTC)."""
+
+    def make(user_id: int, doctor_id: int, expires_at: Optional[datetime] = None) -> None:
+        with SessionLocal() as db:
+            patient_id = db.scalar(select(PatientProfile.id).where(PatientProfile.user_id == user_id))
+            if patient_id is None:
+                patient = PatientProfile(user_id=user_id)
+                db.add(patient)
+                db.flush()
+                patient_id = patient.id
+            db.add(Subscription(patient_id=patient_id, doctor_id=doctor_id, is_active=True, expires_at=expires_at))
+            db.commit()
+        invalidate_entitlements(user_id)
+
+    return make
@@ -0,0 +1,91 @@
+# tests/test_admin.py
+"""Админка: keyset-списки пользователей и сессий, фильтры, массовый отзыв."""
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.user import User, UserRole
+
+SESSIONS = 4
+
+
+def _login(client, user) -> dict:
+    r = client.post("/api/v1/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def test_requires_admin(client, user):
+    assert client.get("/api/v1/admin/users", headers=user["headers"]).status_code == 403
+    assert client.get(f"/api/v1/admin/users/{user['id']}/sessions", headers=user["headers"]).status_code == 403
+
+
+def test_users_walk_all_pages(walk, admin):
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count()).select_from(User))
+    ids, pages = walk("/api/v1/admin/users", {"limit": 3}, admin["headers"], max_pages=total)
+    assert ids == sorted(ids) and len(set(ids)) == total
+    assert pages == -(-total // 3)
+
+
+def test_users_role_filter(client, walk, admin, make_user, set_role):
+    doctors = [set_role(make_user(), UserRole.DOCTOR)["id"] for _ in range(3)]
+    ids, _ = walk("/api/v1/admin/users", {"role": "doctor", "limit": 2}, admin["headers"])
+    assert set(doctors) <= set(ids)
+    page = client.get("/api/v1/admin/users", params={"role": "doctor", "limit": 200}, headers=admin["headers"]).json()
+    assert {item["role"] for item in page["items"]} == {"DOCTOR"}
+
+
+def test_users_active_filter(client, walk, admin, user, make_user):
+    gone = make_user()
+    tokens = _login(client, gone)
+    r = client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"], "all_sessions": True})
+    assert r.status_code == 200
+
+    active, _ = walk("/api/v1/admin/users", {"active": "true", "limit": 50}, admin["headers"])
+    inactive, _ = walk("/api/v1/admin/users", {"active": "false", "limit": 50}, admin["headers"])
+    assert user["id"] in active and user["id"] not in inactive
+    assert gone["id"] in inactive and gone["id"] not in active
+
+
+@pytest.fixture
+def sessions(client, user):
+    """user + SESSIONS дополнительных логинов (у каждого своя refresh-сессия)."""
+    for _ in range(SESSIONS):
+        _login(client, user)
+    return SESSIONS + 2  # + register и login из make_user
+
+
+def test_sessions_walk_all_pages(walk, admin, user, sessions):
+    path = f"/api/v1/admin/users/{user['id']}/sessions"
+    ids, pages = walk(path, {"limit": 1}, admin["headers"])
+    assert ids == sorted(ids, reverse=True)  # новые сверху, без повторов
+    assert len(ids) == pages == sessions
+
+    ids2, pages2 = walk(path, {"limit": 2}, admin["headers"])
+    assert ids2 == ids and pages2 == -(-len(ids) // 2)
+
+
+def test_sessions_include_revoked(client, walk, admin, user, sessions):
+    tokens = _login(client, user)
+    client.post("/api/v1/auth/logout", json={"refresh_token": tokens["refresh_token"]})
+    path = f"/api/v1/admin/users/{user['id']}/sessions"
+
+    live, _ = walk(path, {"limit": 2}, admin["headers"])
+    everything, _ = walk(path, {"limit": 2, "include_revoked": "true"}, admin["headers"])
+    assert len(live) == sessions
+    assert len(everything) == sessions + 1 and set(live) < set(everything)
+
+
+def test_bulk_revoke_by_ids(client, walk, admin, make_user):
+    targets = [make_user() for _ in range(2)]
+    r = client.post("/api/v1/admin/sessions/revoke", json={"user_ids": [u["id"] for u in targets]}, headers=admin["headers"])
+    assert r.status_code == 200, r.text
+    for u in targets:
+        ids, _ = walk(f"/api/v1/admin/users/{u['id']}/sessions", {}, admin["headers"])
+        assert ids == []
+
+
+def test_broken_cursor_is_400(client, admin, user):
+    r = client.get(f"/api/v1/admin/users/{user['id']}/sessions", params={"cursor": "WyJ4IiwgIngiXQ"}, headers=admin["headers"])
+    assert r.status_code == 400
@@ -0,0 +1,215 @@
+# tests/test_appointments.py
+"""Записи к врачу: пересечения, свободные слоты, отмена, keyset-список."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app.models.user import UserRole
+from app.services.slots import free_slots, merge_intervals
+
+SLOT = timedelta(minutes=30)
+# Asia/Tashkent — UTC+5 без перехода на летнее время: 09:00 местного = 04:00 UTC
+TZ_SHIFT = timedelta(hours=5)
+
+
+def _at(hour: int, minute: int = 0, day: int = 1) -> datetime:
+    return datetime(2030, 1, day, hour, minute, tzinfo=timezone.utc)
+
+
+def _monday() -> date:
+    """Понедельник через несколько недель: рабочий день и гарантированно в будущем."""
+    day = date.today() + timedelta(weeks=4)
+    return day - timedelta(days=day.weekday())
+
+
+def _local(day: date, hour: int, minute: int = 0) -> datetime:
+    return datetime(day.year, day.month, day.day, hour, minute, tzinfo=timezone.utc) - TZ_SHIFT
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat()
+
+
+def _book(client, headers, doctor_id: int, starts_at: datetime, ends_at=None):
+    body = {"doctor_id": doctor_id, "starts_at": _iso(starts_at)}
+    if ends_at is not None:
+        body["ends_at"] = _iso(ends_at)
+    return client.post("/api/v1/appointments", json=body, headers=headers)
+
+
+def _slot_starts(client, doctor_id: int, day: date) -> list:
+    r = client.get(
+        "/api/v1/appointments/slots",
+        params={"doctor_id": doctor_id, "date_from": day.isoformat(), "date_to": day.isoformat()},
+    )
+    assert r.status_code == 200, r.text
+    return [datetime.fromisoformat(s["starts_at"]) for s in r.json()["slots"]]
+
+
+# ======== merge_intervals / free_slots ========
+
+def test_merge_intervals_overlapping_and_adjacent():
+    merged = merge_intervals([
+        (_at(9), _at(10)),
+        (_at(9, 30), _at(10, 15)),
+        (_at(10, 15), _at(11)),  # смежный — склеивается
+        (_at(12), _at(12, 30)),
+    ])
+    assert merged == [(_at(9), _at(11)), (_at(12), _at(12, 30))]
+
+
+def test_merge_intervals_nested():
+    assert merge_intervals([(_at(9), _at(12)), (_at(10), _at(11))]) == [(_at(9), _at(12))]
+
+
+def test_free_slots_skip_busy_and_realign_to_grid():
+    windows = [(_at(9), _at(12))]
+    busy = merge_intervals([(_at(9, 30), _at(10)), (_at(10, 45), _at(11, 5))])
+    slots = free_slots(windows, busy, SLOT)
+    # 10:30 упирается в 10:45, после 11:05 — ближайшая точка сетки 11:30
+    assert [s for s, _ in slots] == [_at(9), _at(10), _at(11, 30)]
+    assert all(e - s == SLOT for s, e in slots)
+
+
+def test_free_slots_across_windows_and_not_before():
+    windows = [(_at(9), _at(11)), (_at(9, day=2), _at(11, day=2))]
+    busy = [(_at(10, day=2), _at(10, 30, day=2))]
+    slots = free_slots(windows, busy, SLOT, not_before=_at(10, 10))
+    assert [s for s, _ in slots] == [
+        _at(10, 30),
+        _at(9, day=2), _at(9, 30, day=2), _at(10, 30, day=2),
+    ]
+
+
+def test_free_slots_window_fully_busy():
+    assert free_slots([(_at(9), _at(10))], [(_at(8), _at(11))], SLOT) == []
+
+
+# ======== POST /appointments ========
+
+def test_double_booking_rejected(client, doctor, make_user):
+    day = _monday()
+    first, second = make_user(), make_user()
+    r = _book(client, first["headers"], doctor["doctor_id"], _local(day, 9))
+    assert r.status_code == 201, r.text
+    created = r.json()
+    assert datetime.fromisoformat(created["ends_at"]) - datetime.fromisoformat(created["starts_at"]) == SLOT
+
+    # тот же слот и частичное пересечение — 409, смежный слот — свободен
+    assert _book(client, second["headers"], doctor["doctor_id"], _local(day, 9)).status_code == 409
+    r = _book(client, second["headers"], doctor["doctor_id"], _local(day, 8, 45), _local(day, 9, 15))
+    assert r.status_code == 409
+    assert _book(client, second["headers"], doctor["doctor_id"], _local(day, 9, 30)).status_code == 201
+
+
+def test_booking_validation(client, doctor, user):
+    day = _monday()
+    past = datetime.now(timezone.utc) - timedelta(days=1)
+    assert _book(client, user["headers"], doctor["doctor_id"], past).status_code == 400
+    r = _book(client, user["headers"], doctor["doctor_id"], _local(day, 10), _local(day, 10))
+    assert r.status_code == 400
+    r = _book(client, user["headers"], doctor["doctor_id"], _local(day, 9), _local(day, 14, 30))
+    assert r.status_code == 400  # длиннее APPOINTMENT_MAX_MINUTES
+
+
+# ======== GET /appointments/slots ========
+
+def test_slots_exclude_booked_and_return_cancelled(client, doctor, user):
+    day = _monday()
+    before = _slot_starts(client, doctor["doctor_id"], day)
+    assert before[0] == _local(day, 9) and before[-1] == _local(day, 17, 30)
+    assert len(before) == 18
+
+    booked = _book(client, user["headers"], doctor["doctor_id"], _local(day, 10)).json()
+    long = _book(client, user["headers"], doctor["doctor_id"], _local(day, 14), _local(day, 15, 15)).json()
+    taken = set(before) - set(_slot_starts(client, doctor["doctor_id"], day))
+    # 15:00 задет хвостом длинной записи
+    assert taken == {_local(day, 10), _local(day, 14), _local(day, 14, 30), _local(day, 15)}
+
+    r = client.post(f"/api/v1/appointments/{booked['id']}/cancel", headers=user["headers"])
+    assert r.status_code == 200, r.text
+    taken = set(before) - set(_slot_starts(client, doctor["doctor_id"], day))
+    assert taken == {_local(day, 14), _local(day, 14, 30), _local(day, 15)}
+    assert long["status"] == "scheduled"
+
+
+def test_slots_weekend_and_bad_range(client, doctor):
+    saturday = _monday() + timedelta(days=5)
+    assert _slot_starts(client, doctor["doctor_id"], saturday) == []
+    r = client.get(
+        "/api/v1/appointments/slots",
+        params={"doctor_id": doctor["doctor_id"], "date_from": saturday.isoformat(), "date_to": _monday().isoformat()},
+    )
+    assert r.status_code == 400
+    r = client.get(
+        "/api/v1/appointments/slots",
+        params={"doctor_id": 10**9, "date_from": _monday().isoformat(), "date_to": _monday().isoformat()},
+    )
+    assert r.status_code == 404
+
+
+# ======== POST /appointments/{id}/cancel ========
+
+def test_cancel_returns_row_and_frees_slot(client, doctor, make_user):
+    day = _monday()
+    patient, stranger = make_user(), make_user()
+    appt = _book(client, patient["headers"], doctor["doctor_id"], _local(day, 11)).json()
+
+    # чужая запись не видна: тот же 404, что и для несуществующей
+    assert client.post(f"/api/v1/appointments/{appt['id']}/cancel", headers=stranger["headers"]).status_code == 404
+
+    r = client.post(f"/api/v1/appointments/{appt['id']}/cancel", headers=patient["headers"])
+    assert r.status_code == 200, r.text
+    assert r.json() == {**appt, "status": "cancelled"}  # строка из RETURNING, без повторного SELECT
+
+    # повторная отмена — запись уже не занимает время
+    assert client.post(f"/api/v1/appointments/{appt['id']}/cancel", headers=patient["headers"]).status_code == 404
+    assert _book(client, stranger["headers"], doctor["doctor_id"], _local(day, 11)).status_code == 201
+
+
+# ======== GET /appointments ========
+
+APPOINTMENTS = 5
+
+
+@pytest.fixture
+def booked(client, doctor, user):
+    """APPOINTMENTS записей user к врачу, вразнобой по времени; id в порядке starts_at."""
+    day = _monday()
+    hours = [15, 9, 12, 10, 16]
+    ids = {}
+    for hour in hours[:APPOINTMENTS]:
+        r = _book(client, user["headers"], doctor["doctor_id"], _local(day, hour))
+        assert r.status_code == 201, r.text
+        ids[hour] = r.json()["id"]
+    return [ids[h] for h in sorted(ids)]
+
+
+def test_list_walk_all_pages(walk, user, booked):
+    ids, pages = walk("/api/v1/appointments", {"limit": 2}, user["headers"])
+    assert ids == booked
+    assert pages == -(-APPOINTMENTS // 2)
+
+
+def test_list_doctor_sees_own_schedule(walk, doctor, booked, set_role):
+    set_role(doctor, UserRole.DOCTOR)
+    ids, _ = walk("/api/v1/appointments", {"limit": 2}, doctor["headers"])
+    assert ids == booked
+
+
+def test_list_cancelled_and_date_filter(client, walk, user, booked):
+    client.post(f"/api/v1/appointments/{booked[1]}/cancel", headers=user["headers"])
+    ids, _ = walk("/api/v1/appointments", {"limit": 2}, user["headers"])
+    assert ids == booked[:1] + booked[2:]
+    ids, _ = walk("/api/v1/appointments", {"limit": 2, "include_cancelled": "true"}, user["headers"])
+    assert ids == booked
+
+    day = _monday()
+    params = {"limit": 1, "date_from": _iso(_local(day, 10)), "date_to": _iso(_local(day, 15, 30))}
+    ids, pages = walk("/api/v1/appointments", params, user["headers"])
+    assert ids == booked[2:4] and pages == 2
+
+
+def test_list_broken_cursor(client, user):
+    r = client.get("/api/v1/appointments", params={"cursor": "not-a-cursor"}, headers=user["headers"])
+    assert r.status_code == 400
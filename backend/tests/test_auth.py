@@ -0,0 +1,53 @@
+# tests/test_auth.py
+"""Refresh-токены: одноразовая ротация, повтор погашенного гасит всё семейство."""
+import pytest
+from jose import jwt
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.auth_tokens import RefreshToken
+
+
+@pytest.fixture(params=["sql", "memory"])
+def store_backend(request, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_STORE_BACKEND", request.param)
+    return request.param
+
+
+def _login(client, user) -> dict:
+    r = client.post("/api/v1/auth/login", json={"email": user["email"], "password": user["password"]})
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _refresh(client, refresh_token: str):
+    return client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_rotation_issues_new_token_and_consumes_old(client, user, store_backend):
+    first = _login(client, user)["refresh_token"]
+    r = _refresh(client, first)
+    assert r.status_code == 200
+    second = r.json()["refresh_token"]
+    assert second != first
+    assert _refresh(client, second).status_code == 200
+
+
+def test_reuse_revokes_whole_family(client, user, store_backend):
+    stolen = _login(client, user)["refresh_token"]
+    other_session = _login(client, user)["refresh_token"]
+
+    successor = _refresh(client, stolen).json()["refresh_token"]
+    # повтор уже погашенного токена — reuse: 401 и отзыв семейства
+    assert _refresh(client, stolen).status_code == 401
+    # преемник, выпущенный ротацией, тоже погашен
+    assert _refresh(client, successor).status_code == 401
+    # другая сессия пользователя (другое семейство) жива
+    assert _refresh(client, other_session).status_code == 200
+
+    if store_backend == "sql":
+        family = jwt.get_unverified_claims(stolen)["fam"]
+        with SessionLocal() as db:
+            revoked = db.scalars(select(RefreshToken.revoked).where(RefreshToken.family_id == family)).all()
+        assert len(revoked) == 2 and all(revoked)
@@ -0,0 +1,85 @@
+# tests/test_content.py
+"""Материалы: body только автору, админу и подписчику; keyset-страницы лент."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import SessionLocal
+from app.models.content_item import ContentItem
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # subscriptions.* — timestamp без зоны
+
+
+def _get(client, doctor, headers=None):
+    return client.get(f"/api/v1/content/{doctor['item_id']}", headers=headers or {})
+
+
+def test_anonymous_gets_401(client, doctor):
+    assert _get(client, doctor).status_code == 401
+
+
+def test_not_subscribed_gets_card_without_body(client, doctor, user):
+    r = _get(client, doctor, user["headers"])
+    assert r.status_code == 200
+    assert r.json()["title"] == "Статья"
+    assert r.json()["body"] is None
+    assert "public" not in r.headers["cache-control"]
+
+
+def test_subscriber_gets_body(client, doctor, user, subscribe):
+    subscribe(user["id"], doctor["doctor_id"], expires_at=_now() + timedelta(days=1))
+    assert _get(client, doctor, user["headers"]).json()["body"] == doctor["body"]
+
+
+def test_expired_subscription_gets_no_body(client, doctor, user, subscribe):
+    subscribe(user["id"], doctor["doctor_id"], expires_at=_now() - timedelta(days=1))
+    assert _get(client, doctor, user["headers"]).json()["body"] is None
+
+
+def test_author_and_admin_get_body(client, doctor, admin):
+    assert _get(client, doctor, doctor["headers"]).json()["body"] == doctor["body"]
+    assert _get(client, doctor, admin["headers"]).json()["body"] == doctor["body"]
+
+
+# ======== Keyset-пагинация ========
+
+ITEMS = 5
+
+
+@pytest.fixture
+def author_items(doctor):
+    """Ещё ITEMS - 1 материалов того же врача, созданных подряд (часть — в одну секунду)."""
+    with SessionLocal() as db:
+        for n in range(ITEMS - 1):
+            db.add(ContentItem(author_doctor_id=doctor["doctor_id"], title=f"Материал {n}", kind="article"))
+        db.commit()
+        ids = db.scalars(select(ContentItem.id).where(ContentItem.author_doctor_id == doctor["doctor_id"])).all()
+    return sorted(ids, reverse=True)
+
+
+def test_author_feed_walks_all_pages(walk, doctor, author_items):
+    ids, pages = walk("/api/v1/content", {"doctor_id": doctor["doctor_id"], "limit": 2})
+    assert ids == author_items  # новые сверху, без повторов и пропусков
+    assert pages == 3
+
+
+def test_global_feed_walks_all_pages(walk, author_items):
+    with SessionLocal() as db:
+        total = db.scalar(select(func.count()).select_from(ContentItem))
+    ids, _ = walk("/api/v1/content", {"limit": 3}, max_pages=total)
+    assert len(ids) == len(set(ids)) == total
+    assert set(author_items) <= set(ids)
+
+
+def test_subscription_feed_walks_all_pages(walk, doctor, author_items, user, subscribe):
+    subscribe(user["id"], doctor["doctor_id"])
+    ids, pages = walk("/api/v1/content/feed", {"limit": 2}, headers=user["headers"])
+    assert ids == author_items
+    assert pages == 3
+
+
+def test_broken_cursor_is_400(client):
+    assert client.get("/api/v1/content", params={"cursor": "not-a-cursor"}).status_code == 400
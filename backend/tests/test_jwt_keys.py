@@ -0,0 +1,61 @@
+# tests/test_jwt_keys.py
+"""Ключи JWT: KeyRing по каталогу ключей, проверка типа ключа, CLI jwt_keygen."""
+import sys
+
+import pytest
+from jose import JWTError
+
+from app.core.jwt_keys import load_keyring
+from app.services import jwt_keygen
+from app.services.jwt_keygen import generate, retire, write_private
+
+
+@pytest.mark.parametrize("alg", ["RS256", "ES256"])
+def test_rotation_keeps_old_tokens_valid(tmp_path, alg):
+    write_private(str(tmp_path), "20250101-aaaa", generate(alg))
+    old = load_keyring(alg, keys_dir=str(tmp_path))
+    token = old.encode({"sub": "a@example.com"})
+
+    write_private(str(tmp_path), "20250201-bbbb", generate(alg))
+    retire(str(tmp_path), "20250101-aaaa")
+    ring = load_keyring(alg, keys_dir=str(tmp_path))
+
+    assert ring.signing_kid == "20250201-bbbb"
+    assert ring.kids == ["20250101-aaaa", "20250201-bbbb"]
+    assert ring.decode(token)["sub"] == "a@example.com"
+    assert ring.decode(ring.encode({"sub": "b@example.com"}))["sub"] == "b@example.com"
+
+
+def test_unknown_kid_is_rejected(tmp_path):
+    write_private(str(tmp_path / "a"), "20250101-aaaa", generate("RS256"))
+    write_private(str(tmp_path / "b"), "20250101-bbbb", generate("RS256"))
+    token = load_keyring("RS256", keys_dir=str(tmp_path / "a")).encode({"sub": "x"})
+    with pytest.raises(JWTError):
+        load_keyring("RS256", keys_dir=str(tmp_path / "b")).decode(token)
+
+
+@pytest.mark.parametrize("key_alg, jwt_alg", [("ES256", "RS256"), ("RS256", "ES256"), ("ES384", "ES256")])
+def test_key_type_mismatch_is_a_clear_error(tmp_path, key_alg, jwt_alg):
+    write_private(str(tmp_path), "20250101-aaaa", generate(key_alg))
+    with pytest.raises(RuntimeError, match=f"20250101-aaaa.pem: .* does not match JWT_ALG={jwt_alg}"):
+        load_keyring(jwt_alg, keys_dir=str(tmp_path))
+
+
+def _keygen(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, "argv", ["jwt_keygen", *argv])
+    jwt_keygen.main()
+    return capsys.readouterr().out
+
+
+def test_keygen_detects_alg_for_retire_and_list(tmp_path, monkeypatch, capsys):
+    keys = str(tmp_path)
+    _keygen(monkeypatch, capsys, "--dir", keys, "--alg", "ES256", "--kid", "20250101-aaaa")
+    _keygen(monkeypatch, capsys, "--dir", keys, "--kid", "20250201-bbbb")  # alg — по ключам каталога
+
+    out = _keygen(monkeypatch, capsys, "--dir", keys, "--retire", "20250101-aaaa")
+    assert "alg=ES256 signing (latest)=20250201-bbbb" in out
+    assert "alg=ES256" in _keygen(monkeypatch, capsys, "--dir", keys, "--list")
+
+    with pytest.raises(SystemExit, match="are ES256, not RS256"):
+        _keygen(monkeypatch, capsys, "--dir", keys, "--alg", "RS256")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["20250101-aaaa.pub.pem", "20250201-bbbb.pem"]
@@ -0,0 +1,111 @@
+# tests/test_mailer.py
+"""Письма сброса пароля: email_outbox -> диспетчер -> SMTP (bench.smtp_sink), ретраи с паузой."""
+import socket
+from datetime import datetime, timedelta, timezone
+from email import message_from_bytes
+from email.header import decode_header, make_header
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services import mailer
+
+from bench.smtp_sink import SmtpSink
+
+
+@pytest.fixture
+def outbox():
+    """Пустая очередь писем; возвращает функцию чтения строк очереди."""
+    with SessionLocal() as db:
+        db.execute(delete(EmailOutbox))
+        db.commit()
+
+    def rows():
+        with SessionLocal() as db:
+            return db.scalars(select(EmailOutbox).order_by(EmailOutbox.id)).all()
+
+    return rows
+
+
+@pytest.fixture
+def sink(run, monkeypatch):
+    sink = run(SmtpSink(port=0).start)
+    monkeypatch.setattr(settings, "MAIL_BACKEND", "smtp")
+    monkeypatch.setattr(settings, "SMTP_HOST", sink.host)
+    monkeypatch.setattr(settings, "SMTP_PORT", sink.port)
+    yield sink
+    run(sink.stop)
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _make_due() -> None:
+    """Перемотать паузу: всё, что в очереди, — к отправке сейчас."""
+    with SessionLocal() as db:
+        db.execute(update(EmailOutbox).values(available_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        db.commit()
+
+
+def test_forgot_enqueues_only_for_known_email(client, user, outbox):
+    assert client.post("/api/v1/auth/password/forgot", json={"email": "nobody@example.com"}).status_code == 200
+    assert outbox() == []
+
+    assert client.post("/api/v1/auth/password/forgot", json={"email": user["email"]}).status_code == 200
+    [mail] = outbox()
+    assert mail.to_addr == user["email"] and mail.attempts == 0
+    assert "reset-password?token=" in mail.body
+
+
+def test_dispatch_delivers_to_smtp(client, run, user, outbox, sink):
+    client.post("/api/v1/auth/password/forgot", json={"email": user["email"]})
+
+    assert run(mailer.dispatch) == {"sent": 1, "failed": 0}
+    assert outbox() == []
+    [received] = sink.messages
+    assert received.rcpt_to == [f"<{user['email']}>"]
+    msg = message_from_bytes(received.data)
+    assert str(make_header(decode_header(msg["Subject"]))) == "Сброс пароля"
+    assert "reset-password?token=" in msg.get_payload(decode=True).decode()
+
+
+def test_failed_delivery_is_retried_with_backoff(client, run, user, outbox, sink, monkeypatch):
+    client.post("/api/v1/auth/password/forgot", json={"email": user["email"]})
+    port = sink.port
+    monkeypatch.setattr(settings, "SMTP_PORT", _closed_port())  # SMTP недоступен
+
+    before = datetime.now(timezone.utc)
+    assert run(mailer.dispatch) == {"sent": 0, "failed": 1}
+    [mail] = outbox()
+    assert mail.attempts == 1 and "ConnectionRefusedError" in mail.last_error
+    # пауза после первой попытки — 5 * 2**1 с
+    assert mail.available_at >= before + mailer._backoff(1) - timedelta(seconds=1)
+
+    # до истечения паузы письмо не берётся
+    monkeypatch.setattr(settings, "SMTP_PORT", port)
+    assert run(mailer.dispatch_batch) == {"leased": 0, "sent": 0, "failed": 0}
+
+    _make_due()
+    assert run(mailer.dispatch) == {"sent": 1, "failed": 0}
+    assert outbox() == [] and len(sink.messages) == 1
+
+
+def test_gives_up_after_max_attempts(client, run, user, outbox, monkeypatch):
+    monkeypatch.setattr(settings, "MAIL_BACKEND", "smtp")
+    monkeypatch.setattr(settings, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SMTP_PORT", _closed_port())
+    monkeypatch.setattr(settings, "MAIL_MAX_ATTEMPTS", 2)
+    client.post("/api/v1/auth/password/forgot", json={"email": user["email"]})
+
+    for _ in range(2):
+        assert run(mailer.dispatch)["failed"] == 1
+        _make_due()
+    assert run(mailer.dispatch) == {"sent": 0, "failed": 0}
+    [mail] = outbox()
+    assert mail.attempts == 2
@@ -0,0 +1,116 @@
+# tests/test_payments.py
+"""Вебхук оплаты: фейковый провайдер с ретраями, подпись, невалидные тела."""
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import pytest
+from sqlalchemy import func, select
+
+from app.api.v1.payments import sign_payload
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.outbox import OutboxEvent
+from app.models.payment import Payment
+
+PROVIDER = "fakepay"
+
+
+@dataclass
+class FakeProvider:
+    """Шлёт вебхук, как провайдер: HMAC сырого тела в X-Signature, повтор, пока не 2xx."""
+
+    client: Any
+    secret: str = settings.PAYMENT_WEBHOOK_SECRET or ""
+    max_attempts: int = 3
+
+    def send(self, body: bytes, signature: Optional[str] = None):
+        headers = {"X-Signature": "sha256=" + (signature or sign_payload(body, self.secret))}
+        for _ in range(self.max_attempts):
+            r = self.client.post(f"/api/v1/payments/webhooks/{PROVIDER}", content=body, headers=headers)
+            if r.status_code < 500:
+                return r
+        return r
+
+    def event(self, user_id: int, status: str = "succeeded", **fields: Any) -> bytes:
+        payload: Dict[str, Any] = {
+            "transaction_id": f"tx-{uuid.uuid4().hex}",
+            "status": status,
+            "user_id": user_id,
+            "amount": "150000.00",
+            "currency": "UZS",
+            **fields,
+        }
+        return json.dumps(payload).encode()
+
+
+@pytest.fixture
+def provider(client):
+    return FakeProvider(client)
+
+
+def _payments(transaction_id: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count()).select_from(Payment)
+            .where(Payment.provider == PROVIDER, Payment.idempotency_key == transaction_id)
+        )
+
+
+def _payment_events(transaction_id: str) -> int:
+    with SessionLocal() as db:
+        payment_id = db.scalar(select(Payment.id).where(Payment.idempotency_key == transaction_id))
+        events = db.scalars(select(OutboxEvent.payload).where(OutboxEvent.topic.like("payment.%"))).all()
+    return sum(1 for e in events if e["payment_id"] == payment_id)
+
+
+def test_duplicate_delivery_is_acknowledged_once(provider, user):
+    body = provider.event(user["id"])
+    tx = json.loads(body)["transaction_id"]
+
+    for _ in range(3):
+        r = provider.send(body)
+        assert r.status_code == 200, r.text
+        assert r.json() == {"status": "ok"}
+
+    assert _payments(tx) == 1
+    assert _payment_events(tx) == 1
+
+
+def test_pending_then_succeeded_emits_single_event(provider, user):
+    pending = provider.event(user["id"], status="pending")
+    tx = json.loads(pending)["transaction_id"]
+    succeeded = provider.event(user["id"], transaction_id=tx)
+
+    assert provider.send(pending).status_code == 200
+    assert _payment_events(tx) == 0
+    assert provider.send(succeeded).status_code == 200
+    assert provider.send(succeeded).status_code == 200
+    assert provider.send(pending).status_code == 200  # откат назад — no-op
+
+    assert _payments(tx) == 1
+    assert _payment_events(tx) == 1
+
+
+def test_bad_signature_is_rejected(provider, user):
+    body = provider.event(user["id"])
+    r = provider.send(body, signature=sign_payload(body, "wrong-secret"))
+    assert r.status_code == 401
+    assert _payments(json.loads(body)["transaction_id"]) == 0
+
+
+@pytest.mark.parametrize(
+    "raw, fields",
+    [
+        pytest.param(b"not json at all", None, id="not-json"),
+        pytest.param(b'{"transaction_id": "tx-1", "status": "succeeded"}', None, id="missing-fields"),
+        pytest.param(None, {"amount": "-1"}, id="negative-amount"),
+        pytest.param(None, {"status": "refunded"}, id="unknown-status"),
+    ],
+)
+def test_invalid_body_is_422_not_500(provider, user, raw, fields):
+    body = raw if raw is not None else provider.event(user["id"], **fields)
+    r = provider.send(body)
+    assert r.status_code == 422, r.text
+    assert isinstance(r.json()["detail"], list)
@@ -0,0 +1,83 @@
+# tests/test_query_budget.py
+"""Бюджет SQL-запросов на эндпоинт (app.testing.query_budget): списки без N+1."""
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.clinic import Clinic
+from app.models.content_item import ContentItem
+from app.models.doctor_profile import DoctorProfile
+
+DOCTORS = 6
+
+
+@pytest.fixture
+def catalog(make_user):
+    """DOCTORS врачей в разных клиниках, по два материала у каждого; title врачей содержит tag."""
+    tag = uuid.uuid4().hex[:8]
+    user_ids = [make_user()["id"] for _ in range(DOCTORS)]
+    doctor_ids = []
+    with SessionLocal() as db:
+        for i, user_id in enumerate(user_ids):
+            clinic = Clinic(name=f"Клиника {tag} {i}", address=f"ул. Тестовая, {i}")
+            doctor = DoctorProfile(user_id=user_id, title=f"Терапевт {tag}", clinic=clinic)
+            db.add(doctor)
+            db.flush()
+            doctor_ids.append(doctor.id)
+            for n in range(2):
+                db.add(ContentItem(author_doctor_id=doctor.id, title=f"Материал {n}", kind="article", body="..."))
+        db.commit()
+    return {"tag": tag, "doctor_ids": doctor_ids}
+
+
+def test_doctor_search_is_one_query(client, catalog, query_budget):
+    with query_budget(1):
+        r = client.get("/api/v1/doctors/search", params={"q": catalog["tag"], "limit": 50})
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert len(items) == DOCTORS
+    assert all(item["clinic"]["name"].startswith("Клиника") for item in items)
+
+
+def test_content_list_is_one_query(client, catalog, query_budget):
+    with query_budget(1):
+        r = client.get("/api/v1/content", params={"limit": 2 * DOCTORS})
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 2 * DOCTORS
+
+
+def test_content_next_page_is_one_query(client, catalog, query_budget):
+    first = client.get("/api/v1/content", params={"limit": DOCTORS}).json()
+    with query_budget(1):
+        r = client.get("/api/v1/content", params={"limit": DOCTORS, "cursor": first["next_cursor"]})
+    assert r.status_code == 200
+    second = [item["id"] for item in r.json()["items"]]
+    assert len(second) == DOCTORS
+    assert not set(second) & {item["id"] for item in first["items"]}
+
+
+def test_subscription_feed_has_no_nplusone(client, catalog, user, subscribe, query_budget):
+    for doctor_id in catalog["doctor_ids"]:
+        subscribe(user["id"], doctor_id)
+    with query_budget(3):  # принципал (промах кэша), доступы, страница
+        r = client.get("/api/v1/content/feed", params={"limit": 50}, headers=user["headers"])
+    assert r.status_code == 200
+    assert len(r.json()["items"]) == 2 * DOCTORS
+
+
+def test_budget_reports_nplusone(query_budget):
+    with pytest.raises(pytest.fail.Exception, match="possible N\\+1"):
+        with query_budget(100, nplusone=3):
+            with SessionLocal() as db:
+                for i in range(3):
+                    db.scalar(select(DoctorProfile.title).where(DoctorProfile.id == i))
+
+
+def test_budget_reports_excess_queries(query_budget):
+    with pytest.raises(pytest.fail.Exception, match="query budget exceeded: 2 > 1"):
+        with query_budget(1):
+            with SessionLocal() as db:
+                db.scalar(select(DoctorProfile.id).limit(1))
+                db.scalar(select(Clinic.id).limit(1))
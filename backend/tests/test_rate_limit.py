@@ -0,0 +1,139 @@
+# tests/test_rate_limit.py
+"""Rate limit: sliding window, LRU, Retry-After, IP за прокси и 429 до хендлера."""
+import asyncio
+from typing import Optional
+
+import pytest
+from starlette.requests import Request
+
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.kv import InMemoryKV
+from app.core.rate_limit import KVRateLimiter, MemoryRateLimiter, _retry_after, client_ip
+
+WINDOW = 60
+LIMIT = 10
+T0 = 1_000 * WINDOW  # начало окна
+
+
+class Clock:
+    def __init__(self, now: float = T0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "kv"])
+def limiter(request):
+    """(лимитер, часы): оба бэкенда на одних и тех же часах."""
+    clock = Clock()
+    if request.param == "memory":
+        return MemoryRateLimiter(100, clock=clock), clock
+    return KVRateLimiter(InMemoryKV(), clock=clock), clock
+
+
+def _hits(limiter, n: int, key: str = "k"):
+    async def run():
+        return [await limiter.hit(key, LIMIT, WINDOW) for _ in range(n)]
+
+    return asyncio.run(run())
+
+
+def test_limit_within_one_window(limiter):
+    limiter, clock = limiter
+    results = _hits(limiter, LIMIT + 2)
+    assert all(allowed for allowed, _ in results[:LIMIT])
+    # curr уже на лимите: ждать до конца окна
+    assert results[LIMIT] == (False, WINDOW)
+    clock.now += 15
+    assert _hits(limiter, 1) == [(False, WINDOW - 15)]
+
+
+def test_previous_window_fades_linearly(limiter):
+    limiter, clock = limiter
+    _hits(limiter, LIMIT + 1)  # prev = 11: отклонённые попытки тоже считаются
+    clock.now = T0 + WINDOW + 30  # половина следующего окна: 11 * 0.5 + curr
+    results = _hits(limiter, 5)
+    assert [allowed for allowed, _ in results] == [True, True, True, True, False]
+    # 11 * (30 - t) / 60 + 5 <= 10  ->  t >= 30 - 5 * 60 / 11 = 2.7
+    assert results[-1] == (False, 3)
+
+
+def test_skipped_window_resets_counters(limiter):
+    limiter, clock = limiter
+    _hits(limiter, LIMIT + 5)
+    clock.now = T0 + 2 * WINDOW + 1  # окно T0 + WINDOW пропущено целиком
+    assert all(allowed for allowed, _ in _hits(limiter, LIMIT))
+
+
+def test_keys_are_independent(limiter):
+    limiter, _ = limiter
+    _hits(limiter, LIMIT + 1, key="a")
+    assert _hits(limiter, 1, key="b") == [(True, 0)]
+
+
+def test_memory_limiter_evicts_least_recently_used():
+    limiter = MemoryRateLimiter(2, clock=Clock())
+    _hits(limiter, LIMIT + 1, key="a")
+    _hits(limiter, LIMIT + 1, key="b")
+    _hits(limiter, 1, key="a")  # a снова свежий — вытесняется b
+    _hits(limiter, 1, key="c")
+    assert len(limiter) == 2 and limiter.evictions == 1
+    assert _hits(limiter, 1, key="a")[0][0] is False  # a помнит перебор
+    assert _hits(limiter, 1, key="b") == [(True, 0)]  # счётчик b потерян
+
+
+@pytest.mark.parametrize(
+    "prev, curr, elapsed, expected",
+    [
+        (0, 11, 0, 60),  # только текущее окно — до его конца
+        (0, 3, 59.5, 1),  # не меньше секунды
+        (20, 10, 10, 50),  # curr на лимите — prev не поможет
+        (20, 5, 0, 45),  # 20 * (60 - t) / 60 + 5 <= 10  ->  t = 45
+        (12, 4, 30, 1),  # 12 * 30 / 60 + 4 = 10: уже на лимите, минимум 1 с
+    ],
+)
+def test_retry_after(prev, curr, elapsed, expected):
+    assert _retry_after(prev, curr, LIMIT, WINDOW, elapsed) == expected
+
+
+def _request(forwarded: Optional[str]) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded is not None else []
+    return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 5000)})
+
+
+@pytest.mark.parametrize(
+    "trust, hops, forwarded, expected",
+    [
+        (False, 1, "1.1.1.1", "10.0.0.1"),
+        (True, 1, None, "10.0.0.1"),
+        (True, 1, "203.0.113.7", "203.0.113.7"),
+        # клиент подставил свой X-Forwarded-For, прокси дописал реальный адрес
+        (True, 1, "1.1.1.1, 203.0.113.7", "203.0.113.7"),
+        (True, 2, "1.1.1.1, 203.0.113.7, 10.0.0.2", "203.0.113.7"),
+        (True, 2, "203.0.113.7", "203.0.113.7"),
+        (True, 1, " , ", "10.0.0.1"),
+    ],
+)
+def test_client_ip(monkeypatch, trust, hops, forwarded, expected):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", trust)
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", hops)
+    assert client_ip(_request(forwarded)) == expected
+
+
+def test_login_is_limited_before_handler(client, user, monkeypatch, query_budget):
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOGIN_EMAIL", "2/60")
+    monkeypatch.setattr(rate_limit, "_limiter", MemoryRateLimiter(100))
+    body = {"email": user["email"], "password": "wrong-password"}
+
+    for _ in range(2):
+        assert client.post("/api/v1/auth/login", json=body).status_code == 401
+    with query_budget(0):  # отказ — до хендлера: ни запроса в БД, ни KDF
+        r = client.post("/api/v1/auth/login", json=body)
+    assert r.status_code == 429
+    assert 1 <= int(r.headers["retry-after"]) <= 60
+    # правильный пароль тоже ждёт: лимит на email, а не на неудачи
+    ok = {"email": user["email"], "password": user["password"]}
+    assert client.post("/api/v1/auth/login", json=ok).status_code == 429